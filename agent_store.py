@@ -0,0 +1,222 @@
+from collections.abc import MutableMapping
+import numpy as np
+
+class AgentStore:
+    def __init__(self, capacity=16):
+        """
+        Almacén de agentes en arreglos (estructura de arreglos) indexados por el índice del agente.
+        El índice 0 no se usa para que coincida con UNOCCUPIED en la matriz de celdas. Los índices
+        de los agentes eliminados se reciclan mediante una lista libre.
+
+        Parameters:
+        - capacity (int): Número inicial de agentes que caben sin redimensionar los arreglos.
+        """
+        self.pos_y = np.zeros(capacity + 1, dtype=np.int32)
+        self.pos_x = np.zeros(capacity + 1, dtype=np.int32)
+        self.goal = np.zeros(capacity + 1, dtype=bool)    # True si el agente está en una casilla objetivo.
+        self.alive = np.zeros(capacity + 1, dtype=bool)   # True si el índice pertenece a un agente vivo.
+        self.free_ids = []                # Índices liberados que se reutilizan antes de crecer.
+        self.next_id = 1                  # Primer índice nunca usado.
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, agent):
+        return 0 < agent < len(self.alive) and bool(self.alive[agent])
+
+    def max_id(self):
+        """
+        Obtiene el mayor índice que se ha asignado hasta ahora.
+
+        Returns:
+        - int: Mayor índice asignado.
+        """
+        return self.next_id - 1
+
+    def grow(self, capacity):
+        """
+        Redimensiona los arreglos para que quepan al menos 'capacity' agentes.
+
+        Parameters:
+        - capacity (int): Número de agentes requerido.
+        """
+        size = len(self.alive)
+        if capacity + 1 <= size:
+            return
+        new_size = max(capacity + 1, 2 * size)
+        for name in ('pos_y', 'pos_x', 'goal', 'alive'):
+            old = getattr(self, name)
+            new = np.zeros(new_size, dtype=old.dtype)
+            new[:size] = old
+            setattr(self, name, new)
+
+    def add(self, pos, goal=False):
+        """
+        Añade un agente y le asigna un índice libre.
+
+        Parameters:
+        - pos (tuple): Tupla (y, x) con la posición del agente.
+        - goal (bool): True si el agente está en una casilla objetivo.
+
+        Returns:
+        - int: Índice del nuevo agente.
+        """
+        if self.free_ids:
+            agent = self.free_ids.pop()
+        else:
+            agent = self.next_id
+            self.next_id += 1
+            self.grow(agent)
+        self.pos_y[agent] = pos[0]
+        self.pos_x[agent] = pos[1]
+        self.goal[agent] = goal
+        self.alive[agent] = True
+        self.count += 1
+        return agent
+
+    def add_many(self, pos_y, pos_x, goal):
+        """
+        Añade varios agentes de una vez. Se reutilizan primero los índices libres y el resto se
+        toma a continuación de next_id.
+
+        Parameters:
+        - pos_y (np.ndarray): Filas de los agentes.
+        - pos_x (np.ndarray): Columnas de los agentes.
+        - goal (np.ndarray): True para los agentes en una casilla objetivo.
+
+        Returns:
+        - np.ndarray: Índices de los nuevos agentes, en el orden de las posiciones.
+        """
+        n = len(pos_y)
+        reused = min(n, len(self.free_ids))
+        recycled = [self.free_ids.pop() for _ in range(reused)]
+        fresh = np.arange(self.next_id, self.next_id + n - reused)
+        self.next_id += n - reused
+        self.grow(self.next_id - 1)
+        agents = np.concatenate([np.array(recycled, dtype=np.int64), fresh]).astype(np.intp)
+        self.pos_y[agents] = pos_y
+        self.pos_x[agents] = pos_x
+        self.goal[agents] = goal
+        self.alive[agents] = True
+        self.count += n
+        return agents
+
+    def move(self, agent, pos, goal):
+        """
+        Actualiza la posición y el estado objetivo de un agente.
+
+        Parameters:
+        - agent (int): Índice del agente.
+        - pos (tuple): Tupla (y, x) con la nueva posición.
+        - goal (bool): True si la nueva posición es una casilla objetivo.
+        """
+        self.pos_y[agent] = pos[0]
+        self.pos_x[agent] = pos[1]
+        self.goal[agent] = goal
+
+    def remove(self, agent):
+        """
+        Elimina un agente y libera su índice para reutilizarlo.
+
+        Parameters:
+        - agent (int): Índice del agente.
+        """
+        if agent not in self:
+            raise KeyError(agent)
+        self.alive[agent] = False
+        self.goal[agent] = False
+        self.free_ids.append(int(agent))
+        self.count -= 1
+
+    def ids(self):
+        """
+        Obtiene los índices de los agentes vivos en orden ascendente.
+
+        Returns:
+        - np.ndarray: Índices de los agentes vivos.
+        """
+        return np.flatnonzero(self.alive)
+
+class PositionView(MutableMapping):
+    def __init__(self, store, world):
+        """
+        Vista tipo diccionario {agente: (y, x)} sobre un AgentStore, compatible con aindx_cpos.
+        Las escrituras mueven al agente con GridWorld.set_agent_pos y los borrados lo eliminan del
+        mundo con GridWorld.remove_agent, así que las celdas y los contadores siguen al día.
+
+        Parameters:
+        - store: Objeto AgentStore.
+        - world: Objeto GridWorld al que pertenece el almacén.
+        """
+        self.store = store
+        self.world = world
+
+    def __getitem__(self, agent):
+        if agent not in self.store:
+            raise KeyError(agent)
+        return (int(self.store.pos_y[agent]), int(self.store.pos_x[agent]))
+
+    def __setitem__(self, agent, pos):
+        if agent not in self.store:
+            raise KeyError(agent)
+        self.world.set_agent_pos(agent, (int(pos[0]), int(pos[1])))
+
+    def __delitem__(self, agent):
+        if agent not in self.store:
+            raise KeyError(agent)
+        self.world.remove_agent(agent)
+
+    def __contains__(self, agent):
+        return agent in self.store
+
+    def __iter__(self):
+        return iter(self.store.ids().tolist())
+
+    def __len__(self):
+        return len(self.store)
+
+    def items(self):
+        ids = self.store.ids()
+        return list(zip(ids.tolist(), zip(self.store.pos_y[ids].tolist(), self.store.pos_x[ids].tolist())))
+
+class GoalView(MutableMapping):
+    def __init__(self, store, world):
+        """
+        Vista tipo diccionario {agente: bool} sobre un AgentStore, compatible con aindx_goalreached.
+        Las escrituras pasan por GridWorld.set_goal_flag para que agents_inside y dirty_agents no
+        se desincronicen del arreglo de estados objetivo, y los borrados por GridWorld.remove_agent.
+
+        Parameters:
+        - store: Objeto AgentStore.
+        - world: Objeto GridWorld al que pertenece el almacén.
+        """
+        self.store = store
+        self.world = world
+
+    def __getitem__(self, agent):
+        if agent not in self.store:
+            raise KeyError(agent)
+        return bool(self.store.goal[agent])
+
+    def __setitem__(self, agent, goal):
+        if agent not in self.store:
+            raise KeyError(agent)
+        self.world.set_goal_flag((int(self.store.pos_y[agent]), int(self.store.pos_x[agent])), bool(goal))
+
+    def __delitem__(self, agent):
+        if agent not in self.store:
+            raise KeyError(agent)
+        self.world.remove_agent(agent)
+
+    def __contains__(self, agent):
+        return agent in self.store
+
+    def __iter__(self):
+        return iter(self.store.ids().tolist())
+
+    def __len__(self):
+        return len(self.store)
+
+    def values(self):
+        return self.store.goal[self.store.alive].tolist()
@@ -0,0 +1,174 @@
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import time
+import numpy as np
+import gworld as world
+from solver_model import SolverModel, square_goal
+from vector_solver import VectorSolverModel
+from parallel import ParallelSolverModel
+
+#### CONSTANTS ####
+
+WORLD_SIZES = [21, 100, 300, 1000]
+AGENT_DENSITIES = [0.05, 0.2]       # Fracción de casillas ocupadas por agentes.
+GOAL_FRACTIONS = [0.1, 0.3]         # Fracción del lado del mundo que ocupa el cuadrado objetivo.
+QUICK_WORLD_SIZES = [21, 100]
+SEED = 0
+MAX_SEQUENTIAL_AGENTS = 20000       # Por encima de este número solo se mide el motor vectorizado.
+REGRESSION_THRESHOLD = 1.25         # Relación de tiempos a partir de la cual se marca una regresión.
+
+def timeit(func, repeat, setup=None):
+    """
+    Mide el tiempo de una función y devuelve la mediana por llamada.
+
+    Parameters:
+    - func: Función a medir.
+    - repeat (int): Número de llamadas medidas.
+    - setup: Función opcional que se ejecuta antes de cada llamada sin contar su tiempo.
+
+    Returns:
+    - float: Mediana de segundos por llamada.
+    """
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def build_world(world_size, num_agents, square_size):
+    """
+    Crea un mundo con semilla fija, agentes aleatorios y un cuadrado objetivo centrado.
+
+    Parameters:
+    - world_size (int): Lado del mundo cuadrado.
+    - num_agents (int): Número de agentes.
+    - square_size (int): Tamaño del cuadrado objetivo.
+
+    Returns:
+    - GridWorld: Mundo inicializado.
+    """
+    world_grid = world.GridWorld(world_size, world_size, seed=SEED)
+    with contextlib.redirect_stdout(io.StringIO()):
+        world_grid.add_goal_pos(square_goal(world_size // 2, world_size // 2, square_size))
+        world_grid.add_agents_rand(num_agents)
+    return world_grid
+
+def bench_case(world_size, density, goal_fraction, repeat):
+    """
+    Mide todas las operaciones para una combinación de tamaño, densidad y tamaño de figura.
+
+    Parameters:
+    - world_size (int): Lado del mundo cuadrado.
+    - density (float): Fracción de casillas ocupadas por agentes.
+    - goal_fraction (float): Fracción del lado del mundo que ocupa el cuadrado objetivo.
+    - repeat (int): Número de llamadas medidas por operación.
+
+    Returns:
+    - list: Resultados de cada operación.
+    """
+    num_agents = max(1, int(world_size * world_size * density))
+    square_size = max(1, int(world_size * goal_fraction))
+    world_grid = build_world(world_size, num_agents, square_size)
+    params = {
+        'world_size': world_size,
+        'num_agents': num_agents,
+        'goal_cells': len(world_grid.goal_pos),
+        'density': density,
+        'goal_fraction': goal_fraction,
+    }
+    results = []
+
+    def record(case, seconds):
+        results.append(dict(params, case=case, seconds_per_call=seconds, calls=repeat))
+
+    def spawn():
+        with contextlib.redirect_stdout(io.StringIO()):
+            world.GridWorld(world_size, world_size, seed=SEED).add_agents_rand(num_agents)
+
+    record('add_agents_rand', timeit(spawn, repeat))
+    record('get_agents_in_goal', timeit(world_grid.get_agents_in_goal, repeat))
+
+    # Traslación de ida y vuelta para que la figura no se salga del mundo
+    shifts = iter([1, -1] * repeat)
+    record('goal_translation', timeit(lambda: world_grid.translate_goal(0, next(shifts)), repeat))
+
+    if num_agents <= MAX_SEQUENTIAL_AGENTS:
+        solver = SolverModel(world_grid)
+        record('solve_step_sequential', timeit(solver.solve_step, repeat))
+
+    vector_world = build_world(world_size, num_agents, square_size)
+    vector_solver = VectorSolverModel(vector_world, seed=SEED)
+    record('solve_step_vector', timeit(vector_solver.solve_step, repeat))
+
+    parallel_solver = ParallelSolverModel(build_world(world_size, num_agents, square_size), seed=SEED)
+    try:
+        record('solve_step_parallel', timeit(parallel_solver.solve_step, repeat))
+    finally:
+        parallel_solver.close()
+    return results
+
+def compare(results, baseline_path, threshold=REGRESSION_THRESHOLD):
+    """
+    Compara los resultados con una ejecución anterior e informa de las regresiones.
+
+    Parameters:
+    - results (list): Resultados de la ejecución actual.
+    - baseline_path (str): Fichero JSON de una ejecución anterior.
+    - threshold (float): Relación de tiempos a partir de la cual se marca una regresión.
+
+    Returns:
+    - list: Resultados de la ejecución actual que son regresiones.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+    key = lambda r: (r['case'], r['world_size'], r['num_agents'], r['goal_cells'])
+    previous = {key(r): r['seconds_per_call'] for r in baseline}
+    regressions = []
+    for r in results:
+        if key(r) in previous and previous[key(r)] > 0:
+            ratio = r['seconds_per_call'] / previous[key(r)]
+            r['baseline_ratio'] = round(ratio, 3)
+            if ratio > threshold:
+                regressions.append(r)
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmarks de escalado de la simulación')
+    parser.add_argument('--quick', action='store_true', help='Solo mundos pequeños')
+    parser.add_argument('--repeat', type=int, default=5, help='Llamadas medidas por operación')
+    parser.add_argument('--out', default='benchmark_results.json')
+    parser.add_argument('--compare', metavar='JSON', help='Resultados anteriores con los que comparar')
+    args = parser.parse_args()
+
+    results = []
+    for world_size in (QUICK_WORLD_SIZES if args.quick else WORLD_SIZES):
+        for density in AGENT_DENSITIES:
+            for goal_fraction in GOAL_FRACTIONS:
+                for r in bench_case(world_size, density, goal_fraction, args.repeat):
+                    print('%-22s size=%-5d agents=%-7d goal=%-7d %.6f s' % (r['case'], r['world_size'], r['num_agents'],
+                                                                           r['goal_cells'], r['seconds_per_call']))
+                    results.append(r)
+
+    regressions = compare(results, args.compare) if args.compare else []
+    with open(args.out, 'w') as f:
+        json.dump({
+            'meta': {
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'platform': platform.platform(),
+                'seed': SEED,
+                'repeat': args.repeat,
+            },
+            'results': results,
+        }, f, indent=1)
+    for r in regressions:
+        print('REGRESIÓN: %s size=%d agents=%d x%.2f' % (r['case'], r['world_size'], r['num_agents'], r['baseline_ratio']))
+    print('Resultados en', args.out)
@@ -0,0 +1,175 @@
+import json
+import os
+import struct
+import numpy as np
+import gworld as world
+
+#### CONSTANTS ####
+
+MAGIC = b'SHAPEBUG'
+FORMAT_VERSION = 2
+ALIGNMENT = 64                    # Alineación en bytes de cada arreglo dentro del fichero.
+
+def save_snapshot(path, world_grid, solver=None):
+    """
+    Guarda el estado del mundo (y opcionalmente del solver) en un fichero binario compacto.
+    El fichero contiene una cabecera JSON seguida de los arreglos en bruto, alineados para poder
+    cargarlos con memory-mapping: celdas, agentes (posiciones, estado objetivo y vivos), índices
+    libres, figura objetivo y, si está al día, el campo de distancias. También se guarda el estado de los
+    generadores aleatorios del mundo y, si lo tiene, el del solver.
+    El fichero se escribe aparte y después se renombra, así un mundo cargado desde la misma ruta
+    (cuyos arreglos siguen proyectados sobre el fichero anterior) no se queda sin datos.
+
+    Parameters:
+    - path (str): Ruta del fichero de salida.
+    - world_grid: Objeto GridWorld a guardar.
+    - solver: Objeto SolverModel o VectorSolverModel opcional.
+    """
+    if not world_grid.dense:
+        raise ValueError('Snapshots require a dense grid')
+    store = world_grid.agents
+    size = store.next_id
+    goal = world_grid.goal_cells().astype(np.int32)
+    arrays = {
+        'cells': world_grid.cells,
+        'pos_y': store.pos_y[:size],
+        'pos_x': store.pos_x[:size],
+        'goal': store.goal[:size],
+        'alive': store.alive[:size],
+        'free_ids': np.array(store.free_ids, dtype=np.int64),
+        'goal_pos': goal,
+    }
+    # El campo de distancias se guarda si está al día para que la reanudación sea exacta
+    if world_grid.distance_field is not None and world_grid.distance_field_version == world_grid.goal_version:
+        arrays['distance_field'] = world_grid.get_distance_field()
+
+    solver_state = None
+    if solver is not None:
+        solver_state = {
+            'class': type(solver).__name__,
+            'probability': solver.probability,
+            'use_distance_field': solver.use_distance_field,
+            # Los motores sin semilla propia comparten el generador del mundo
+            'rng': solver.rng.bit_generator.state if getattr(solver, 'rng', world_grid.rng) is not world_grid.rng else None,
+        }
+    header = {
+        'format_version': FORMAT_VERSION,
+        'h': world_grid.h,
+        'w': world_grid.w,
+        'goal_origin': list(world_grid.goal_origin),
+        'next_id': store.next_id,
+        'count': store.count,
+        'distance_field_free': int(world_grid.distance_field_free),
+        'random_state': world_grid.stream.get_state(),
+        'solver': solver_state,
+        'arrays': {},
+    }
+
+    # Desplazamiento de cada arreglo relativo al inicio de la zona de datos
+    offset = 0
+    for name, array in arrays.items():
+        header['arrays'][name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += _aligned(array.nbytes)
+    header_bytes = json.dumps(header).encode()
+    data_start = _aligned(len(MAGIC) + 8 + len(header_bytes))
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b'\0' * (data_start - f.tell()))
+        for name, array in arrays.items():
+            f.write(np.ascontiguousarray(array).tobytes())
+            f.write(b'\0' * (_aligned(array.nbytes) - array.nbytes))
+    os.replace(tmp_path, path)
+
+def read_snapshot(path, mode='r'):
+    """
+    Lee la cabecera de una instantánea y proyecta sus arreglos en memoria (memory-mapping).
+
+    Parameters:
+    - path (str): Ruta de la instantánea.
+    - mode (str): Modo de np.memmap: 'r' para solo lectura o 'c' para copia en escritura (las
+      modificaciones quedan en memoria y no llegan al fichero).
+
+    Returns:
+    - tuple: (cabecera, diccionario de arreglos proyectados).
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError('Not a snapshot file: %s' % path)
+        header_len = struct.unpack('<Q', f.read(8))[0]
+        header = json.loads(f.read(header_len))
+    if header['format_version'] != FORMAT_VERSION:
+        raise ValueError('Unsupported snapshot version: %s' % header['format_version'])
+
+    data_start = _aligned(len(MAGIC) + 8 + header_len)
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        shape = tuple(spec['shape'])
+        if int(np.prod(shape)) == 0:
+            arrays[name] = np.empty(shape, dtype=spec['dtype'])
+        else:
+            arrays[name] = np.memmap(path, dtype=spec['dtype'], mode=mode, offset=data_start + spec['offset'],
+                                     shape=shape)
+    return header, arrays
+
+def load_snapshot(path, solver_class=None, visualize=None, restore_random=True):
+    """
+    Restaura un mundo (y opcionalmente un solver) desde una instantánea.
+    Los arreglos no se copian: quedan proyectados sobre el fichero en copia en escritura, de modo
+    que solo se leen las páginas que se usan y solo se copian en memoria las que se modifican.
+
+    Parameters:
+    - path (str): Ruta de la instantánea.
+    - solver_class: Clase del solver a reconstruir (SolverModel o VectorSolverModel). Si es None
+      solo se devuelve el mundo.
+    - visualize: Objeto de visualización opcional para el solver.
+    - restore_random (bool): Si es True se restaura el estado de los generadores aleatorios del
+      mundo; si es False el mundo empieza con una semilla aleatoria.
+
+    Returns:
+    - GridWorld o tuple: El mundo, o (mundo, solver) si se indica solver_class.
+    """
+    header, arrays = read_snapshot(path, mode='c')
+    world_grid = world.GridWorld(header['h'], header['w'])
+    # np.asarray da una vista ndarray sobre la proyección, sin copiar los datos
+    world_grid.cells = np.asarray(arrays['cells'])
+
+    store = world_grid.agents
+    for name in ('pos_y', 'pos_x', 'goal', 'alive'):
+        setattr(store, name, np.asarray(arrays[name]))
+    store.free_ids = arrays['free_ids'].tolist()
+    store.next_id = header['next_id']
+    store.count = header['count']
+
+    goal = arrays['goal_pos']
+    world_grid.goal_list = list(zip(goal[:, 0].tolist(), goal[:, 1].tolist()))
+    world_grid.goal_set = set(world_grid.goal_list)
+    world_grid.goal_mask[goal[:, 0], goal[:, 1]] = True
+    # Se usa el origen guardado: puede no ser la esquina del rectángulo si la figura se envolvió
+    world_grid.set_goal_shape(tuple(header['goal_origin']))
+    world_grid.goal_version += 1
+    world_grid.recount_agents_inside()
+    if 'distance_field' in arrays:
+        world_grid.distance_field = np.asarray(arrays['distance_field'])
+        world_grid.distance_field_version = world_grid.goal_version
+        world_grid.distance_field_free = header['distance_field_free']
+
+    if restore_random:
+        world_grid.stream.set_state(header['random_state'])
+
+    if solver_class is None:
+        return world_grid
+    solver_state = header['solver'] or {}
+    kwargs = {k: solver_state[k] for k in ('probability', 'use_distance_field') if k in solver_state}
+    solver = solver_class(world_grid, visualize, **kwargs)
+    if solver_state.get('rng') and hasattr(solver, 'rng'):
+        # El solver tenía un generador propio, distinto del del mundo
+        solver.rng = np.random.default_rng()
+        solver.rng.bit_generator.state = solver_state['rng']
+    return world_grid, solver
+
+def _aligned(nbytes):
+    return (nbytes + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
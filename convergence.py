@@ -0,0 +1,47 @@
+#### CONSTANTS ####
+
+PLATEAU_STEPS = 20                # Pasos sin mejora tras los que se da la formación por estancada.
+
+class ConvergenceDetector:
+    def __init__(self, world, full_fill=True, plateau_steps=PLATEAU_STEPS, min_gain=1):
+        """
+        Decide cuándo se puede terminar la formación de la figura antes de agotar las iteraciones.
+        Usa los contadores que GridWorld mantiene en cada movimiento, así que cada comprobación
+        cuesta O(1).
+
+        Parameters:
+        - world: Objeto GridWorld a vigilar.
+        - full_fill (bool): Si es True se termina cuando la figura está llena o no quedan agentes
+          fuera de ella.
+        - plateau_steps (int): Se termina si en este número de pasos el máximo de agentes dentro de
+          la figura no ha mejorado al menos 'min_gain'. None o 0 lo desactiva.
+        - min_gain (int): Mejora mínima que reinicia la cuenta del estancamiento.
+        """
+        self.world = world
+        self.full_fill = full_fill
+        self.plateau_steps = plateau_steps
+        self.min_gain = min_gain
+        self.best = world.agents_inside
+        self.best_step = 0
+        self.steps = 0
+        self.reason = None                # 'full' o 'plateau' cuando se detecta la convergencia.
+
+    def update(self):
+        """
+        Registra un paso de la simulación. Se llama después de cada solve_step.
+
+        Returns:
+        - bool: True si la formación ha convergido.
+        """
+        self.steps += 1
+        inside = self.world.agents_inside
+        if inside >= self.best + self.min_gain:
+            self.best = inside
+            self.best_step = self.steps
+
+        if self.full_fill and len(self.world.agents) and (self.world.free_goal_cells == 0 or
+                                                          self.world.agents_outside == 0):
+            self.reason = 'full'
+        elif self.plateau_steps and self.steps - self.best_step >= self.plateau_steps:
+            self.reason = 'plateau'
+        return self.reason is not None
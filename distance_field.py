@@ -0,0 +1,36 @@
+import numpy as np
+
+def toroidal_distance_field(goal_mask):
+    """
+    Calcula, para cada casilla, la distancia en pasos (vecindad de 4 con envolvimiento) a la casilla
+    objetivo más cercana. Equivale a un BFS desde todas las casillas objetivo sobre la cuadrícula
+    envuelta, pero se calcula como una transformada de distancia L1 separable: una pasada por
+    columnas y otra por filas, vectorizadas con NumPy.
+
+    Parameters:
+    - goal_mask (np.ndarray): Máscara booleana (h, w) de las casillas objetivo.
+
+    Returns:
+    - np.ndarray: Matriz (h, w) de distancias. Si no hay casillas objetivo todas valen h + w.
+    """
+    h, w = goal_mask.shape
+    field = np.where(goal_mask, 0, h + w).astype(np.int32)
+    if not goal_mask.any():
+        return field
+    _wrapped_pass(field)
+    _wrapped_pass(field.T)
+    return field
+
+def _wrapped_pass(field):
+    """
+    Transformada de distancia 1-D en el eje 0 con envolvimiento, in situ.
+    Dos vueltas en cada sentido bastan para propagar la distancia alrededor del anillo.
+
+    Parameters:
+    - field (np.ndarray): Matriz de distancias a actualizar.
+    """
+    n = field.shape[0]
+    for i in range(1, 2 * n):
+        np.minimum(field[i % n], field[(i - 1) % n] + 1, out=field[i % n])
+    for i in range(2 * n - 2, -1, -1):
+        np.minimum(field[i % n], field[(i + 1) % n] + 1, out=field[i % n])
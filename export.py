@@ -0,0 +1,136 @@
+import os
+import shutil
+import subprocess
+import numpy as np
+from raster import render_frame, encode_png, encode_ppm
+
+#### CONSTANTS ####
+
+FORMATS = ['png', 'ppm', 'npy', 'mp4']
+BATCHED_FORMATS = ['npy', 'mp4']  # Formatos que escriben varios fotogramas a la vez.
+BATCH_FRAMES = 64                 # Fotogramas máximos por lote.
+BATCH_BYTES = 32 * 2**20          # Tamaño máximo del búfer de fotogramas de un lote.
+
+class FrameExporter:
+    def __init__(self, world, path=None, fmt='png', every=1, batch_size=None, scale=1, fps=10):
+        """
+        Exporta fotogramas del mundo sin interfaz gráfica.
+        Los fotogramas se construyen directamente desde world.cells y la máscara objetivo en un
+        búfer preasignado. Los formatos por lotes (npy, mp4) y la exportación en memoria los
+        acumulan hasta llenar el búfer; png y ppm se codifican de uno en uno con un búfer de un
+        solo fotograma.
+
+        Parameters:
+        - world: Objeto GridWorld denso a exportar.
+        - path (str): Directorio (png, ppm, npy) o fichero de vídeo (mp4) de salida. Si es None los
+          fotogramas se guardan en memoria y se obtienen con frames().
+        - fmt (str): Formato de salida: 'png', 'ppm', 'npy' (un fichero por lote) o 'mp4' (requiere ffmpeg).
+        - every (int): Exporta uno de cada 'every' pasos.
+        - batch_size (int): Número de fotogramas que se codifican juntos en los formatos por lotes.
+          Si es None se usan BATCH_FRAMES fotogramas, o menos si el búfer superaría BATCH_BYTES.
+        - scale (int): Factor entero de ampliación de cada casilla en píxeles.
+        - fps (int): Fotogramas por segundo del vídeo.
+        """
+        if not world.dense:
+            raise ValueError('FrameExporter requires a dense grid')
+        if fmt not in FORMATS:
+            raise ValueError('Unknown export format: %s' % fmt)
+        self.world = world
+        self.path = path
+        self.fmt = fmt
+        self.every = every
+        self.scale = scale
+        self.fps = fps
+        self.step = 0
+        if path is not None and fmt not in BATCHED_FORMATS:
+            batch_size = 1
+        elif batch_size is None:
+            batch_size = max(1, min(BATCH_FRAMES, BATCH_BYTES // (world.h * world.w * 3)))
+        self.batch = np.empty((batch_size, world.h, world.w, 3), dtype=np.uint8)
+        self.batch_steps = []             # Paso de la simulación de cada fotograma del lote actual.
+        self.stored = []                  # Lotes guardados en memoria cuando path es None.
+        self.process = None
+
+        if path is not None and fmt != 'mp4':
+            os.makedirs(path, exist_ok=True)
+        if path is not None and fmt == 'mp4' and shutil.which('ffmpeg') is None:
+            raise RuntimeError('ffmpeg is required to export mp4 video')
+
+    def capture(self, step=None):
+        """
+        Captura el estado actual del mundo si corresponde según el muestreo.
+
+        Parameters:
+        - step (int): Paso de la simulación. Si es None se usa un contador interno.
+        """
+        if step is None:
+            step = self.step
+        self.step = step + 1
+        if step % self.every:
+            return
+
+        render_frame(self.world.cells, self.world.goal_mask, out=self.batch[len(self.batch_steps)])
+        self.batch_steps.append(step)
+        if len(self.batch_steps) == len(self.batch):
+            self.flush()
+
+    def flush(self):
+        """
+        Codifica y escribe el lote de fotogramas pendiente.
+        """
+        if not self.batch_steps:
+            return
+        frames = self.batch[:len(self.batch_steps)]
+        if self.scale > 1:
+            frames = frames.repeat(self.scale, axis=1).repeat(self.scale, axis=2)
+
+        if self.path is None:
+            self.stored.append(frames.copy())
+        elif self.fmt == 'npy':
+            np.save(os.path.join(self.path, 'frames_%06d.npy' % self.batch_steps[0]), frames)
+        elif self.fmt == 'mp4':
+            self.write_video(frames)
+        else:
+            encode = encode_png if self.fmt == 'png' else encode_ppm
+            for step, frame in zip(self.batch_steps, frames):
+                with open(os.path.join(self.path, 'frame_%06d.%s' % (step, self.fmt)), 'wb') as f:
+                    f.write(encode(frame))
+        self.batch_steps = []
+
+    def write_video(self, frames):
+        """
+        Envía un lote de fotogramas al codificador de vídeo.
+
+        Parameters:
+        - frames (np.ndarray): Lote (n, h, w, 3) de fotogramas.
+        """
+        if self.process is None:
+            h, w = frames.shape[1:3]
+            self.process = subprocess.Popen(['ffmpeg', '-y', '-loglevel', 'error',
+                                             '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', '%dx%d' % (w, h),
+                                             '-r', str(self.fps), '-i', '-',
+                                             '-pix_fmt', 'yuv420p', '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+                                             self.path], stdin=subprocess.PIPE)
+        self.process.stdin.write(np.ascontiguousarray(frames).tobytes())
+
+    def frames(self):
+        """
+        Obtiene los fotogramas guardados en memoria.
+
+        Returns:
+        - np.ndarray: Pila (n, h, w, 3) de fotogramas.
+        """
+        self.flush()
+        if not self.stored:
+            return np.empty((0,) + self.batch.shape[1:], dtype=np.uint8)
+        return np.concatenate(self.stored)
+
+    def close(self):
+        """
+        Escribe los fotogramas pendientes y cierra el codificador de vídeo si está abierto.
+        """
+        self.flush()
+        if self.process is not None:
+            self.process.stdin.close()
+            self.process.wait()
+            self.process = None
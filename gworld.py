@@ -1,25 +1,195 @@
 import numpy as np
 from macros import *
-from visualize import *
-import random
+from agent_store import AgentStore, PositionView, GoalView
+from distance_field import toroidal_distance_field
+from sparse_grid import SparseCells
+from random_stream import RandomStream
+from shapes import CompiledGoal, compile_goal, summed_area_table, rect_sums
+
+#### CONSTANTS ####
+
+DISTANCE_FIELD_TOLERANCE = 0.05    # Cambio relativo de casillas objetivo libres que obliga a recalcular el campo de distancias.
+REJECTION_MIN_FREE = 0.125         # Fracción mínima de casillas libres para sortear casillas por rechazo.
+
+class GoalTiles:
+    def __init__(self, goal):
+        """
+        Bloques cuadrados de la figura objetivo compilada con su ocupación. En cada paso se calcula
+        con NumPy la tabla de sumas acumuladas (imagen integral) de la ocupación dentro del
+        rectángulo envolvente de la figura, de la que salen los agentes de cada bloque y de
+        cualquier rectángulo en O(1). Entre dos refrescos los movimientos se siguen sumando a los
+        contadores de los bloques y a la máscara de ocupación, y la tabla se invalida; la siguiente
+        consulta de un rectángulo la reconstruye a partir de la máscara. Así count, density y los
+        contadores de los bloques reflejan siempre la misma ocupación.
+
+        Parameters:
+        - goal (CompiledGoal): Figura compilada, con el origen relativo a goal_origin del mundo.
+        """
+        self.goal = goal
+        self.sizes = goal.tile_sizes.astype(float)
+        self.counts = np.zeros(len(goal.tiles), dtype=np.int64)
+        self.occupied = None              # Casillas objetivo ocupadas dentro del rectángulo envolvente.
+        self.table = None                 # Tabla de sumas acumuladas de 'occupied', o None si está por recalcular.
+        self.origin = (0, 0)              # Posición en la cuadrícula de la esquina de la máscara.
+        self.shape = (0, 0)               # Dimensiones de la cuadrícula.
+
+    def refresh(self, cells, origin):
+        """
+        Recalcula la tabla de sumas acumuladas y los contadores de los bloques.
+
+        Parameters:
+        - cells: Matriz de ocupación del mundo (densa o SparseCells).
+        - origin (tuple): Origen (y, x) de la figura en la cuadrícula (goal_origin).
+        """
+        h, w = cells.shape
+        oy, ox = (origin[0] + self.goal.origin[0]) % h, (origin[1] + self.goal.origin[1]) % w
+        rows = (oy + np.arange(self.goal.mask.shape[0])) % h
+        cols = (ox + np.arange(self.goal.mask.shape[1])) % w
+        self.occupied = (cells[rows[:, None], cols[None, :]] != UNOCCUPIED) & self.goal.mask
+        self.table = summed_area_table(self.occupied)
+        self.counts = rect_sums(self.table, self.goal.tile_rects)
+        self.origin = (oy, ox)
+        self.shape = (h, w)
+
+    def track(self, pos, delta):
+        """
+        Actualiza la ocupación del bloque que contiene una posición.
+
+        Parameters:
+        - pos (tuple): Tupla (y, x) que entra o sale de ocupación.
+        - delta (int): +1 si un agente ocupa la casilla, -1 si la deja libre.
+        """
+        ry = (pos[0] - self.origin[0]) % self.shape[0]
+        rx = (pos[1] - self.origin[1]) % self.shape[1]
+        if ry < self.goal.mask.shape[0] and rx < self.goal.mask.shape[1]:
+            indx = self.goal.tile_index[ry, rx]
+            if indx >= 0:
+                self.counts[indx] += delta
+                self.occupied[ry, rx] = delta > 0
+                self.table = None
+
+    def count(self, y0, x0, y1, x1):
+        """
+        Cuenta los agentes en casillas objetivo de un rectángulo, en O(1) mientras nadie se mueva
+        (tras un movimiento la tabla se reconstruye una vez).
+
+        Parameters:
+        - y0, x0 (int): Esquina superior izquierda, relativa a la máscara de la figura.
+        - y1, x1 (int): Esquina inferior derecha, excluida.
+
+        Returns:
+        - int: Número de agentes.
+        """
+        if self.table is None:
+            self.table = summed_area_table(self.occupied)
+        return int(rect_sums(self.table, (y0, x0, y1, x1)))
+
+    def density(self, y0, x0, y1, x1):
+        """
+        Calcula la densidad de agentes en las casillas objetivo de un rectángulo, en O(1).
+
+        Parameters:
+        - y0, x0 (int): Esquina superior izquierda, relativa a la máscara de la figura.
+        - y1, x1 (int): Esquina inferior derecha, excluida.
+
+        Returns:
+        - float: Agentes por casilla objetivo (0 si el rectángulo no tiene casillas objetivo).
+        """
+        size = int(rect_sums(self.goal.mask_table, (y0, x0, y1, x1)))
+        return self.count(y0, x0, y1, x1) / size if size else 0.0
+
+    def densities(self):
+        """
+        Calcula la densidad de agentes de cada bloque.
+
+        Returns:
+        - np.ndarray: Densidad de cada bloque.
+        """
+        return self.counts / self.sizes
+
+    def least_dense(self):
+        """
+        Obtiene el bloque con menor densidad de agentes.
+
+        Returns:
+        - int: Índice del bloque menos denso.
+        """
+        return int(np.argmin(self.counts / self.sizes))
+
+    def random_cell(self, indx, stream):
+        """
+        Elige una casilla objetivo aleatoria de un bloque.
+
+        Parameters:
+        - indx (int): Índice del bloque.
+        - stream: Fuente de números aleatorios con choice (RandomStream o random.Random).
+
+        Returns:
+        - tuple: Tupla (y, x) de la casilla en la cuadrícula.
+        """
+        ry, rx = stream.choice(self.goal.tiles[indx])
+        return ((ry + self.origin[0]) % self.shape[0], (rx + self.origin[1]) % self.shape[1])
+
+    @property
+    def subregions(self):
+        """
+        Casillas (y, x) de cada bloque en la cuadrícula.
+        """
+        oy, ox = self.origin
+        h, w = self.shape
+        return [[((oy + ry) % h, (ox + rx) % w) for (ry, rx) in tile] for tile in self.goal.tiles]
 
 class GridWorld:
-    def __init__(self, h, w):
+    def __init__(self, h, w, sparse=False, seed=None):
         """
         Inicializa un mundo de cuadrícula con dimensiones h x w.
 
         Parameters:
         - h (int): Altura de la cuadrícula.
         - w (int): Ancho de la cuadrícula.
+        - sparse (bool): Si es True las celdas y la máscara objetivo se guardan en cuadrículas
+          dispersas por bloques (ver SparseCells), para mundos muy grandes y poco poblados. En ese
+          caso no está disponible el campo de distancias.
+        - seed (int): Semilla de los generadores aleatorios del mundo. Con la misma semilla la
+          colocación de los agentes y la simulación se repiten exactamente. Si es None se usa una
+          semilla aleatoria.
         """
         self.h = h
         self.w = w
-        self.cells = np.zeros((h, w), dtype=int)
+        self.dense = not sparse
+        if sparse:
+            self.cells = SparseCells(h, w, np.uint8)
+            self.goal_mask = SparseCells(h, w, bool)
+        else:
+            self.cells = np.zeros((h, w), dtype=np.uint8)  # El tipo crece con el número de agentes (ver fit_cells_dtype).
+            self.goal_mask = np.zeros((h, w), dtype=bool)  # Máscara booleana de las casillas objetivo.
         self.visualize = None
-        self.aindx_cpos = dict()          # Diccionario que mapea índices de agentes a sus posiciones (y, x).
-        self.aindx_goalreached = dict()   # Diccionario que indica si cada agente ha alcanzado su objetivo.
-        self.goal_pos = []                # Lista de posiciones objetivo en la cuadrícula.
+        self.agents = AgentStore()        # Posiciones y estado objetivo de los agentes en arreglos.
+        self.aindx_cpos = PositionView(self.agents, self)        # Vista que mapea índices de agentes a sus posiciones (y, x).
+        self.aindx_goalreached = GoalView(self.agents, self)     # Vista que indica si cada agente ha alcanzado su objetivo.
+        self.goal_list = []               # Lista de posiciones objetivo (ver la propiedad goal_pos).
+        self.goal_list_stale = False      # True si goal_list debe reconstruirse tras una traslación.
+        self.goal_shape = []              # Posiciones de la figura relativas a goal_origin, en el orden de goal_pos.
+        self.goal_shape_set = set()
+        self.goal_shape_array = np.empty((0, 2), dtype=np.intp)   # goal_shape como arreglo (n, 2).
+        self.goal_compiled = None         # Figura compilada con el origen relativo a goal_origin (ver set_goal_shape).
+        self.goal_origin = (0, 0)         # Desplazamiento (y, x) de la figura en la cuadrícula.
+        self.goal_extent = (0, 0)         # Mayor fila y columna relativas de la figura.
+        self.goal_edges = dict()          # Bordes de entrada y salida de la figura por desplazamiento (dy, dx).
         self.goal_blocked = []            # Lista de posiciones objetivo bloqueadas por agentes.
+        self.goal_set = set()             # Conjunto de posiciones objetivo para consultas O(1).
+        self.goal_version = 0             # Se incrementa cada vez que cambia la figura objetivo.
+        self.goal_tiles = None            # Bloques de la figura con su ocupación (ver get_goal_tiles).
+        self.goal_tiles_version = None
+        self.dirty_agents = set()         # Agentes cuya casilla o estado objetivo cambió desde el último dibujado.
+        self.dirty_goal_cells = set()     # Casillas que entraron o salieron de la figura desde el último dibujado.
+        self.distance_field = None        # Distancia a las casillas objetivo libres cacheada (ver get_distance_field).
+        self.distance_field_version = None
+        self.distance_field_shift = (0, 0)   # Traslación de la figura desde que se calculó el campo.
+        self.distance_field_free = 0      # Casillas objetivo libres cuando se calculó el campo.
+        self.agents_inside = 0            # Agentes en casillas objetivo, mantenido en cada cambio de posición o de figura.
+        self.rng = np.random.default_rng(seed)             # Generador para las operaciones vectorizadas.
+        self.stream = RandomStream(self.rng)                # Números aleatorios por bloques para los bucles secuenciales.
 
     def get_size(self):
         """
@@ -35,35 +205,412 @@ class GridWorld:
         Obtiene los índices de los agentes en la cuadrícula.
 
         Returns:
-        - dict_keys: Claves del diccionario que representan los índices de los agentes.
+        - list: Lista de índices de los agentes.
+        """
+        return self.agents.ids().tolist()
+
+    @property
+    def agents_outside(self):
+        """
+        Número de agentes fuera de la figura objetivo.
+        """
+        return len(self.agents) - self.agents_inside
+
+    @property
+    def free_goal_cells(self):
         """
-        return self.aindx_cpos.keys()
+        Número de casillas objetivo sin agente.
+        """
+        return len(self.goal_set) - self.agents_inside
+
+    def recount_agents_inside(self):
+        """
+        Recalcula agents_inside a partir del almacén de agentes. Solo es necesario cuando los
+        arreglos del almacén se escriben directamente (motores vectorizados o restauraciones).
+        """
+        size = self.agents.next_id
+        self.agents_inside = int(np.count_nonzero(self.agents.goal[:size] & self.agents.alive[:size]))
+
+    def fit_cells_dtype(self, max_agent):
+        """
+        Amplía el tipo de la matriz de celdas si no cabe el índice de agente indicado.
+        Se usa el tipo entero sin signo más pequeño posible.
+
+        Parameters:
+        - max_agent (int): Mayor índice de agente que debe poder guardarse.
+        """
+        if max_agent > np.iinfo(self.cells.dtype).max:
+            self.cells = self.cells.astype(np.min_scalar_type(max_agent))
+
+    @property
+    def goal_pos(self):
+        """
+        Lista de posiciones objetivo en la cuadrícula.
+        Tras una traslación se reconstruye solo cuando se consulta.
+        """
+        if self.goal_list_stale:
+            oy, ox = self.goal_origin
+            self.goal_list = [((oy + ry) % self.h, (ox + rx) % self.w) for (ry, rx) in self.goal_shape]
+            self.goal_list_stale = False
+        return self.goal_list
+
+    def goal_cells(self):
+        """
+        Obtiene las posiciones objetivo como arreglo, en el orden de goal_pos. Se calcula con NumPy a
+        partir de la forma y el origen, sin reconstruir goal_pos tras una traslación.
+
+        Returns:
+        - np.ndarray: Arreglo (n, 2) de posiciones (y, x).
+        """
+        oy, ox = self.goal_origin
+        return np.stack([(self.goal_shape_array[:, 0] + oy) % self.h,
+                         (self.goal_shape_array[:, 1] + ox) % self.w], axis=1)
+
+    def goal_cell(self, index):
+        """
+        Obtiene la posición objetivo número 'index' en el orden de goal_pos, sin reconstruir la lista.
+
+        Parameters:
+        - index (int): Índice de la posición.
+
+        Returns:
+        - tuple: Tupla (y, x) de la posición.
+        """
+        ry, rx = self.goal_shape[index]
+        return ((self.goal_origin[0] + ry) % self.h, (self.goal_origin[1] + rx) % self.w)
 
     def add_goal_pos(self, goal_pos):
         """
         Añade posiciones objetivo a la cuadrícula.
 
         Parameters:
-        - goal_pos (list): Lista de tuplas (gy, gx) que representan las posiciones objetivo.
+        - goal_pos: Lista de tuplas (gy, gx) que representan las posiciones objetivo, o figura
+          compilada (ver shapes.CompiledGoal).
         """
-        if goal_pos:
+        if isinstance(goal_pos, CompiledGoal):
+            self.add_compiled_goal(goal_pos)
+        elif goal_pos:
             print('Goal pos: ', goal_pos)
             for (gy, gx) in goal_pos:
                 self.goal_pos.append((gy, gx))
+                self.goal_set.add((gy, gx))
+                self.goal_mask[gy, gx] = True
+                self.set_goal_flag((gy, gx), True)
+            self.dirty_goal_cells.update(goal_pos)
+            self.set_goal_shape()
+            self.goal_version += 1
+
+    def add_compiled_goal(self, goal):
+        """
+        Añade una figura compilada. Las casillas se marcan de forma vectorizada y, si la figura
+        estaba vacía, se reutiliza la figura compilada en lugar de compilarla de nuevo.
+
+        Parameters:
+        - goal (CompiledGoal): Figura compilada y colocada.
+        """
+        print('Goal pos: ', goal)
+        ys, xs = goal.positions(self.h, self.w)
+        positions = list(zip(ys.tolist(), xs.tolist()))
+        keep = not self.goal_list and not self.goal_list_stale
+        self.goal_pos.extend(positions)
+        self.goal_set.update(positions)
+        self.dirty_goal_cells.update(positions)
+        if self.dense:
+            self.goal_mask[ys, xs] = True
+            occupied = np.flatnonzero(self.cells[ys, xs] != UNOCCUPIED)
+        else:
+            for (gy, gx) in positions:
+                self.goal_mask[gy, gx] = True
+            occupied = np.flatnonzero(self.cells.take(ys, xs) != UNOCCUPIED)
+        # Solo las casillas ocupadas pueden cambiar el estado objetivo de un agente
+        for indx in occupied.tolist():
+            self.set_goal_flag(positions[indx], True)
+
+        if keep:
+            self.set_goal_shape((goal.origin[0] % self.h, goal.origin[1] % self.w), goal.placed((0, 0)))
+        else:
+            self.set_goal_shape()
+        self.goal_version += 1
 
-    def update_goal_pos(self, new_goal_pos):
+    def update_goal_pos(self, new_goal_pos, origin=None):
         """
         Actualiza las posiciones objetivo en la cuadrícula.
 
         Parameters:
         - new_goal_pos (list): Lista de tuplas (gy, gx) que representan las nuevas posiciones objetivo.
+        - origin (tuple): Origen (y, x) de la figura, ver set_goal_shape. Si es None se usa la
+          esquina del rectángulo envolvente.
         """
-        self.goal_pos = []  # Limpiar las posiciones objetivo actuales
+        old_goal_set = self.goal_set
+        self.goal_list = []  # Limpiar las posiciones objetivo actuales
+        self.goal_list_stale = False
+        self.goal_set = set()
+        self.goal_mask.fill(False)
 
         if new_goal_pos:
             # print('New Goal pos: ', new_goal_pos)
             for (gy, gx) in new_goal_pos:
-                self.goal_pos.append((gy, gx))
+                self.goal_list.append((gy, gx))
+                self.goal_set.add((gy, gx))
+                self.goal_mask[gy, gx] = True
+        self.set_goal_shape(origin)
+        self.goal_version += 1
+
+        # Los agentes en casillas que entran o salen de la figura cambian de estado objetivo
+        changed = old_goal_set ^ self.goal_set
+        for pos in changed:
+            self.set_goal_flag(pos, pos in self.goal_set)
+        self.dirty_goal_cells.update(changed)
+
+    def set_goal_shape(self, origin=None, compiled=None):
+        """
+        Calcula la figura objetivo como una forma fija relativa a su origen (la esquina superior
+        izquierda de su rectángulo envolvente), que es lo que desplaza translate_goal, y la compila
+        (ver shapes.CompiledGoal) para obtener su borde y sus bloques.
+
+        Parameters:
+        - origin (tuple): Origen (y, x) a usar en lugar de la esquina del rectángulo envolvente, por
+          ejemplo al restaurar una figura que se envolvió en la cuadrícula.
+        - compiled (CompiledGoal): Figura ya compilada para goal_shape, con el origen relativo a
+          'origin'. Si es None se compila.
+        """
+        if origin is not None:
+            oy, ox = origin
+        elif self.goal_list:
+            oy = min(gy for (gy, gx) in self.goal_list)
+            ox = min(gx for (gy, gx) in self.goal_list)
+        else:
+            oy, ox = 0, 0
+        self.goal_origin = (oy, ox)
+        self.goal_shape = [((gy - oy) % self.h, (gx - ox) % self.w) for (gy, gx) in self.goal_list]
+        self.goal_shape_set = set(self.goal_shape)
+        self.goal_shape_array = np.array(self.goal_shape, dtype=np.intp).reshape(-1, 2)
+        self.goal_extent = (max((ry for (ry, rx) in self.goal_shape), default=0),
+                            max((rx for (ry, rx) in self.goal_shape), default=0))
+        self.goal_edges = dict()
+        if compiled is None and self.goal_shape:
+            compiled = compile_goal(self.goal_shape)
+        self.goal_compiled = compiled
+
+    def set_goal_flag(self, pos, in_goal):
+        """
+        Actualiza el estado objetivo del agente que ocupa una casilla, si lo hay.
+
+        Parameters:
+        - pos (tuple): Tupla (y, x) de la casilla.
+        - in_goal (bool): True si la casilla pertenece ahora a la figura objetivo.
+        """
+        agent = self.cells[pos[0], pos[1]]
+        if agent != UNOCCUPIED and self.agents.goal[agent] != in_goal:
+            self.agents.goal[agent] = in_goal
+            self.agents_inside += 1 if in_goal else -1
+            self.dirty_agents.add(agent)
+
+    def translate_goal(self, dy, dx):
+        """
+        Desplaza la figura objetivo (dy, dx) casillas con envolvimiento.
+        Solo se actualizan las casillas de los bordes de entrada y salida de la figura y el estado
+        objetivo de los agentes que las ocupan, por lo que el coste es proporcional al perímetro.
+        El campo de distancias no se copia: se acumula el desplazamiento en distance_field_shift y
+        se aplica al leerlo (ver get_shifted_distance_field). goal_pos se reconstruye solo si alguien
+        la consulta; goal_cells y goal_cell no la necesitan.
+
+        Parameters:
+        - dy (int): Desplazamiento vertical.
+        - dx (int): Desplazamiento horizontal.
+        """
+        # Desplazamiento equivalente más corto en el toro
+        dy = (dy + self.h // 2) % self.h - self.h // 2
+        dx = (dx + self.w // 2) % self.w - self.w // 2
+        if not self.goal_shape or (dy, dx) == (0, 0):
+            return
+        if (dy, dx) not in self.goal_edges:
+            shape = self.goal_shape_set
+            # En pasos de una casilla solo el borde de la figura puede entrar o salir
+            cells = shape
+            if max(abs(dy), abs(dx)) == 1:
+                cy, cx = self.goal_compiled.origin
+                cells = [(ry + cy, rx + cx) for (ry, rx) in self.goal_compiled.boundary]
+            entering = [(ry + dy, rx + dx) for (ry, rx) in cells if (ry + dy, rx + dx) not in shape]
+            leaving = [(ry, rx) for (ry, rx) in cells if (ry - dy, rx - dx) not in shape]
+            self.goal_edges[(dy, dx)] = (entering, leaving)
+        entering, leaving = self.goal_edges[(dy, dx)]
+
+        oy, ox = self.goal_origin
+        for (ry, rx) in leaving:
+            pos = ((oy + ry) % self.h, (ox + rx) % self.w)
+            self.goal_set.discard(pos)
+            self.goal_mask[pos[0], pos[1]] = False
+            self.set_goal_flag(pos, False)
+            self.dirty_goal_cells.add(pos)
+        for (ry, rx) in entering:
+            pos = ((oy + ry) % self.h, (ox + rx) % self.w)
+            self.goal_set.add(pos)
+            self.goal_mask[pos[0], pos[1]] = True
+            self.set_goal_flag(pos, True)
+            self.dirty_goal_cells.add(pos)
+        self.goal_origin = ((oy + dy) % self.h, (ox + dx) % self.w)
+        self.goal_list_stale = True
+
+        # El campo de distancias se desplaza con la figura en lugar de recalcularse
+        if self.distance_field_version == self.goal_version:
+            sy, sx = self.distance_field_shift
+            self.distance_field_shift = ((sy + dy) % self.h, (sx + dx) % self.w)
+            self.distance_field_version = self.goal_version + 1
+        self.goal_version += 1
+
+    def goal_touches_border(self):
+        """
+        Verifica si alguna casilla de la figura objetivo está en el borde de la cuadrícula.
+
+        Returns:
+        - bool: True si la figura toca el borde, False si no.
+        """
+        oy, ox = self.goal_origin
+        return (oy <= 0 or ox <= 0 or oy + self.goal_extent[0] >= self.h - 1 or
+                ox + self.goal_extent[1] >= self.w - 1)
+
+    def is_goal(self, pos):
+        """
+        Verifica si una posición pertenece a la figura objetivo. Es el único punto por el que pasan
+        las consultas de casillas sueltas (también las de set_agent_pos, add_agents y
+        track_occupancy), así que la instrumentación puede contarlas aquí.
+
+        Parameters:
+        - pos (tuple): Tupla (y, x) que representa la posición.
+
+        Returns:
+        - bool: True si la posición es una casilla objetivo, False si no.
+        """
+        return pos in self.goal_set
+
+    def refresh_goal_tiles(self):
+        """
+        Recalcula con NumPy la tabla de sumas acumuladas de la ocupación de la figura y la ocupación
+        de sus bloques. Se llama una vez por paso de la simulación y tras escribir directamente en
+        la matriz de celdas.
+        """
+        if self.goal_compiled is None:
+            self.goal_tiles = None
+            return
+        if self.goal_tiles is None or self.goal_tiles.goal is not self.goal_compiled:
+            self.goal_tiles = GoalTiles(self.goal_compiled)
+        self.goal_tiles.refresh(self.cells, self.goal_origin)
+        self.goal_tiles_version = self.goal_version
+
+    def get_goal_tiles(self):
+        """
+        Obtiene los bloques de la figura objetivo con su ocupación, refrescándolos si la figura
+        cambió o se movió desde el último refresco.
+
+        Returns:
+        - GoalTiles: Bloques de la figura objetivo, o None si no hay figura.
+        """
+        if (self.goal_tiles is None or self.goal_tiles_version != self.goal_version or
+                self.goal_tiles.goal is not self.goal_compiled):
+            self.refresh_goal_tiles()
+        return self.goal_tiles
+
+    def get_distance_field(self):
+        """
+        Obtiene la distancia de cada casilla a las casillas objetivo libres con envolvimiento.
+        Si la figura se trasladó desde que se calculó el campo, el desplazamiento pendiente se aplica
+        aquí copiando el campo una vez; los solvers usan get_shifted_distance_field para evitarlo.
+
+        Returns:
+        - np.ndarray: Matriz (h, w) de distancias en pasos a la casilla objetivo libre más cercana.
+        """
+        field, shift = self.get_shifted_distance_field()
+        if shift != (0, 0):
+            self.distance_field = np.roll(field, shift, axis=(0, 1))
+            self.distance_field_shift = (0, 0)
+        return self.distance_field
+
+    def get_shifted_distance_field(self):
+        """
+        Obtiene el campo de distancias tal como se calculó y el desplazamiento (sy, sx) de la figura
+        desde entonces: la distancia de la casilla (y, x) es field[(y - sy) % h, (x - sx) % w].
+        Se calcula de nuevo solo cuando cambia la figura o cuando refresh_distance_field detecta
+        que la ocupación de la figura ha cambiado lo suficiente. Solo está disponible en mundos densos.
+
+        Returns:
+        - tuple: (matriz (h, w) de distancias, desplazamiento (sy, sx)).
+        """
+        if not self.dense:
+            raise ValueError('The distance field requires a dense grid')
+        if self.distance_field_version != self.goal_version:
+            free_goal = self.goal_mask & (self.cells == UNOCCUPIED)
+            self.distance_field_free = np.count_nonzero(free_goal)
+            # Si la figura está llena se usa la figura completa como destino
+            self.distance_field = toroidal_distance_field(free_goal if self.distance_field_free else self.goal_mask)
+            self.distance_field_shift = (0, 0)
+            self.distance_field_version = self.goal_version
+        return self.distance_field, self.distance_field_shift
+
+    def refresh_distance_field(self, tolerance=DISTANCE_FIELD_TOLERANCE):
+        """
+        Invalida el campo de distancias si el número de casillas objetivo libres ha cambiado más de
+        una fracción 'tolerance' desde que se calculó. Se llama una vez por paso de la simulación.
+
+        Parameters:
+        - tolerance (float): Fracción de cambio de casillas libres que se tolera sin recalcular.
+        """
+        if not self.dense or self.distance_field is None or self.distance_field_version != self.goal_version:
+            return
+        free = np.count_nonzero(self.cells[self.goal_mask] == UNOCCUPIED)
+        if abs(free - self.distance_field_free) > tolerance * max(self.distance_field_free, 1):
+            self.distance_field_version = None
+
+    def track_occupancy(self, pos, delta):
+        """
+        Propaga un cambio de ocupación a los contadores de los bloques de la figura.
+
+        Parameters:
+        - pos (tuple): Tupla (y, x) que entra o sale de ocupación.
+        - delta (int): +1 si un agente ocupa la casilla, -1 si la deja libre.
+        """
+        if self.goal_tiles_version == self.goal_version and self.is_goal(pos):
+            self.goal_tiles.track(pos, delta)
+
+    def set_agent_pos(self, agent, new_pos):
+        """
+        Mueve un agente a una nueva posición y actualiza la ocupación y su estado objetivo.
+
+        Parameters:
+        - agent: Índice del agente a mover.
+        - new_pos (tuple): Tupla (y, x) que representa la nueva posición.
+        """
+        current_pos = self.aindx_cpos[agent]
+        self.cells[current_pos[0], current_pos[1]] = UNOCCUPIED
+        self.track_occupancy(current_pos, -1)
+        self.cells[new_pos[0], new_pos[1]] = agent
+        self.track_occupancy(new_pos, 1)
+        in_goal = self.is_goal(new_pos)
+        self.agents_inside += in_goal - bool(self.agents.goal[agent])
+        self.agents.move(agent, new_pos, in_goal)
+        self.dirty_agents.add(agent)
+
+    def pop_dirty_agents(self):
+        """
+        Obtiene y vacía el conjunto de agentes que deben volver a dibujarse.
+
+        Returns:
+        - set: Índices de agentes cuya casilla o estado objetivo cambió.
+        """
+        dirty_agents = self.dirty_agents
+        self.dirty_agents = set()
+        return dirty_agents
+
+    def pop_dirty_goal_cells(self):
+        """
+        Obtiene y vacía el conjunto de casillas que entraron o salieron de la figura objetivo.
+
+        Returns:
+        - set: Posiciones (y, x) cuyo estado objetivo cambió.
+        """
+        dirty_goal_cells = self.dirty_goal_cells
+        self.dirty_goal_cells = set()
+        return dirty_goal_cells
 
     def add_agents(self, agents_spos):
         """
@@ -78,15 +625,17 @@ class GridWorld:
         if agents_spos:
             print('Start pos: ', agents_spos)
             for (sy, sx) in agents_spos:
-                nagents = len(self.aindx_cpos.keys())
-                if self.cells[sy][sx] == UNOCCUPIED:
-                    self.aindx_cpos[nagents + 1] = (sy, sx)
-                    self.cells[sy][sx] = nagents + 1
-                    if (sy, sx) in self.goal_pos:
-                        self.aindx_goalreached[nagents + 1] = True
+                if self.cells[sy, sx] == UNOCCUPIED:
+                    in_goal = self.is_goal((sy, sx))
+                    # El índice se toma de la lista libre del almacén, nunca coincide con un agente vivo
+                    agent = self.agents.add((sy, sx), in_goal)
+                    self.fit_cells_dtype(agent)
+                    self.cells[sy, sx] = agent
+                    self.track_occupancy((sy, sx), 1)
+                    self.dirty_agents.add(agent)
+                    if in_goal:
+                        self.agents_inside += 1
                         self.goal_blocked.append((sy, sx))
-                    else:
-                        self.aindx_goalreached[nagents + 1] = False
                 else:
                     raise Exception('Cell has already been occupied!')
             return True
@@ -94,20 +643,98 @@ class GridWorld:
 
     def add_agents_rand(self, nagents=0):
         """
-        Añade agentes aleatorios a la cuadrícula.
+        Añade agentes en casillas libres aleatorias distintas.
+        En mundos densos se eligen las casillas sin reemplazo entre los índices de las casillas
+        libres con una sola llamada al generador; en mundos dispersos se sortean casillas por lotes
+        descartando las ocupadas, porque enumerar las libres costaría tanto como el área.
 
         Parameters:
         - nagents (int): Número de agentes a agregar de manera aleatoria.
         """
         if nagents:
-            maxy, maxx = self.h - 1, self.w - 1
-            agent_pos = set()
-            while len(agent_pos) < nagents:
-                y = random.randint(0, maxy)
-                x = random.randint(0, maxx)
-                if self.passable((y, x)):
-                    agent_pos.add((y, x))
-            self.add_agents(agent_pos)
+            if nagents > self.h * self.w - len(self.agents):
+                raise ValueError('Not enough free cells for %d agents' % nagents)
+            if self.dense:
+                flat = self.rng.choice(self.free_cells(), size=nagents, replace=False)
+            else:
+                flat = self.sample_free_cells(nagents)
+            print('Start pos: ', nagents, 'agentes en casillas aleatorias')
+            self.place_agents(flat // self.w, flat % self.w)
+
+    def sample_free_cells(self, n):
+        """
+        Sortea casillas libres distintas por lotes, descartando las ocupadas y las repetidas.
+        Pensado para mundos poco poblados, donde casi todos los sorteos aciertan. Si quedan pocas
+        casillas libres, o se piden más de la mitad de ellas, se eligen entre las casillas libres
+        enumeradas para que el sorteo termine siempre.
+
+        Parameters:
+        - n (int): Número de casillas.
+
+        Returns:
+        - np.ndarray: Índices planos (y * w + x) de las casillas.
+        """
+        free = self.h * self.w - len(self.agents)
+        if n > free:
+            raise ValueError('Not enough free cells for %d agents' % n)
+        if free < REJECTION_MIN_FREE * self.h * self.w or 2 * n > free:
+            return self.rng.choice(self.free_cells(), size=n, replace=False)
+        chosen = np.empty(0, dtype=np.int64)
+        while len(chosen) < n:
+            missing = n - len(chosen)
+            candidates = self.rng.integers(self.h * self.w, size=missing + missing // 8 + 16)
+            candidates = candidates[self.cells[candidates // self.w, candidates % self.w] == UNOCCUPIED]
+            chosen = np.concatenate([chosen, candidates])
+            # Se conservan las primeras apariciones en el orden del sorteo
+            _, first = np.unique(chosen, return_index=True)
+            chosen = chosen[np.sort(first)]
+        return chosen[:n]
+
+    def free_cells(self):
+        """
+        Enumera las casillas libres. En mundos dispersos se obtienen a partir de las posiciones de
+        los agentes, así que el coste es proporcional al área: solo se usa cuando el mundo está casi
+        lleno, y entonces el número de agentes ya es comparable al área.
+
+        Returns:
+        - np.ndarray: Índices planos (y * w + x) de las casillas libres, en orden ascendente.
+        """
+        if self.dense:
+            return np.flatnonzero(self.cells.ravel() == UNOCCUPIED)
+        ids = self.agents.ids()
+        occupied = self.agents.pos_y[ids].astype(np.int64) * self.w + self.agents.pos_x[ids]
+        return np.setdiff1d(np.arange(self.h * self.w, dtype=np.int64), occupied, assume_unique=True)
+
+    def place_agents(self, pos_y, pos_x):
+        """
+        Añade de una vez agentes en casillas libres distintas, sin comprobarlas.
+
+        Parameters:
+        - pos_y (np.ndarray): Filas de los agentes.
+        - pos_x (np.ndarray): Columnas de los agentes.
+
+        Returns:
+        - np.ndarray: Índices de los nuevos agentes.
+        """
+        in_goal = np.asarray(self.goal_mask[pos_y, pos_x], dtype=bool)
+        agents = self.agents.add_many(pos_y, pos_x, in_goal)
+        if not len(agents):
+            return agents
+        self.fit_cells_dtype(int(agents.max()))
+        if self.dense:
+            self.cells[pos_y, pos_x] = agents
+        else:
+            for y, x, agent in zip(pos_y.tolist(), pos_x.tolist(), agents.tolist()):
+                self.cells[y, x] = agent
+        # Solo los agentes que caen en la figura afectan a los contadores
+        blocked = list(zip(pos_y[in_goal].tolist(), pos_x[in_goal].tolist()))
+        if self.goal_tiles_version == self.goal_version:
+            for pos in blocked:
+                self.track_occupancy(pos, 1)
+        self.goal_blocked.extend(blocked)
+        self.agents_inside += int(np.count_nonzero(in_goal))
+        self.dirty_agents.update(agents.tolist())
+        return agents
 
     def passable(self, cell):
         """
@@ -120,7 +747,7 @@ class GridWorld:
         - bool: True si la celda es transitable, False si está ocupada.
         """
         y, x = cell[0], cell[1]
-        if self.cells[y][x] != UNOCCUPIED:
+        if self.cells[y, x] != UNOCCUPIED:
             return False
         else:
             return True
@@ -136,7 +763,7 @@ class GridWorld:
         - int: Índice del agente en la cuadrícula.
         """
         y, x = pos[0], pos[1]
-        return self.cells[y][x]
+        return self.cells[y, x]
     
     def get_valid_moves(self, current_pos):
         """
@@ -170,26 +797,34 @@ class GridWorld:
             Returns:
             - list: Lista de índices de agentes dentro de la figura objetivo.
             """
-            agents_in_goal = [agent for agent, pos in self.aindx_cpos.items() if pos in self.goal_pos]
+            ids = self.agents.ids()
+            agents_in_goal = ids[self.goal_mask[self.agents.pos_y[ids], self.agents.pos_x[ids]]].tolist()
             return agents_in_goal
 
     def move_agent_randomly(self, agent):
         """
-        Desplaza aleatoriamente un agente a una posición aleatoria en el mundo.
+        Desplaza aleatoriamente un agente a una posición libre aleatoria en el mundo.
+        Si no queda ninguna casilla libre el agente no se mueve.
 
         Parameters:
         - agent: Índice del agente a desplazar.
         """
         if agent in self.aindx_cpos:
-            current_pos = self.aindx_cpos[agent]
-
-            # Obtiene una posición aleatoria en el mundo
-            new_pos = (random.randint(0, self.h - 1), random.randint(0, self.w - 1))
-
-            # Actualiza la posición del agente
-            self.cells[current_pos[0]][current_pos[1]] = UNOCCUPIED
-            self.cells[new_pos[0]][new_pos[1]] = agent
-            self.aindx_cpos[agent] = new_pos
+            free = self.h * self.w - len(self.agents)
+            if free <= 0:
+                return
+            if free < REJECTION_MIN_FREE * self.h * self.w:
+                # Casi lleno: el sorteo por rechazo fallaría casi siempre
+                flat = int(self.free_cells()[self.stream.randrange(free)])
+                new_pos = (flat // self.w, flat % self.w)
+            else:
+                # Obtiene una posición libre aleatoria en el mundo
+                new_pos = (self.stream.randrange(self.h), self.stream.randrange(self.w))
+                while not self.passable(new_pos):
+                    new_pos = (self.stream.randrange(self.h), self.stream.randrange(self.w))
+
+            # Actualiza la posición del agente, su estado objetivo y los contadores
+            self.set_agent_pos(agent, new_pos)
 
     def remove_agent(self, agent):
         """
@@ -200,7 +835,10 @@ class GridWorld:
         """
         if agent in self.aindx_cpos:
             current_pos = self.aindx_cpos[agent]
-            self.cells[current_pos[0]][current_pos[1]] = UNOCCUPIED
-            del self.aindx_cpos[agent]
-            del self.aindx_goalreached[agent]
+            self.cells[current_pos[0], current_pos[1]] = UNOCCUPIED
+            self.track_occupancy(current_pos, -1)
+            if self.agents.goal[agent]:
+                self.agents_inside -= 1
+            self.agents.remove(agent)
+            self.dirty_agents.add(agent)
 
@@ -0,0 +1,186 @@
+import argparse
+from multiprocessing import shared_memory, resource_tracker
+import numpy as np
+from raster import render_frame, scale_frame, encode_ppm
+
+#### CONSTANTS ####
+
+HEADER_FIELDS = ['seq', 'step', 'h', 'w', 'capacity']
+HEADER_BYTES = 64
+SEQ, STEP, H, W, CAPACITY = range(len(HEADER_FIELDS))
+FPS = 30
+FRAME_SIZE = 600
+
+def segment_layout(h, w, capacity):
+    """
+    Calcula las vistas del segmento compartido: cabecera, celdas, máscara objetivo y estado
+    objetivo de cada agente.
+
+    Parameters:
+    - h (int): Altura de la cuadrícula.
+    - w (int): Ancho de la cuadrícula.
+    - capacity (int): Número de índices de agente publicados.
+
+    Returns:
+    - list: Tuplas (nombre, desplazamiento, forma, dtype).
+    """
+    cells_bytes = h * w * 4
+    return [
+        ('header', 0, (len(HEADER_FIELDS),), np.int64),
+        ('cells', HEADER_BYTES, (h, w), np.uint32),
+        ('goal_mask', HEADER_BYTES + cells_bytes, (h, w), bool),
+        ('in_goal', HEADER_BYTES + cells_bytes + h * w, (capacity,), bool),
+    ]
+
+def map_segment(block, h, w, capacity):
+    return {name: np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)
+            for name, offset, shape, dtype in segment_layout(h, w, capacity)}
+
+class WorldPublisher:
+    def __init__(self, world, name=None, capacity=None):
+        """
+        Publica el estado del mundo en un segmento de memoria compartida para que otro proceso lo
+        dibuje (ver LiveViewer). Cada publicación copia las celdas, la máscara objetivo y el estado
+        objetivo de los agentes bajo un seqlock: el contador 'seq' es impar mientras se escribe,
+        así que el lector descarta las copias a medias sin que el simulador tenga que esperarle.
+
+        Parameters:
+        - world: Objeto GridWorld denso a publicar.
+        - name (str): Nombre del segmento. Si es None se genera uno.
+        - capacity (int): Índices de agente cuyo estado se publica. Por defecto, los asignados al
+          crear el publicador con margen para el doble.
+        """
+        if not world.dense:
+            raise ValueError('WorldPublisher requires a dense grid')
+        self.world = world
+        self.capacity = capacity or 2 * len(world.agents.alive)
+        size = segment_layout(world.h, world.w, self.capacity)[-1][1] + self.capacity
+        self.block = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = self.block.name
+        self.views = map_segment(self.block, world.h, world.w, self.capacity)
+        self.header = self.views['header']
+        self.header[:] = 0
+        self.header[H], self.header[W], self.header[CAPACITY] = world.h, world.w, self.capacity
+        self.steps = 0
+
+    def publish(self, step=None):
+        """
+        Copia el estado actual del mundo al segmento compartido.
+
+        Parameters:
+        - step (int): Paso de la simulación. Si es None se usa un contador interno.
+        """
+        if step is None:
+            step = self.steps
+        self.steps = step + 1
+        store = self.world.agents
+        size = min(len(store.goal), self.capacity)
+
+        self.header[SEQ] += 1             # Impar: escritura en curso
+        np.copyto(self.views['cells'], self.world.cells, casting='unsafe')
+        np.copyto(self.views['goal_mask'], self.world.goal_mask)
+        np.logical_and(store.goal[:size], store.alive[:size], out=self.views['in_goal'][:size])
+        self.header[STEP] = step
+        self.header[SEQ] += 1             # Par: copia completa
+
+    def close(self):
+        """
+        Libera el segmento. Los visores conectados conservan el último estado publicado.
+        """
+        self.views = None
+        self.header = None
+        self.block.close()
+        self.block.unlink()
+
+class SegmentReader:
+    def __init__(self, name):
+        """
+        Lee de forma consistente un segmento publicado por WorldPublisher.
+
+        Parameters:
+        - name (str): Nombre del segmento.
+        """
+        self.block = shared_memory.SharedMemory(name=name)
+        # El segmento pertenece al simulador: sin esto el proceso lector lo destruiría al salir
+        resource_tracker.unregister(self.block._name, 'shared_memory')
+        header = np.ndarray((len(HEADER_FIELDS),), dtype=np.int64, buffer=self.block.buf)
+        self.h, self.w, self.capacity = int(header[H]), int(header[W]), int(header[CAPACITY])
+        self.views = map_segment(self.block, self.h, self.w, self.capacity)
+        self.cells = np.empty((self.h, self.w), dtype=np.uint32)
+        self.goal_mask = np.empty((self.h, self.w), dtype=bool)
+        self.in_goal = np.empty(self.capacity, dtype=bool)
+        self.step = None
+
+    def read(self):
+        """
+        Copia el último estado publicado si es nuevo y no se estaba escribiendo.
+
+        Returns:
+        - bool: True si se ha leído un paso nuevo.
+        """
+        header = self.views['header']
+        seq = int(header[SEQ])
+        # seq == 0: todavía no se ha publicado nada
+        if seq == 0 or seq % 2 or int(header[STEP]) == self.step:
+            return False
+        step = int(header[STEP])
+        np.copyto(self.cells, self.views['cells'])
+        np.copyto(self.goal_mask, self.views['goal_mask'])
+        np.copyto(self.in_goal, self.views['in_goal'])
+        if int(header[SEQ]) != seq:
+            # El simulador publicó mientras se copiaba; se reintenta en el siguiente fotograma
+            return False
+        self.step = step
+        return True
+
+    def close(self):
+        self.views = None
+        self.block.close()
+
+class LiveViewer:
+    def __init__(self, name, fps=FPS):
+        """
+        Ventana que dibuja en otro proceso el estado publicado por WorldPublisher.
+        Comprueba el segmento 'fps' veces por segundo y solo dibuja cuando hay un paso nuevo, así
+        que si el simulador va más rápido se muestran menos pasos, sin frenarlo.
+
+        Parameters:
+        - name (str): Nombre del segmento.
+        - fps (int): Fotogramas por segundo máximos.
+        """
+        from tkinter import Tk, Canvas, PhotoImage, NW
+
+        self.reader = SegmentReader(name)
+        self.fps = fps
+        self.frame = Tk()
+        self.frame.title(name)
+        self.canvas = Canvas(self.frame, width=FRAME_SIZE, height=FRAME_SIZE)
+        self.canvas.pack()
+        self.image = PhotoImage(width=FRAME_SIZE, height=FRAME_SIZE)
+        self.canvas.create_image(0, 0, image=self.image, anchor=NW)
+        self.buffer = np.empty((self.reader.h, self.reader.w, 3), dtype=np.uint8)
+
+    def tick(self):
+        """
+        Dibuja el último paso publicado, si es nuevo, y programa la siguiente comprobación.
+        """
+        if self.reader.read():
+            frame = render_frame(self.reader.cells, self.reader.goal_mask, out=self.buffer)
+            frame = scale_frame(frame, FRAME_SIZE, FRAME_SIZE)
+            self.image.configure(data=encode_ppm(frame), format='PPM')
+            self.frame.title('Paso %d - %d agentes en la figura' % (self.reader.step,
+                                                                  np.count_nonzero(self.reader.in_goal)))
+        self.canvas.after(max(1, 1000 // self.fps), self.tick)
+
+    def run(self):
+        self.tick()
+        self.frame.mainloop()
+        self.reader.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Visor en vivo de una simulación publicada con --publish')
+    parser.add_argument('name', help='Nombre del segmento de memoria compartida')
+    parser.add_argument('--fps', type=int, default=FPS)
+    args = parser.parse_args()
+
+    LiveViewer(args.name, args.fps).run()
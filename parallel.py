@@ -0,0 +1,284 @@
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from macros import *
+
+#### CONSTANTS ####
+
+# Desplazamientos (dy, dx) de los cuatro vecinos: arriba, abajo, izquierda, derecha
+NEIGHBOR_DY = np.array([-1, 1, 0, 0])
+NEIGHBOR_DX = np.array([0, 0, -1, 1])
+MIN_STRIP_ROWS = 2                # Filas mínimas por franja para que dos franjas activas nunca compartan casillas.
+CONTROL_STEP, CONTROL_GOAL_COUNT, CONTROL_STOP = range(3)
+
+class SharedArrays:
+    def __init__(self, specs, names=None):
+        """
+        Conjunto de arreglos de NumPy sobre memoria compartida entre procesos.
+
+        Parameters:
+        - specs (dict): Nombre de cada arreglo -> (forma, dtype).
+        - names (dict): Nombre de cada arreglo -> nombre del bloque de memoria existente. Si es
+          None se crean bloques nuevos.
+        """
+        self.specs = specs
+        self.blocks = dict()
+        self.arrays = dict()
+        for name, (shape, dtype) in specs.items():
+            nbytes = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            if names is None:
+                block = shared_memory.SharedMemory(create=True, size=nbytes)
+            else:
+                block = shared_memory.SharedMemory(name=names[name])
+            self.blocks[name] = block
+            self.arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    def names(self):
+        return {name: block.name for name, block in self.blocks.items()}
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def close(self, unlink=False):
+        """
+        Libera las vistas y cierra los bloques de memoria.
+
+        Parameters:
+        - unlink (bool): Si es True se destruyen los bloques (solo el proceso que los creó).
+        """
+        self.arrays = dict()
+        for block in self.blocks.values():
+            block.close()
+            if unlink:
+                block.unlink()
+
+class ParallelSolverModel:
+    def __init__(self, world, workers=None, probability=0.8, seed=None):
+        """
+        Motor de simulación en paralelo por descomposición del dominio.
+        La cuadrícula envuelta se divide en 2 * workers franjas de filas; cada proceso trabajador
+        es dueño de dos franjas consecutivas (una par y otra impar). Cada paso tiene dos fases: en
+        la primera se mueven a la vez los agentes de todas las franjas pares y en la segunda los de
+        las impares. Como un agente solo se desplaza una casilla, dos franjas activas nunca tocan
+        las mismas casillas y no hacen falta bloqueos.
+        Las celdas, la máscara objetivo y los arreglos del almacén de agentes del mundo pasan a
+        vivir en memoria compartida, así que los trabajadores leen directamente las filas vecinas
+        de otras franjas; las barreras entre fases sustituyen al intercambio de filas fantasma.
+
+        Las reglas de movimiento son las de VectorSolverModel, salvo que los agentes dentro de la
+        figura se redistribuyen moviéndose a una casilla objetivo vecina en lugar de saltar a otra
+        subregión, porque un salto arbitrario rompería la localidad de las franjas.
+
+        Mientras el motor está abierto se pueden eliminar agentes y mover la figura, pero no
+        añadir agentes. Hay que llamar a close() al terminar.
+
+        Parameters:
+        - world: Objeto GridWorld denso sobre el que se simula.
+        - workers (int): Número de procesos. Por defecto, el número de núcleos.
+        - probability (float): Probabilidad de moverse hacia la figura objetivo.
+        - seed (int): Semilla de los generadores aleatorios de los trabajadores. Si es None se saca
+          del generador del mundo.
+        """
+        if not world.dense:
+            raise ValueError('ParallelSolverModel requires a dense grid')
+        self.world = world
+        self.vis = None
+        self.probability = probability
+        workers = workers or mp.cpu_count()
+        # Cada franja necesita al menos MIN_STRIP_ROWS filas
+        self.workers = max(1, min(workers, world.h // (2 * MIN_STRIP_ROWS)))
+        self.goal_version = None
+
+        store = world.agents
+        capacity = len(store.alive)
+        self.shared = SharedArrays({
+            'cells': (world.cells.shape, world.cells.dtype),
+            'goal_mask': (world.goal_mask.shape, bool),
+            'goal_cells': ((world.h * world.w,), np.intp),
+            'pos_y': ((capacity,), store.pos_y.dtype),
+            'pos_x': ((capacity,), store.pos_x.dtype),
+            'goal': ((capacity,), bool),
+            'moved_at': ((capacity,), np.int64),
+            'control': ((3,), np.int64),
+        })
+        # El mundo pasa a trabajar sobre las vistas compartidas
+        for name, array in (('cells', world.cells), ('goal_mask', world.goal_mask)):
+            self.shared[name][:] = array
+            setattr(world, name, self.shared[name])
+        for name in ('pos_y', 'pos_x', 'goal'):
+            self.shared[name][:] = getattr(store, name)
+            setattr(store, name, self.shared[name])
+        self.shared['moved_at'][:] = -1
+        self.shared['control'][:] = 0
+
+        if seed is None:
+            seed = int(world.rng.integers(2 ** 63))
+        bounds = np.linspace(0, world.h, 2 * self.workers + 1).astype(int)
+        self.barrier = mp.Barrier(self.workers + 1)
+        self.processes = []
+        for k in range(self.workers):
+            strips = [(bounds[2 * k], bounds[2 * k + 1]), (bounds[2 * k + 1], bounds[2 * k + 2])]
+            process = mp.Process(target=worker_main, daemon=True,
+                                 args=(self.shared.specs, self.shared.names(), strips, self.barrier,
+                                       probability, [seed, k]))
+            process.start()
+            self.processes.append(process)
+
+    def publish_goal(self):
+        """
+        Copia las casillas objetivo actuales a la memoria compartida si la figura cambió.
+        La máscara objetivo ya es compartida.
+        """
+        goal = self.world.goal_cells()
+        self.shared['goal_cells'][:len(goal)] = goal[:, 0] * self.world.w + goal[:, 1]
+        self.shared['control'][CONTROL_GOAL_COUNT] = len(goal)
+        self.goal_version = self.world.goal_version
+
+    def solve_step(self):
+        """
+        Realiza un paso en paralelo: fase de franjas pares y fase de franjas impares.
+        """
+        if self.goal_version != self.world.goal_version:
+            self.publish_goal()
+        self.shared['control'][CONTROL_STEP] += 1
+        self.barrier.wait()               # Inicio del paso
+        self.barrier.wait()               # Fin de la fase de franjas pares
+        self.barrier.wait()               # Fin de la fase de franjas impares
+
+        # La ocupación ha cambiado sin pasar por los contadores de bloques ni de agentes
+        self.world.goal_tiles_version = None
+        self.world.recount_agents_inside()
+        self.update_visualization()
+
+    def moved_agents(self):
+        """
+        Obtiene los agentes que se movieron en el último paso.
+
+        Returns:
+        - np.ndarray: Índices de los agentes.
+        """
+        return np.flatnonzero(self.shared['moved_at'] == self.shared['control'][CONTROL_STEP])
+
+    def update_visualization(self):
+        """
+        Actualiza la visualización después de realizar los movimientos.
+        """
+        if self.vis:
+            self.world.dirty_agents.update(self.moved_agents().tolist())
+            self.vis.update_dirty_agents()
+
+    def close(self):
+        """
+        Detiene los trabajadores y devuelve al mundo copias privadas de sus arreglos.
+        """
+        if not self.processes:
+            return
+        self.shared['control'][CONTROL_STOP] = 1
+        self.barrier.wait()
+        for process in self.processes:
+            process.join()
+        self.processes = []
+
+        store = self.world.agents
+        for name in ('cells', 'goal_mask'):
+            setattr(self.world, name, np.array(self.shared[name]))
+        for name in ('pos_y', 'pos_x', 'goal'):
+            setattr(store, name, np.array(self.shared[name]))
+        self.shared.close(unlink=True)
+
+def worker_main(specs, names, strips, barrier, probability, seed):
+    """
+    Bucle de un proceso trabajador: en cada paso mueve los agentes de su franja par y, tras la
+    barrera, los de su franja impar.
+
+    Parameters:
+    - specs (dict): Formas y tipos de los arreglos compartidos.
+    - names (dict): Nombres de los bloques de memoria compartida.
+    - strips (list): Filas [inicio, fin) de la franja par y de la impar del trabajador.
+    - barrier: Barrera compartida con el proceso principal y los demás trabajadores.
+    - probability (float): Probabilidad de moverse hacia la figura objetivo.
+    - seed: Semilla del generador aleatorio del trabajador.
+    """
+    shared = SharedArrays(specs, names)
+    rng = np.random.default_rng(seed)
+    control = shared['control']
+    try:
+        while True:
+            barrier.wait()
+            if control[CONTROL_STOP]:
+                break
+            for strip in strips:
+                move_strip(shared, strip, probability, rng)
+                barrier.wait()
+    except Exception:
+        barrier.abort()
+        raise
+    finally:
+        shared.close()
+
+def move_strip(shared, strip, probability, rng):
+    """
+    Mueve a la vez todos los agentes de una franja que aún no se han movido en este paso.
+    Los destinos están como mucho una fila fuera de la franja, en franjas inactivas en esta fase.
+
+    Parameters:
+    - shared (SharedArrays): Arreglos compartidos.
+    - strip (tuple): Filas [inicio, fin) de la franja.
+    - probability (float): Probabilidad de moverse hacia la figura objetivo.
+    - rng (np.random.Generator): Generador aleatorio del trabajador.
+    """
+    cells, goal_mask, moved_at = shared['cells'], shared['goal_mask'], shared['moved_at']
+    step = shared['control'][CONTROL_STEP]
+    h, w = cells.shape
+    r0, r1 = strip
+
+    block = cells[r0:r1].ravel()
+    flat = np.flatnonzero(block)
+    ids = block[flat].astype(np.intp)
+    pending = moved_at[ids] != step
+    ids, flat = ids[pending], flat[pending]
+    pos_y, pos_x = flat // w + r0, flat % w
+    nagents = len(ids)
+    target_y, target_x = pos_y.copy(), pos_x.copy()
+
+    in_goal = goal_mask[pos_y, pos_x]
+    outside = ~in_goal
+
+    # Agentes fuera de la figura: paso con el signo de la diferencia hacia una casilla objetivo
+    goal_count = shared['control'][CONTROL_GOAL_COUNT]
+    biased = outside & (rng.random(nagents) < probability)
+    if goal_count:
+        chosen = shared['goal_cells'][rng.integers(goal_count, size=np.count_nonzero(biased))]
+        target_y[biased] += np.sign(chosen // w - pos_y[biased])
+        target_x[biased] += np.sign(chosen % w - pos_x[biased])
+    else:
+        biased[:] = False
+
+    # Resto de agentes: vecino aleatorio con envolvimiento
+    wander = ~biased
+    dirs = rng.integers(4, size=np.count_nonzero(wander))
+    target_y[wander] += NEIGHBOR_DY[dirs]
+    target_x[wander] += NEIGHBOR_DX[dirs]
+    target_y %= h
+    target_x %= w
+
+    # Los agentes dentro de la figura solo se mueven a otra casilla objetivo
+    leaving = in_goal & ~goal_mask[target_y, target_x]
+    target_y[leaving] = pos_y[leaving]
+    target_x[leaving] = pos_x[leaving]
+
+    # Conflictos: casillas ocupadas al inicio de la fase o elegidas por varios agentes
+    target = target_y * w + target_x
+    moving = target != pos_y * w + pos_x
+    candidates = np.flatnonzero(moving & (cells.ravel()[target] == UNOCCUPIED))
+    order = rng.permutation(candidates)
+    _, first = np.unique(target[order], return_index=True)
+    winners = order[first]
+
+    moved_ids = ids[winners]
+    cells[pos_y[winners], pos_x[winners]] = UNOCCUPIED
+    cells[target_y[winners], target_x[winners]] = moved_ids
+    shared['pos_y'][moved_ids] = target_y[winners]
+    shared['pos_x'][moved_ids] = target_x[winners]
+    shared['goal'][moved_ids] = goal_mask[target_y[winners], target_x[winners]]
+    moved_at[moved_ids] = step
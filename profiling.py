@@ -0,0 +1,178 @@
+import csv
+import time
+from macros import *
+
+#### CONSTANTS ####
+
+PHASES = ['outside_moves', 'goal_rebalance', 'position_update', 'visualization']
+COUNTERS = ['moves_attempted', 'moves_blocked', 'goal_lookups']
+
+# Métodos de SolverModel medidos en cada fase
+PHASE_METHODS = {
+    'move_agent': 'outside_moves',
+    'bias_towards_goal': 'outside_moves',
+    'descend_distance_field': 'outside_moves',
+    'move_agent_within_goal_based_on_density': 'goal_rebalance',
+    'divide_goal_into_subregions': 'goal_rebalance',
+    'calculate_agent_density': 'goal_rebalance',
+    'choose_position_in_subregion': 'goal_rebalance',
+    'update_visualization': 'visualization',
+}
+
+class SolverProfiler:
+    def __init__(self):
+        """
+        Instrumentación opcional de SolverModel por fases.
+        Al conectarse sustituye los métodos del solver (y is_goal del mundo) por versiones que
+        miden el tiempo exclusivo de cada fase y cuentan movimientos y consultas a la figura.
+        goal_lookups cuenta las consultas de pertenencia de casillas sueltas, que pasan todas por
+        world.is_goal (las del solver y las internas de set_agent_pos, add_agents y
+        track_occupancy); las operaciones vectorizadas sobre goal_mask no se cuentan.
+        Mientras no está conectada no añade ningún coste.
+        """
+        self.totals = dict.fromkeys(PHASES + COUNTERS, 0)
+        self.steps = []                   # Una fila por solve_step con los tiempos y contadores del paso.
+        self.current = None
+        self.stack = []                   # Fases anidadas activas: [fase, instante de inicio].
+        self.attached = dict()            # Métodos sustituidos por cada solver conectado: {solver: [(objeto, nombre)]}.
+
+    def attach(self, solver):
+        """
+        Conecta la instrumentación a un solver y a su mundo.
+
+        Parameters:
+        - solver: Objeto SolverModel a instrumentar.
+        """
+        self.detach(solver)
+        patched = self.attached[solver] = []
+        for name, phase in PHASE_METHODS.items():
+            self.patch(patched, solver, name, self.timed(getattr(solver, name), phase))
+        self.patch(patched, solver, 'update_agent_position', self.timed_update(solver))
+        self.patch(patched, solver, 'solve_step', self.timed_step(solver.solve_step))
+        if 'is_goal' not in vars(solver.world):
+            self.patch(patched, solver.world, 'is_goal', self.counted_lookup(solver.world.is_goal))
+
+    def detach(self, solver=None):
+        """
+        Restaura los métodos sustituidos al conectar un solver. Si otro solver conectado comparte
+        el mundo, el contador de is_goal del mundo se mantiene y pasa a depender de él.
+
+        Parameters:
+        - solver: Objeto SolverModel a desconectar. Si es None se desconectan todos.
+        """
+        solvers = list(self.attached) if solver is None else [solver]
+        for solver in solvers:
+            for obj, name in self.attached.pop(solver, []):
+                heir = next((other for other in self.attached if other.world is obj), None)
+                if heir is not None:
+                    self.attached[heir].append((obj, name))
+                else:
+                    vars(obj).pop(name, None)
+
+    def patch(self, patched, obj, name, func):
+        setattr(obj, name, func)
+        patched.append((obj, name))
+
+    def enter(self, phase):
+        now = time.perf_counter()
+        if self.stack:
+            # El tiempo de la fase externa se pausa mientras dura la interna
+            outer = self.stack[-1]
+            self.add(outer[0], now - outer[1])
+        self.stack.append([phase, now])
+
+    def leave(self):
+        now = time.perf_counter()
+        phase, start = self.stack.pop()
+        self.add(phase, now - start)
+        if self.stack:
+            self.stack[-1][1] = now
+
+    def add(self, name, value):
+        self.totals[name] += value
+        if self.current is not None:
+            self.current[name] += value
+
+    def timed(self, method, phase):
+        def wrapper(*args, **kwargs):
+            self.enter(phase)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.leave()
+        return wrapper
+
+    def timed_update(self, solver):
+        method = solver.update_agent_position
+
+        def wrapper(agent, current_pos, new_pos):
+            self.add('moves_attempted', 1)
+            if solver.world.cells[new_pos[0], new_pos[1]] not in (UNOCCUPIED, agent):
+                self.add('moves_blocked', 1)
+            self.enter('position_update')
+            try:
+                return method(agent, current_pos, new_pos)
+            finally:
+                self.leave()
+        return wrapper
+
+    def timed_step(self, method):
+        def wrapper():
+            self.current = dict.fromkeys(PHASES + COUNTERS, 0)
+            start = time.perf_counter()
+            try:
+                return method()
+            finally:
+                self.current['step'] = len(self.steps)
+                self.current['total'] = time.perf_counter() - start
+                self.steps.append(self.current)
+                self.current = None
+        return wrapper
+
+    def counted_lookup(self, method):
+        def wrapper(pos):
+            self.add('goal_lookups', 1)
+            return method(pos)
+        return wrapper
+
+    def summary(self):
+        """
+        Resume la instrumentación acumulada.
+
+        Returns:
+        - dict: Totales de cada fase (segundos) y contador, número de pasos y tiempo medio por paso.
+        """
+        summary = dict(self.totals)
+        summary['steps'] = len(self.steps)
+        summary['total'] = sum(row['total'] for row in self.steps)
+        summary['mean_step'] = summary['total'] / len(self.steps) if self.steps else 0.0
+        return summary
+
+    def format_summary(self):
+        """
+        Formatea el resumen como texto legible.
+
+        Returns:
+        - str: Una línea por fase y contador.
+        """
+        summary = self.summary()
+        total = summary['total'] or 1.0
+        lines = ['Pasos: %d, tiempo total: %.4f s, medio por paso: %.6f s' %
+                 (summary['steps'], summary['total'], summary['mean_step'])]
+        for phase in PHASES:
+            lines.append('  %-16s %.4f s (%5.1f%%)' % (phase, summary[phase], 100 * summary[phase] / total))
+        for counter in COUNTERS:
+            lines.append('  %-16s %d' % (counter, summary[counter]))
+        return '\n'.join(lines)
+
+    def write_csv(self, path):
+        """
+        Exporta los tiempos y contadores de cada paso a un fichero CSV.
+
+        Parameters:
+        - path (str): Ruta del fichero CSV.
+        """
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['step', 'total'] + PHASES + COUNTERS)
+            writer.writeheader()
+            writer.writerows(self.steps)
@@ -0,0 +1,86 @@
+import numpy as np
+
+#### CONSTANTS ####
+
+BLOCK_SIZE = 4096                 # Números aleatorios que se generan de una vez en cada bloque.
+
+class RandomStream:
+    def __init__(self, rng, block_size=BLOCK_SIZE):
+        """
+        Fuente de números aleatorios para el bucle secuencial de SolverModel. En lugar de pedir
+        un número al generador en cada decisión se generan bloques de 'block_size' números de una
+        vez con NumPy y se sirven uno a uno desde una lista de Python. Con la misma semilla la
+        secuencia es siempre la misma.
+
+        Parameters:
+        - rng (np.random.Generator): Generador del que se sacan los bloques.
+        - block_size (int): Tamaño de cada bloque.
+        """
+        self.rng = rng
+        self.block_size = block_size
+        self.block = []
+        self.index = 0
+
+    def refill(self):
+        """
+        Genera un bloque nuevo de números uniformes en [0, 1).
+        """
+        self.block = self.rng.random(self.block_size).tolist()
+        self.index = 0
+
+    def random(self):
+        """
+        Obtiene el siguiente número uniforme en [0, 1), como random.random().
+
+        Returns:
+        - float: Número aleatorio.
+        """
+        if self.index >= len(self.block):
+            self.refill()
+        value = self.block[self.index]
+        self.index += 1
+        return value
+
+    def randrange(self, n):
+        """
+        Obtiene un entero uniforme en [0, n).
+
+        Parameters:
+        - n (int): Límite superior (excluido).
+
+        Returns:
+        - int: Entero aleatorio.
+        """
+        return int(self.random() * n)
+
+    def choice(self, seq):
+        """
+        Elige un elemento uniforme de una secuencia no vacía, como random.choice().
+
+        Parameters:
+        - seq: Secuencia de la que elegir.
+
+        Returns:
+        - Elemento elegido.
+        """
+        return seq[int(self.random() * len(seq))]
+
+    def get_state(self):
+        """
+        Obtiene el estado completo: el del generador y lo que queda del bloque actual.
+
+        Returns:
+        - dict: Estado serializable en JSON.
+        """
+        return {'rng': self.rng.bit_generator.state, 'block': self.block[self.index:]}
+
+    def set_state(self, state):
+        """
+        Restaura un estado obtenido con get_state.
+
+        Parameters:
+        - state (dict): Estado a restaurar.
+        """
+        self.rng.bit_generator.state = state['rng']
+        self.block = list(state['block'])
+        self.index = 0
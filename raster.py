@@ -0,0 +1,89 @@
+import struct
+import zlib
+import numpy as np
+from macros import *
+
+#### CONSTANTS ####
+
+# Colores RGB equivalentes a los del renderizador de canvas
+WHITE = (255, 255, 255)
+LIGHTGREY = (211, 211, 211)
+RED = (255, 0, 0)
+GREEN = (0, 128, 0)
+BLUE = (0, 0, 255)
+
+# Paleta indexada por goal + 2 * ocupada: libre, objetivo, agente fuera, agente dentro
+PALETTE = np.array([WHITE, LIGHTGREY, RED, GREEN], dtype=np.uint8)
+
+def render_frame(cells, goal_mask, out=None):
+    """
+    Construye un fotograma RGB del mundo a partir de la matriz de ocupación y la máscara objetivo.
+    Las casillas libres son blancas, las casillas objetivo gris claro, los agentes fuera de la
+    figura rojos y los agentes dentro de la figura verdes. Solo admite mundos densos.
+
+    Parameters:
+    - cells (np.ndarray): Matriz (h, w) de ocupación del mundo.
+    - goal_mask (np.ndarray): Máscara booleana (h, w) de las casillas objetivo.
+    - out (np.ndarray): Búfer (h, w, 3) de tipo uint8 opcional que se reutiliza.
+
+    Returns:
+    - np.ndarray: Fotograma (h, w, 3) de tipo uint8.
+    """
+    if not isinstance(cells, np.ndarray) or not isinstance(goal_mask, np.ndarray):
+        raise ValueError('render_frame requires a dense grid')
+    index = (cells != UNOCCUPIED).view(np.uint8) * 2
+    index += goal_mask.view(np.uint8)
+    return np.take(PALETTE, index, axis=0, out=out)
+
+def scale_frame(frame, height, width):
+    """
+    Escala un fotograma al tamaño indicado por vecino más cercano.
+
+    Parameters:
+    - frame (np.ndarray): Fotograma (h, w, 3).
+    - height (int): Alto de salida en píxeles.
+    - width (int): Ancho de salida en píxeles.
+
+    Returns:
+    - np.ndarray: Fotograma (height, width, 3).
+    """
+    rows = np.arange(height) * frame.shape[0] // height
+    cols = np.arange(width) * frame.shape[1] // width
+    return frame[rows[:, None], cols]
+
+def encode_ppm(frame):
+    """
+    Codifica un fotograma RGB en formato PPM binario (P6).
+
+    Parameters:
+    - frame (np.ndarray): Fotograma (h, w, 3) de tipo uint8.
+
+    Returns:
+    - bytes: Imagen PPM.
+    """
+    h, w = frame.shape[:2]
+    return b'P6 %d %d 255\n' % (w, h) + np.ascontiguousarray(frame, dtype=np.uint8).tobytes()
+
+def encode_png(frame, level=1):
+    """
+    Codifica un fotograma RGB en formato PNG sin dependencias externas.
+
+    Parameters:
+    - frame (np.ndarray): Fotograma (h, w, 3) de tipo uint8.
+    - level (int): Nivel de compresión zlib (0-9).
+
+    Returns:
+    - bytes: Imagen PNG.
+    """
+    h, w = frame.shape[:2]
+    # Cada fila va precedida del byte de filtro 0 (sin filtro)
+    raw = np.zeros((h, 1 + w * 3), dtype=np.uint8)
+    raw[:, 1:] = frame.reshape(h, w * 3)
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    return (b'\x89PNG\r\n\x1a\n' +
+            chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 2, 0, 0, 0)) +
+            chunk(b'IDAT', zlib.compress(raw.tobytes(), level)) +
+            chunk(b'IEND', b''))
@@ -0,0 +1,250 @@
+import argparse
+import time
+import numpy as np
+import gworld as world
+from macros import *
+from trajectory import TrajectoryReader
+
+#### CONSTANTS ####
+
+FPS = 30                          # Fotogramas por segundo de la reproducción.
+STEPS_PER_SECOND = 10             # Pasos por segundo a velocidad 1.
+SPEED_FACTOR = 2                  # Factor con el que las teclas +/- cambian la velocidad.
+
+class ReplayPlayer:
+    def __init__(self, reader, visualize=None, speed=1.0, fps=FPS, steps_per_second=STEPS_PER_SECOND):
+        """
+        Reproduce una grabación de TrajectoryRecorder sin ejecutar ningún solver.
+        Cada paso se carga en un GridWorld de reproducción que Visualize o RasterVisualize dibujan
+        como en la simulación. La reproducción sigue al reloj: en cada fotograma se salta
+        directamente al paso que corresponde al tiempo transcurrido, así que si dibujar es más lento
+        que la grabación se omiten pasos en lugar de ralentizarse.
+
+        Parameters:
+        - reader: Objeto TrajectoryReader con la grabación.
+        - visualize: Objeto Visualize o RasterVisualize creado sobre 'world' (ver create_player).
+        - speed (float): Multiplicador de la velocidad de reproducción.
+        - fps (int): Fotogramas por segundo que se intentan dibujar.
+        - steps_per_second (float): Pasos por segundo a velocidad 1.
+        """
+        self.reader = reader
+        self.vis = visualize
+        self.speed = speed
+        self.fps = fps
+        self.steps_per_second = steps_per_second
+        self.world = world.GridWorld(reader.h, reader.w)
+        self.world.fit_cells_dtype(reader.capacity)
+        self.world.agents.grow(reader.capacity)
+        self.world.agents.next_id = reader.capacity
+        self.positions = np.full(reader.capacity, -1, dtype=reader.position_dtype)
+        self.in_goal = np.zeros(reader.capacity, dtype=bool)
+        self.goal = None                  # Fila (forma, origen y, origen x) de la figura cargada.
+        self.current = None               # Paso cargado en el mundo.
+        self.playing = False
+        self.anchor = (0, 0.0)            # (paso, instante) desde el que avanza el reloj de reproducción.
+
+    def load_step(self, step):
+        """
+        Carga un paso de la grabación en el mundo de reproducción. El coste no depende del paso ni
+        de la longitud de la grabación, por lo que buscar cualquier paso es inmediato.
+
+        Parameters:
+        - step (int): Paso a cargar.
+
+        Returns:
+        - bool: True si la figura objetivo cambió.
+        """
+        positions, in_goal, goal = self.reader.step(step)
+        positions = np.asarray(positions)
+        in_goal = np.asarray(in_goal)
+        store = self.world.agents
+        w = self.world.w
+
+        changed = np.flatnonzero((positions != self.positions) | (in_goal != self.in_goal))
+        appeared = changed[(positions[changed] >= 0) & (self.positions[changed] < 0)]
+        self.positions[:] = positions
+        self.in_goal[:] = in_goal
+
+        size = len(positions)
+        alive = positions >= 0
+        store.alive[:size] = alive
+        store.pos_y[:size] = np.where(alive, positions // w, 0)
+        store.pos_x[:size] = np.where(alive, positions % w, 0)
+        store.goal[:size] = in_goal
+        store.count = int(np.count_nonzero(store.alive))
+        self.world.recount_agents_inside()
+
+        ids = np.flatnonzero(alive)
+        self.world.cells.fill(UNOCCUPIED)
+        self.world.cells.flat[positions[ids]] = ids
+
+        goal_changed = self.load_goal(goal)
+        self.current = step
+        if hasattr(self.vis, 'render'):
+            # RasterVisualize redibuja la imagen completa, no necesita saber qué agentes cambiaron
+            self.world.pop_dirty_agents()
+            self.vis.render()
+        elif self.vis:
+            self.world.dirty_agents.update(changed.tolist())
+            if len(appeared):
+                self.vis.draw_agents()
+            if goal_changed:
+                self.vis.update_goal_vis()
+            else:
+                self.vis.update_dirty_agents()
+        return goal_changed
+
+    def load_goal(self, goal):
+        """
+        Coloca la figura objetivo de un paso. Si solo cambia el origen se traslada la figura
+        (coste proporcional al perímetro); si cambia la forma se reconstruye.
+
+        Parameters:
+        - goal (np.ndarray): Fila (índice de forma, origen y, origen x).
+
+        Returns:
+        - bool: True si la figura cambió.
+        """
+        shape, oy, ox = (int(v) for v in goal)
+        if self.goal is not None and self.goal == (shape, oy, ox):
+            return False
+        if self.goal is not None and self.goal[0] == shape:
+            self.world.translate_goal(oy - self.goal[1], ox - self.goal[2])
+        else:
+            ys, xs = self.reader.goal_cells(goal)
+            # El origen grabado se fija al actualizar para compilar la figura una sola vez
+            self.world.update_goal_pos(list(zip(ys.tolist(), xs.tolist())), origin=(oy, ox))
+        self.goal = (shape, oy, ox)
+        # El estado objetivo de los agentes es el grabado, no el recalculado con la figura
+        self.world.agents.goal[:len(self.in_goal)] = self.in_goal
+        self.world.recount_agents_inside()
+        return True
+
+    def seek(self, step):
+        """
+        Salta a un paso de la grabación.
+
+        Parameters:
+        - step (int): Paso destino. Se limita al rango grabado.
+        """
+        if len(self.reader) == 0:
+            # Una grabación vacía no tiene pasos que cargar
+            self.playing = False
+            return
+        step = max(0, min(step, len(self.reader) - 1))
+        if step != self.current:
+            self.load_step(step)
+        self.anchor = (step, time.perf_counter())
+
+    def set_speed(self, speed):
+        """
+        Cambia la velocidad de reproducción sin saltos en la posición actual.
+
+        Parameters:
+        - speed (float): Nuevo multiplicador de velocidad.
+        """
+        self.anchor = (self.current or 0, time.perf_counter())
+        self.speed = speed
+
+    def toggle(self):
+        """
+        Pausa o reanuda la reproducción.
+        """
+        self.playing = not self.playing
+        self.anchor = (self.current or 0, time.perf_counter())
+
+    def target_step(self, now):
+        """
+        Calcula el paso que corresponde a un instante según la velocidad actual.
+
+        Parameters:
+        - now (float): Instante de time.perf_counter().
+
+        Returns:
+        - int: Paso destino.
+        """
+        step, start = self.anchor
+        return step + int((now - start) * self.steps_per_second * self.speed)
+
+    def tick(self):
+        """
+        Avanza la reproducción al paso que marca el reloj y programa el siguiente fotograma.
+        """
+        if len(self.reader) == 0:
+            self.playing = False
+        if self.playing:
+            step = self.target_step(time.perf_counter())
+            if step >= len(self.reader) - 1:
+                self.seek(len(self.reader) - 1)
+                self.playing = False
+            elif step != self.current:
+                self.load_step(step)
+        self.vis.canvas.after(max(1, 1000 // self.fps), self.tick)
+
+    def bind_keys(self):
+        """
+        Asocia las teclas de control: espacio (pausa), flechas (paso a paso, con mayúsculas de 10 en
+        10), Inicio/Fin (principio y final) y +/- (velocidad).
+        """
+        frame = self.vis.frame
+        frame.bind('<space>', lambda event: self.toggle())
+        frame.bind('<Right>', lambda event: self.seek((self.current or 0) + 1))
+        frame.bind('<Left>', lambda event: self.seek((self.current or 0) - 1))
+        frame.bind('<Shift-Right>', lambda event: self.seek((self.current or 0) + 10))
+        frame.bind('<Shift-Left>', lambda event: self.seek((self.current or 0) - 10))
+        frame.bind('<Home>', lambda event: self.seek(0))
+        frame.bind('<End>', lambda event: self.seek(len(self.reader) - 1))
+        frame.bind('<plus>', lambda event: self.set_speed(self.speed * SPEED_FACTOR))
+        frame.bind('<minus>', lambda event: self.set_speed(self.speed / SPEED_FACTOR))
+
+    def play(self, start=0):
+        """
+        Dibuja el paso inicial y reproduce la grabación en el bucle de eventos de la ventana.
+
+        Parameters:
+        - start (int): Paso inicial.
+        """
+        # Se dibuja el mundo vacío y la carga del paso inicial añade la figura y los agentes
+        self.vis.draw_world()
+        self.vis.draw_agents()
+        self.vis.canvas.pack()
+        self.seek(start)
+        self.bind_keys()
+        self.playing = True
+        self.anchor = (self.current, time.perf_counter())
+        self.tick()
+        self.vis.frame.mainloop()
+
+def create_player(path, renderer='raster', **kwargs):
+    """
+    Crea un reproductor con su ventana para una grabación.
+
+    Parameters:
+    - path (str): Directorio de la grabación.
+    - renderer (str): 'canvas' o 'raster'.
+    - kwargs: Argumentos adicionales de ReplayPlayer (speed, fps, steps_per_second).
+
+    Returns:
+    - ReplayPlayer: Reproductor listo para play().
+    """
+    # La visualización se importa aquí para poder usar ReplayPlayer sin tkinter
+    from visualize import create_visualize
+
+    player = ReplayPlayer(TrajectoryReader(path), **kwargs)
+    player.vis = create_visualize(player.world, renderer)
+    return player
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Reproduce una simulación grabada con --record')
+    parser.add_argument('path', help='Directorio de la grabación')
+    parser.add_argument('--renderer', choices=['canvas', 'raster'], default='raster')
+    parser.add_argument('--speed', type=float, default=1.0, help='Multiplicador de velocidad')
+    parser.add_argument('--fps', type=int, default=FPS, help='Fotogramas por segundo')
+    parser.add_argument('--steps-per-second', type=float, default=STEPS_PER_SECOND,
+                        help='Pasos por segundo a velocidad 1')
+    parser.add_argument('--start', type=int, default=0, help='Paso inicial')
+    args = parser.parse_args()
+
+    player = create_player(args.path, args.renderer, speed=args.speed, fps=args.fps,
+                           steps_per_second=args.steps_per_second)
+    player.play(args.start)
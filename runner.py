@@ -0,0 +1,114 @@
+import time
+
+#### CONSTANTS ####
+
+FPS = 10                          # Fotogramas por segundo por defecto (un paso cada 100 ms, como TIME_RESET).
+STEPS_PER_FRAME = 1
+
+class Runner:
+    def __init__(self, vis, steps, steps_per_frame=STEPS_PER_FRAME, fps=FPS, fast=False, on_finish=None):
+        """
+        Ejecuta la simulación dentro del bucle de eventos de Tk sin bloquear la ventana.
+        La simulación se describe como un generador que avanza un paso en cada next(). Si el
+        generador produce un número, se interpreta como una pausa en segundos que se respeta sin
+        bloquear la interfaz. En cada fotograma se ejecutan 'steps_per_frame' pasos y después se
+        redibujan una sola vez los agentes y la figura que cambiaron.
+
+        Teclas: espacio pausa o reanuda, 'f' activa o desactiva el modo rápido, en el que cada
+        fotograma ejecuta tantos pasos como quepan en su tiempo y se omiten las pausas.
+
+        Parameters:
+        - vis: Objeto Visualize o RasterVisualize.
+        - steps: Generador de la simulación.
+        - steps_per_frame (int): Pasos por fotograma en modo normal.
+        - fps (float): Fotogramas por segundo objetivo.
+        - fast (bool): Si es True se empieza en modo rápido.
+        - on_finish: Función opcional que se llama cuando el generador termina.
+        """
+        self.vis = vis
+        self.steps = steps
+        self.steps_per_frame = steps_per_frame
+        self.fps = fps
+        self.fast = fast
+        self.on_finish = on_finish
+        self.paused = False
+        self.finished = False
+        self.scheduled = None             # Identificador del próximo fotograma programado con after().
+        self.goal_version = vis.world.goal_version
+        self.steps_done = 0
+
+    def start(self):
+        """
+        Asocia las teclas de control, programa el primer fotograma y entra en el bucle de eventos.
+        """
+        self.vis.frame.bind('<space>', lambda event: self.toggle_pause())
+        self.vis.frame.bind('f', lambda event: self.toggle_fast())
+        self.schedule(0)
+        self.vis.frame.mainloop()
+
+    def schedule(self, delay):
+        """
+        Programa el siguiente fotograma.
+
+        Parameters:
+        - delay (int): Milisegundos de espera.
+        """
+        self.scheduled = self.vis.canvas.after(delay, self.frame)
+
+    def toggle_pause(self):
+        """
+        Pausa o reanuda la simulación. La ventana sigue respondiendo mientras está en pausa.
+        """
+        if self.finished:
+            return
+        self.paused = not self.paused
+        if self.paused and self.scheduled is not None:
+            self.vis.canvas.after_cancel(self.scheduled)
+            self.scheduled = None
+        elif not self.paused and self.scheduled is None:
+            self.schedule(0)
+
+    def toggle_fast(self):
+        """
+        Activa o desactiva el modo rápido.
+        """
+        self.fast = not self.fast
+
+    def frame(self):
+        """
+        Ejecuta los pasos de un fotograma, redibuja y programa el siguiente.
+        """
+        self.scheduled = None
+        start = time.perf_counter()
+        frame_time = 1.0 / self.fps
+        pause = 0.0
+        done = 0
+        while done < self.steps_per_frame or (self.fast and time.perf_counter() - start < frame_time):
+            try:
+                request = next(self.steps)
+            except StopIteration:
+                self.finished = True
+                break
+            done += 1
+            if request and not self.fast:
+                pause = request
+                break
+        self.steps_done += done
+        self.render()
+
+        if self.finished:
+            if self.on_finish:
+                self.on_finish()
+            return
+        elapsed = time.perf_counter() - start
+        self.schedule(max(1, int(1000 * (max(frame_time - elapsed, 0.0) + pause))))
+
+    def render(self):
+        """
+        Redibuja lo que cambió desde el último fotograma.
+        """
+        if self.goal_version != self.vis.world.goal_version:
+            self.vis.update_goal_vis()
+            self.goal_version = self.vis.world.goal_version
+        else:
+            self.vis.update_dirty_agents()
@@ -0,0 +1,276 @@
+import math
+import os
+import numpy as np
+
+#### CONSTANTS ####
+
+FILLED_CHARS = '#Xx*@1'           # Caracteres que marcan una casilla objetivo en las figuras de texto.
+THRESHOLD = 128                   # Los píxeles más oscuros que este nivel de gris son casillas objetivo.
+TARGET_TILES = 16                 # Número aproximado de bloques en que se divide una figura.
+MIN_TILE_SIDE = 6                 # Lado mínimo en casillas de cada bloque; con bloques más pequeños hay más movimientos bloqueados.
+NETPBM_EXTENSIONS = ('.pbm', '.pgm', '.ppm')
+
+class CompiledGoal:
+    def __init__(self, mask, origin=(0, 0), tile_side=None):
+        """
+        Figura objetivo compilada a partir de una máscara booleana. Todo lo que depende solo de la
+        forma se calcula una vez aquí y se reutiliza mientras la figura se desplaza: las casillas,
+        el centroide, el borde y la división en bloques cuadrados (subregiones espaciales).
+        Las coordenadas son relativas a la esquina superior izquierda del rectángulo envolvente,
+        que se coloca en la cuadrícula en 'origin'.
+
+        Parameters:
+        - mask (np.ndarray): Máscara (alto, ancho) con True en las casillas de la figura.
+        - origin (tuple): Posición (y, x) en la cuadrícula de la esquina de la máscara.
+        - tile_side (int): Lado de los bloques. Por defecto se elige para obtener unos
+          TARGET_TILES bloques, de modo que el número de subregiones no crece con la figura.
+        """
+        mask = np.asarray(mask, dtype=bool)
+        if mask.ndim != 2:
+            raise ValueError('A goal mask must be two-dimensional')
+        rows = np.flatnonzero(mask.any(axis=1))
+        cols = np.flatnonzero(mask.any(axis=0))
+        if not len(rows):
+            raise ValueError('A goal mask must contain at least one cell')
+        # Se recorta al rectángulo envolvente y se corrige el origen
+        self.mask = mask[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1].copy()
+        self.origin = (origin[0] + int(rows[0]), origin[1] + int(cols[0]))
+
+        self.ys, self.xs = np.nonzero(self.mask)
+        self.size = len(self.ys)
+        self.cells = list(zip(self.ys.tolist(), self.xs.tolist()))   # Casillas relativas en orden de filas.
+        self.centroid = (float(self.ys.mean()), float(self.xs.mean()))
+
+        # Borde: casillas con algún vecino (también en diagonal) fuera de la figura
+        padded = np.pad(self.mask, 1)
+        interior = self.mask.copy()
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                interior &= padded[1 + dy:padded.shape[0] - 1 + dy, 1 + dx:padded.shape[1] - 1 + dx]
+        edge = self.mask & ~interior
+        self.boundary = list(zip(*(axis.tolist() for axis in np.nonzero(edge))))
+
+        # Bloques cuadrados sobre el rectángulo envolvente; se descartan los que no tienen casillas
+        self.tile_side = tile_side or max(MIN_TILE_SIDE, math.ceil(math.sqrt(self.size / TARGET_TILES)))
+        tiles_x = -(-self.mask.shape[1] // self.tile_side)
+        raw = (self.ys // self.tile_side) * tiles_x + self.xs // self.tile_side
+        used, labels = np.unique(raw, return_inverse=True)
+        self.tile_index = np.full(self.mask.shape, -1, dtype=np.int32)   # Bloque de cada casilla, -1 fuera.
+        self.tile_index[self.ys, self.xs] = labels
+        self.tiles = [[] for _ in range(len(used))]                      # Casillas relativas de cada bloque.
+        for pos, label in zip(self.cells, labels.tolist()):
+            self.tiles[label].append(pos)
+        # Rectángulo (y0, x0, y1, x1) de cada bloque, con el final excluido
+        y0, x0 = (used // tiles_x) * self.tile_side, (used % tiles_x) * self.tile_side
+        self.tile_rects = np.stack([y0, x0, np.minimum(y0 + self.tile_side, self.mask.shape[0]),
+                                    np.minimum(x0 + self.tile_side, self.mask.shape[1])], axis=1)
+        self.mask_table = summed_area_table(self.mask)                    # Casillas de la figura en cualquier rectángulo.
+        self.tile_sizes = rect_sums(self.mask_table, self.tile_rects)
+
+    def __len__(self):
+        return self.size
+
+    def __repr__(self):
+        return 'CompiledGoal(%d cells, %dx%d at %s, %d tiles)' % (self.size, self.mask.shape[0],
+                                                                  self.mask.shape[1], self.origin,
+                                                                  len(self.tiles))
+
+    def placed(self, origin):
+        """
+        Obtiene la misma figura colocada en otro origen, sin volver a compilarla.
+
+        Parameters:
+        - origin (tuple): Nueva posición (y, x) de la esquina del rectángulo envolvente.
+
+        Returns:
+        - CompiledGoal: Copia que comparte los datos de la forma.
+        """
+        goal = object.__new__(CompiledGoal)
+        goal.__dict__.update(self.__dict__)
+        goal.origin = (int(origin[0]), int(origin[1]))
+        return goal
+
+    def centered(self, h, w):
+        """
+        Obtiene la figura colocada con su centroide en el centro de una cuadrícula h x w.
+
+        Parameters:
+        - h (int): Altura de la cuadrícula.
+        - w (int): Ancho de la cuadrícula.
+
+        Returns:
+        - CompiledGoal: Figura colocada.
+        """
+        return self.placed((h // 2 - round(self.centroid[0]), w // 2 - round(self.centroid[1])))
+
+    def positions(self, h, w):
+        """
+        Obtiene las casillas de la figura en la cuadrícula, con envolvimiento.
+
+        Parameters:
+        - h (int): Altura de la cuadrícula.
+        - w (int): Ancho de la cuadrícula.
+
+        Returns:
+        - tuple: Arreglos (ys, xs) de las casillas en orden de filas de la figura.
+        """
+        return (self.ys + self.origin[0]) % h, (self.xs + self.origin[1]) % w
+
+def summed_area_table(grid):
+    """
+    Calcula la tabla de sumas acumuladas (imagen integral) de una matriz: table[y, x] es la suma
+    de grid[:y, :x], así que la suma de cualquier rectángulo se obtiene con cuatro lecturas.
+
+    Parameters:
+    - grid (np.ndarray): Matriz (alto, ancho) de valores o booleanos.
+
+    Returns:
+    - np.ndarray: Tabla (alto + 1, ancho + 1) de tipo int64.
+    """
+    table = np.zeros((grid.shape[0] + 1, grid.shape[1] + 1), dtype=np.int64)
+    np.cumsum(grid, axis=0, out=table[1:, 1:])
+    np.cumsum(table[1:, 1:], axis=1, out=table[1:, 1:])
+    return table
+
+def rect_sums(table, rects):
+    """
+    Suma los valores de varios rectángulos a partir de una tabla de sumas acumuladas.
+
+    Parameters:
+    - table (np.ndarray): Tabla calculada con summed_area_table.
+    - rects (np.ndarray): Rectángulos (y0, x0, y1, x1), con el final excluido, de forma (n, 4) o (4,).
+
+    Returns:
+    - np.ndarray o int: Suma de cada rectángulo.
+    """
+    y0, x0, y1, x1 = np.asarray(rects).T
+    return table[y1, x1] - table[y0, x1] - table[y1, x0] + table[y0, x0]
+
+def compile_goal(goal, origin=(0, 0), tile_side=None):
+    """
+    Compila una figura objetivo a partir de una máscara, un texto o una lista de posiciones.
+
+    Parameters:
+    - goal: Máscara de NumPy, texto (ver from_ascii), lista de tuplas (y, x) o CompiledGoal.
+    - origin (tuple): Posición (y, x) de la esquina de la máscara o del texto. Se ignora con listas
+      de posiciones, que ya son absolutas.
+    - tile_side (int): Lado de los bloques (ver CompiledGoal).
+
+    Returns:
+    - CompiledGoal: Figura compilada.
+    """
+    if isinstance(goal, CompiledGoal):
+        return goal
+    if isinstance(goal, str):
+        return from_ascii(goal, origin, tile_side)
+    if isinstance(goal, np.ndarray):
+        return CompiledGoal(goal, origin, tile_side)
+    positions = np.array(list(goal), dtype=np.int64).reshape(-1, 2)
+    if not len(positions):
+        raise ValueError('A goal must contain at least one cell')
+    top, left = positions.min(axis=0)
+    mask = np.zeros(tuple(positions.max(axis=0) - (top, left) + 1), dtype=bool)
+    mask[positions[:, 0] - top, positions[:, 1] - left] = True
+    return CompiledGoal(mask, (int(top), int(left)), tile_side)
+
+def from_ascii(text, origin=(0, 0), tile_side=None):
+    """
+    Compila una figura dibujada con caracteres: cada línea es una fila y los caracteres de
+    FILLED_CHARS son casillas objetivo. Las líneas pueden tener longitudes distintas.
+
+    Parameters:
+    - text (str): Dibujo de la figura.
+    - origin (tuple): Posición (y, x) de la esquina del dibujo.
+    - tile_side (int): Lado de los bloques (ver CompiledGoal).
+
+    Returns:
+    - CompiledGoal: Figura compilada.
+    """
+    lines = text.splitlines()
+    mask = np.zeros((len(lines), max((len(line) for line in lines), default=0)), dtype=bool)
+    for y, line in enumerate(lines):
+        for x, char in enumerate(line):
+            mask[y, x] = char in FILLED_CHARS
+    return CompiledGoal(mask, origin, tile_side)
+
+def load_goal(path, origin=(0, 0), tile_side=None):
+    """
+    Carga y compila una figura objetivo desde un fichero según su extensión: '.npy' (máscara de
+    NumPy, casillas distintas de cero), '.txt' (dibujo de texto), '.pbm', '.pgm' o '.ppm' (imagen
+    Netpbm) o cualquier otra imagen si está instalado Pillow. En las imágenes los píxeles oscuros
+    son casillas objetivo.
+
+    Parameters:
+    - path (str): Ruta del fichero.
+    - origin (tuple): Posición (y, x) de la esquina de la figura.
+    - tile_side (int): Lado de los bloques (ver CompiledGoal).
+
+    Returns:
+    - CompiledGoal: Figura compilada.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.npy':
+        return CompiledGoal(np.load(path) != 0, origin, tile_side)
+    if ext == '.txt':
+        with open(path) as f:
+            return from_ascii(f.read(), origin, tile_side)
+    if ext in NETPBM_EXTENSIONS:
+        gray = read_netpbm(path)
+    else:
+        try:
+            from PIL import Image
+        except ImportError:
+            raise RuntimeError('Pillow is required to load %s images' % ext)
+        with Image.open(path) as image:
+            gray = np.asarray(image.convert('L'))
+    return CompiledGoal(gray < THRESHOLD, origin, tile_side)
+
+def read_netpbm(path):
+    """
+    Lee una imagen Netpbm (P1-P6) como niveles de gris de 0 (negro) a 255 (blanco).
+
+    Parameters:
+    - path (str): Ruta de la imagen.
+
+    Returns:
+    - np.ndarray: Matriz (alto, ancho) de tipo uint8.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    # Cabecera: número mágico, ancho, alto y valor máximo (salvo en PBM), con comentarios '#'
+    tokens, pos = [], 0
+    count = 3 if data[:2] in (b'P1', b'P4') else 4
+    while len(tokens) < count:
+        while data[pos:pos + 1].isspace():
+            pos += 1
+        if data[pos:pos + 1] == b'#':
+            pos = data.index(b'\n', pos)
+            continue
+        start = pos
+        while not data[pos:pos + 1].isspace():
+            pos += 1
+        tokens.append(data[start:pos])
+    magic, w, h = tokens[0], int(tokens[1]), int(tokens[2])
+    maxval = int(tokens[3]) if count == 4 else 1
+    channels = 3 if magic in (b'P3', b'P6') else 1
+
+    if magic in (b'P1', b'P2', b'P3'):
+        body = data[pos:]
+        if magic == b'P1':
+            # Los píxeles de PBM pueden ir sin separar
+            body = b' '.join(bytes([c]) for c in body if c in b'01')
+        values = np.array(body.split()[:h * w * channels], dtype=np.int64)
+    elif magic == b'P4':
+        rows = np.frombuffer(data, dtype=np.uint8, count=h * ((w + 7) // 8), offset=pos + 1)
+        values = np.unpackbits(rows.reshape(h, -1), axis=1)[:, :w]
+    elif magic in (b'P5', b'P6'):
+        dtype = np.uint8 if maxval < 256 else np.dtype('>u2')
+        values = np.frombuffer(data, dtype=dtype, count=h * w * channels, offset=pos + 1)
+    else:
+        raise ValueError('Not a Netpbm image: %s' % path)
+
+    if magic in (b'P1', b'P4'):
+        # En PBM el 1 es negro
+        return np.where(np.asarray(values).reshape(h, w), 0, 255).astype(np.uint8)
+    values = np.asarray(values, dtype=np.float64).reshape(h, w, channels).mean(axis=2)
+    return (values * 255 / maxval).astype(np.uint8)
@@ -1,8 +1,5 @@
-import time
-import numpy as np
-import random
 import gworld as world
-from visualize import Visualize
+from convergence import ConvergenceDetector, PLATEAU_STEPS
 from macros import *
 
 #### CONSTANTS ####
@@ -18,34 +15,92 @@ square_size = 10
 
 # Coordenadas del cuadrado centrado
 square_center_x = WORLD_WIDTH // 2
-square_center_y = WORLD_WIDTH // 2
+square_center_y = WORLD_HEIGHT // 2
 
-# Calcular las esquinas del cuadrado
+# Calcular las esquinas (y, x) del cuadrado
 half_size = square_size // 2
 
-square_top_left = (square_center_x - half_size, square_center_y - half_size)
-square_top_right = (square_center_x + half_size, square_center_y - half_size)
-square_bottom_left = (square_center_x - half_size, square_center_y + half_size)
-square_bottom_right = (square_center_x + half_size, square_center_y + half_size)
+square_top_left = (square_center_y - half_size, square_center_x - half_size)
+square_top_right = (square_center_y - half_size, square_center_x + half_size)
+square_bottom_left = (square_center_y + half_size, square_center_x - half_size)
+square_bottom_right = (square_center_y + half_size, square_center_x + half_size)
 
-# Crea un cuadrado de tamaño square_size centrado en el centro del mundo
-GOAL = [
-    (x, y) for x in range(square_center_x - half_size, square_center_x + half_size + 1)
-    for y in range(square_center_y - half_size, square_center_y + half_size + 1)
-]
+def square_goal(center_y, center_x, size):
+    """
+    Crea las posiciones de un cuadrado centrado en (center_y, center_x).
+
+    Parameters:
+    - center_y (int): Fila del centro del cuadrado.
+    - center_x (int): Columna del centro del cuadrado.
+    - size (int): Tamaño del cuadrado (igual que square_size, el lado tiene size // 2 * 2 + 1 casillas).
+
+    Returns:
+    - list: Lista de tuplas (y, x) del cuadrado.
+    """
+    half = size // 2
+    return [
+        (y, x) for y in range(center_y - half, center_y + half + 1)
+        for x in range(center_x - half, center_x + half + 1)
+    ]
+
+# Crea un cuadrado de tamaño square_size centrado en el centro del mundo, con posiciones (y, x)
+GOAL = square_goal(square_center_y, square_center_x, square_size)
 
 class SolverModel:
-    def __init__(self, world, visualize=None):
+    def __init__(self, world, visualize=None, probability=0.8, use_distance_field=True):
         self.world = world
-        self.goal_pos = world.goal_pos
         self.vis = visualize
-    
+        self.probability = probability  # Probabilidad de moverse hacia la figura objetivo.
+        # Si es False se usa el sesgo original hacia una casilla objetivo aleatoria. Los mundos
+        # dispersos no tienen campo de distancias y usan siempre el sesgo original.
+        self.use_distance_field = use_distance_field and world.dense
+        self.field_array = None
+        self.field_rows = None
+        self.profiler = None
+        self.random = world.stream        # Números aleatorios por bloques del mundo, reproducibles con su semilla.
+
+    @property
+    def goal_pos(self):
+        """
+        Lista de posiciones objetivo actual del mundo.
+        """
+        return self.world.goal_pos
+
+    def enable_profiling(self, profiler=None):
+        """
+        Activa la medición de tiempos por fase y los contadores de movimientos y consultas.
+
+        Parameters:
+        - profiler: Objeto SolverProfiler a reutilizar (por ejemplo entre varios solvers). Si es None se crea uno nuevo.
+
+        Returns:
+        - SolverProfiler: Instrumentación conectada al solver.
+        """
+        from profiling import SolverProfiler
+
+        self.disable_profiling()
+        self.profiler = profiler or SolverProfiler()
+        self.profiler.attach(self)
+        return self.profiler
+
+    def disable_profiling(self):
+        """
+        Desactiva la instrumentación y restaura los métodos originales.
+        """
+        if self.profiler:
+            self.profiler.detach(self)
+            self.profiler = None
+
     def solve_step(self):
         """
         Realiza un paso en el proceso de solución.
         Implementa la lógica de movimiento aleatorio de los agentes con envolvimiento.
         Actualiza aindx_goalreached si un agente se encuentra dentro de una posición objetivo.
         """
+        if self.use_distance_field:
+            self.world.refresh_distance_field()
+        self.world.refresh_goal_tiles()
+
         for agent in self.world.get_agents():
             if not self.world.aindx_goalreached[agent]:
                 self.move_agent(agent)
@@ -87,9 +142,8 @@ class SolverModel:
         - agent: Index of the agent to move.
         """
         current_pos = self.world.aindx_cpos[agent]
-        goal_pos = self.goal_pos
 
-        new_pos = self.bias_towards_goal(current_pos, goal_pos)
+        new_pos = self.bias_towards_goal(current_pos, None, self.probability)
         self.update_agent_position(agent, current_pos, new_pos)
 
     def bias_towards_goal(self, current_pos, goal_pos, probability=0.8):
@@ -98,29 +152,86 @@ class SolverModel:
 
         Parameters:
         - current_pos: Current position.
-        - goal_pos: List of goal positions.
+        - goal_pos: List of goal positions. If None, a goal position of the world is picked without
+          rebuilding its goal list after a translation.
         - probability: Probability of moving towards the goal (default is 0.8).
 
         Returns:
         - tuple: New position.
         """
-        if random.random() < probability:
-            # Move towards a random goal position
-            chosen_goal = random.choice(goal_pos)
-            dx = chosen_goal[0] - current_pos[0]
-            dy = chosen_goal[1] - current_pos[1]
-
-            new_pos = (
-                current_pos[0] + int(dx / abs(dx)) if dx != 0 else current_pos[0],
-                current_pos[1] + int(dy / abs(dy)) if dy != 0 else current_pos[1]
-            )
+        if self.random.random() < probability:
+            if self.use_distance_field:
+                # Move downhill on the cached distance field towards the goal
+                new_pos = self.descend_distance_field(current_pos)
+            else:
+                # Move towards a random goal position
+                if goal_pos is None:
+                    chosen_goal = self.world.goal_cell(self.random.randrange(len(self.world.goal_shape)))
+                else:
+                    chosen_goal = self.random.choice(goal_pos)
+                dx = chosen_goal[0] - current_pos[0]
+                dy = chosen_goal[1] - current_pos[1]
+
+                new_pos = (
+                    current_pos[0] + int(dx / abs(dx)) if dx != 0 else current_pos[0],
+                    current_pos[1] + int(dy / abs(dy)) if dy != 0 else current_pos[1]
+                )
         else:
             # Move randomly
             valid_moves = self.get_valid_moves(current_pos)
-            new_pos = random.choice(valid_moves) if valid_moves else current_pos
+            new_pos = self.random.choice(valid_moves) if valid_moves else current_pos
 
         return new_pos
 
+    def get_field_rows(self):
+        """
+        Obtiene el campo de distancias del mundo como listas de Python, más rápidas que NumPy
+        para las consultas de casillas sueltas. La conversión se repite solo si el campo cambia, no
+        cuando solo se traslada la figura.
+
+        Returns:
+        - tuple: (filas del campo de distancias, desplazamiento (sy, sx) del campo, ver
+          GridWorld.get_shifted_distance_field).
+        """
+        field, shift = self.world.get_shifted_distance_field()
+        if field is not self.field_array:
+            self.field_array = field
+            self.field_rows = field.tolist()
+        return self.field_rows, shift
+
+    def descend_distance_field(self, current_pos):
+        """
+        Move downhill on the world's distance field towards the goal, with wrap-around.
+        Like the original sign-of-delta step, the agent moves diagonally when both a vertical and a
+        horizontal neighbour are closer to the goal. Free cells are preferred so that fewer moves
+        are blocked.
+
+        Parameters:
+        - current_pos: Current position.
+
+        Returns:
+        - tuple: New position (the current one if already inside the goal).
+        """
+        field, (sy, sx) = self.get_field_rows()
+        h, w = self.world.h, self.world.w
+        y, x = current_pos[0], current_pos[1]
+        # Posición en el campo, que puede estar desplazado si la figura se trasladó
+        fy, fx = (y - sy) % h, (x - sx) % w
+        current_dist = field[fy][fx]
+        rows = [(y + d) % h for d in (-1, 1) if field[(fy + d) % h][fx] < current_dist]
+        cols = [(x + d) % w for d in (-1, 1) if field[fy][(fx + d) % w] < current_dist]
+
+        candidates = []
+        if rows and cols:
+            candidates.append((self.random.choice(rows), self.random.choice(cols)))
+        candidates += [(row, x) for row in rows] + [(y, col) for col in cols]
+        for move in candidates:
+            if self.world.passable(move):
+                return move
+        # Todos los vecinos más cercanos están ocupados: se rodea el bloqueo con un paso aleatorio
+        valid_moves = self.get_valid_moves(current_pos)
+        return self.random.choice(valid_moves) if valid_moves else current_pos
+
     ### Agentes dentro de la figura ####
 
     def get_valid_moves_within_goal(self, current_pos):
@@ -142,7 +253,7 @@ class SolverModel:
 
         possible_moves = [(x % self.world.h, y % self.world.w) for x, y in possible_moves]
 
-        valid_moves = [move for move in possible_moves if move in self.goal_pos]
+        valid_moves = [move for move in possible_moves if self.world.is_goal(move)]
         
         return valid_moves
 
@@ -154,93 +265,57 @@ class SolverModel:
         - agent: Índice del agente a mover.
         """
         current_pos = self.world.aindx_cpos[agent]
-        if current_pos in self.goal_pos:
-                self.world.aindx_goalreached[agent] = True
-        else:
-            self.world.aindx_goalreached[agent] = False
         valid_moves = self.get_valid_moves_within_goal(current_pos)
         
         if valid_moves:
-            # Divide la figura objetivo en subregiones
-            subregions = self.divide_goal_into_subregions()
+            # Bloques de la figura objetivo con su ocupación (tabla de sumas acumuladas del paso)
+            goal_tiles = self.world.get_goal_tiles()
 
-            # Calcula la densidad de agentes en cada subregión
-            agent_density_in_subregions = [self.calculate_agent_density(subregion) for subregion in subregions]
+            # Encuentra el bloque menos denso y elige una posición en ese bloque
+            min_density_subregion = goal_tiles.least_dense()
 
-            # Encuentra la subregión menos densa y elige una posición en esa subregión
-            min_density_subregion = min(enumerate(agent_density_in_subregions), key=lambda x: x[1])[0]
-            
-            new_pos = self.choose_position_in_subregion(min_density_subregion, subregions)
+            new_pos = self.choose_position_in_subregion(min_density_subregion, goal_tiles)
 
             # Mueve el agente a la nueva posición
             self.update_agent_position(agent, current_pos, new_pos) # todo un agente no puede moverse a mas de 1 casilla
 
-    def divide_goal_into_subregions(self, subregion_size=11):    
+    def divide_goal_into_subregions(self):
         """
-        Divide la figura objetivo en subregiones.
-
-        Parameters:
-        - subregion_size: Tamaño de las subregiones.
+        Divide la figura objetivo en subregiones: los bloques cuadrados de la figura compilada.
 
         Returns:
-        - list: Lista de subregiones.
+        - list: Lista de subregiones (listas de tuplas (y, x)).
         """
-        subregions = []
-
-        for i in range(0, len(self.goal_pos), subregion_size):
-            subregion = self.goal_pos[i:i+subregion_size]
-            subregions.append(subregion)
-        return subregions
+        return self.world.get_goal_tiles().subregions
 
     def calculate_agent_density(self, subregion):
         """
-        Calcula la densidad de agentes en una subregión.
+        Calcula la densidad de agentes en una subregión en O(1).
 
         Parameters:
-        - subregion: Subregión de la figura objetivo.
+        - subregion: Índice del bloque, o rectángulo (y0, x0, y1, x1) relativo a la máscara de la
+          figura, con el final excluido.
 
         Returns:
         - float: Densidad de agentes en la subregión.
         """
-        num_agents = 0
-        # Calcula el número de agentes en la subregión
-        for agent in self.world.get_agents():
-            if self.world.aindx_goalreached[agent]:
-                if self.world.aindx_cpos[agent] in subregion:
-                    num_agents += 1
-
-        # Calcula el tamaño total de la subregión
-        subregion_size = len(subregion)
-
-        # Calcula la densidad de agentes dividiendo el número de agentes por el tamaño total de la subregión
-        density = num_agents / subregion_size if subregion_size > 0 else 0.0
-        return density
+        goal_tiles = self.world.get_goal_tiles()
+        if isinstance(subregion, tuple):
+            return goal_tiles.density(*subregion)
+        return float(goal_tiles.counts[subregion] / goal_tiles.sizes[subregion])
 
     def choose_position_in_subregion(self, subregion_idx, subregions):
         """
-        Elige una posición dentro de una subregión considerando maximizar la densidad en el centro de GOAL.
+        Elige una posición aleatoria dentro de una subregión de GOAL.
 
         Parameters:
         - subregion_idx: Índice de la subregión en la que se moverá el agente.
-        - subregions: Lista de subregiones.
+        - subregions: Objeto GoalTiles con los bloques de la figura.
 
         Returns:
         - tuple: Nueva posición en la subregión.
         """
-        # Obtén la subregión correspondiente al índice
-        subregion = subregions[subregion_idx]
-
-        # Obtén las posiciones en el centro de GOAL
-        center_goal_positions = [(pos[0], pos[1]) for pos in subregion if (pos[0], pos[1]) in self.goal_pos]
-
-        if center_goal_positions:
-            # Si hay casillas en el centro de GOAL, elige una posición aleatoria en el centro
-            new_pos = random.choice(center_goal_positions)
-        else:
-            # Si no hay casillas en el centro de GOAL, elige una posición aleatoria en la subregión
-            new_pos = random.choice(subregion)
-
-        return new_pos
+        return subregions.random_cell(subregion_idx, self.random)
 
     ### Global functions ####    
 
@@ -253,17 +328,10 @@ class SolverModel:
         - current_pos: Tupla que representa la posición actual.
         - new_pos: Tupla que representa la nueva posición.
         """
-        if self.world.cells[new_pos[0]][new_pos[1]] == UNOCCUPIED:
-            # La casilla está desocupada, permite que el agente se mueva
-            self.world.cells[current_pos[0]][current_pos[1]] = UNOCCUPIED
-            self.world.cells[new_pos[0]][new_pos[1]] = agent
-            self.world.aindx_cpos[agent] = new_pos
-
-            # Actualiza aindx_goalreached si el agente alcanza una posición objetivo
-            if new_pos in self.goal_pos:
-                self.world.aindx_goalreached[agent] = True
-            else:
-                self.world.aindx_goalreached[agent] = False
+        if self.world.cells[new_pos[0], new_pos[1]] == UNOCCUPIED:
+            # La casilla está desocupada, permite que el agente se mueva.
+            # Actualiza también aindx_goalreached y la ocupación de los bloques de la figura
+            self.world.set_agent_pos(agent, new_pos)
         # else:
             # La casilla está ocupada, no permite que el agente se mueva
             # print(f"No se puede mover el agente {agent} a la casilla ocupada {new_pos}")
@@ -273,35 +341,97 @@ class SolverModel:
         Actualiza la visualización después de realizar los movimientos aleatorios.
         """
         if self.vis:
-            for agent in self.world.get_agents():
-                self.vis.update_agent_vis(agent)
+            self.vis.update_dirty_agents()
     
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--headless', action='store_true',
+                        help='Ejecuta la simulación sin interfaz gráfica (no importa tkinter ni hace pausas)')
+    parser.add_argument('--renderer', choices=['canvas', 'raster'], default='canvas',
+                        help='Renderizador de la visualización: un elemento por casilla (canvas) o una imagen por fotograma (raster)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Mide el tiempo de cada fase de solve_step y muestra un resumen al terminar')
+    parser.add_argument('--export', metavar='PATH',
+                        help='Exporta fotogramas de la simulación a un directorio (png, ppm, npy) o a un vídeo (mp4)')
+    parser.add_argument('--export-format', choices=['png', 'ppm', 'npy', 'mp4'], default='png',
+                        help='Formato de los fotogramas exportados')
+    parser.add_argument('--export-every', type=int, default=1, metavar='N',
+                        help='Exporta uno de cada N fotogramas')
+    parser.add_argument('--record', metavar='DIR',
+                        help='Graba las posiciones de los agentes y la figura de cada paso en un directorio')
+    parser.add_argument('--publish', metavar='NAME',
+                        help='Publica cada paso en memoria compartida para verlo con live_view.py NAME')
+    parser.add_argument('--early-stop', action='store_true',
+                        help='Termina la formación de la figura en cuanto converge (figura llena o estancada)')
+    parser.add_argument('--plateau', type=int, default=PLATEAU_STEPS, metavar='N',
+                        help='Con --early-stop, pasos sin mejora tras los que la formación se da por estancada')
+    parser.add_argument('--fps', type=float, default=1000 / TIME_RESET,
+                        help='Fotogramas por segundo de la ventana')
+    parser.add_argument('--steps-per-frame', type=int, default=1, metavar='N',
+                        help='Pasos de la simulación por fotograma')
+    parser.add_argument('--fast', action='store_true',
+                        help='Ejecuta tantos pasos como quepan en cada fotograma y omite las pausas (tecla f)')
+    parser.add_argument('--goal', metavar='PATH',
+                        help='Figura objetivo a cargar en lugar del cuadrado (.npy, .txt, .pbm/.pgm/.ppm u otra imagen con Pillow), centrada en el mundo')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Semilla del mundo para repetir exactamente una simulación')
+    args = parser.parse_args()
+
+    def capture():
+        """
+        Captura el paso actual si la exportación o la grabación están activas.
+        """
+        if exporter:
+            exporter.capture()
+        if recorder:
+            recorder.record()
+        if publisher:
+            publisher.publish()
+
+    def make_solver():
+        """
+        Crea el solver de la simulación con la instrumentación compartida si está activa.
+        La ventana se redibuja una vez por fotograma desde Runner, no en cada paso.
+        """
+        solver = SolverModel(world_grid)
+        if profiler:
+            # Solo el solver nuevo queda instrumentado; los anteriores ya no se usan.
+            profiler.detach()
+            solver.enable_profiling(profiler)
+        return solver
 
     def agents_translation(agents_to_move = NUM_AGENTS//4, iter = 25):
         # Mueve los agentes aleatoriamente después de 'iter' iteraciones
         if agents_inside > agents_to_move and iter_val == iter:
-            agents_to_move = random.sample(world_grid.get_agents_in_goal(), agents_to_move)
+            agents_to_move = world_grid.rng.choice(world_grid.get_agents_in_goal(), agents_to_move, replace=False).tolist()
             for agent in agents_to_move:
                 world_grid.move_agent_randomly(agent)
-                vis.update_agent_vis(agent, True)
+                if vis:
+                    # Se dibuja ya resaltado y se quita de los pendientes para que el siguiente
+                    # fotograma no lo vuelva a pintar con su color normal
+                    vis.update_agent_vis(agent, True)
+                    world_grid.dirty_agents.discard(agent)
 
     def agents_death(num_of_death = NUM_AGENTS//4, iter = 25):
         if iter_val == iter:
             # Eliminar algunos agentes
-            agents_to_remove = random.sample(world_grid.get_agents(), num_of_death)
+            agents_to_remove = world_grid.rng.choice(world_grid.get_agents(), num_of_death, replace=False).tolist()
             for agent in agents_to_remove:
                 world_grid.remove_agent(agent)
-                vis.remove_agent_vis(agent) 
+                if vis:
+                    vis.remove_agent_vis(agent)
 
     def check_goal_completion():
         """
         Verifica si todos los agentes han alcanzado una posición objetivo.
         Si es así, imprime un mensaje, cierra la ventana de visualización y termina la ejecución del programa.
         """
-        if all(world_grid.aindx_goalreached[agent] for agent in world_grid.get_agents()):
+        if world_grid.agents_outside == 0:
             print("¡Todos los agentes han alcanzado una posición objetivo!")
-            vis.frame.destroy()
+            if vis:
+                vis.frame.destroy()
             exit()
 
     def remove_agents_outside_shape():
@@ -316,186 +446,149 @@ if __name__ == "__main__":
         
         for agent in agents_outside:
             world_grid.remove_agent(agent)
-            vis.remove_agent_vis(agent) 
-        vis.canvas.update()
-        vis.canvas.after(TIME_RESET)
+            if vis:
+                vis.remove_agent_vis(agent)
+        capture()
+        yield
 
-    def move_goal_pos_left(num_iter):
+    def move_goal_pos(dy, dx, num_iter):
+        """
+        Desplaza la figura objetivo (dy, dx) casillas por iteración durante num_iter iteraciones.
+        La figura deja de moverse en cuanto toca el borde de la cuadrícula.
+        """
         iter_val = 0
         while iter_val != num_iter:
-            # If any cell of new_goal_positions is the border of the grid, then stop
-            if not any(x == 0 or x == WORLD_WIDTH - 1 or y == 0 or y == WORLD_WIDTH - 1 for x, y in world_grid.goal_pos):
-
-                new_goal_positions = [(gy, gx - 1) for (gy, gx) in world_grid.goal_pos]
-
-                world_grid.update_goal_pos(new_goal_positions)
-                vis.draw_world()
-                vis.draw_agents()
+            # If any cell of the goal is the border of the grid, then stop
+            if not world_grid.goal_touches_border():
+                world_grid.translate_goal(dy, dx)
 
-                vis.canvas.update()
-            
-            solver = SolverModel(world_grid, vis)
+            solver = make_solver()
             solver.solve_step()
 
-            agents_inside = 0
-
-            for agent in world_grid.get_agents():
-                if world_grid.aindx_goalreached[agent]:
-                    agents_inside += 1
+            agents_inside = world_grid.agents_inside
 
             print('- Iteración ', iter_val, '- Numero de agentes dentro de la forma: ', agents_inside)
-            vis.canvas.update()
-            vis.canvas.after(TIME_RESET)
+            capture()
+            yield
             iter_val += 1
 
-    def move_goal_pos_up(num_iter):
-        iter_val = 0
-        while iter_val != num_iter:
-            # If any cell of new_goal_positions is the border of the grid, then stop
-            if not any(x == 0 or x == WORLD_WIDTH - 1 or y == 0 or y == WORLD_WIDTH - 1 for x, y in world_grid.goal_pos):
-
-                new_goal_positions = [(gy - 1, gx) for (gy, gx) in world_grid.goal_pos]
-                world_grid.update_goal_pos(new_goal_positions)
-                vis.draw_world()
-                vis.draw_agents()
-
-                vis.canvas.update()
-            solver = SolverModel(world_grid, vis)
-            solver.solve_step()
-
-            agents_inside = 0
-
-            for agent in world_grid.get_agents():
-                if world_grid.aindx_goalreached[agent]:
-                    agents_inside += 1
+    def simulation():
+        """
+        Recorre las fases de la simulación como un generador que avanza un paso en cada next().
+        Cuando produce un número pide una pausa de ese número de segundos para poder observarla.
+        """
+        global agents_inside, iter_val
 
-            print('- Iteración ', iter_val, '- Numero de agentes dentro de la forma: ', agents_inside)
-            vis.canvas.update()
-            vis.canvas.after(TIME_RESET)
-            iter_val += 1
+        solver = make_solver()
+        detector = ConvergenceDetector(world_grid, plateau_steps=args.plateau) if args.early_stop else None
 
-    def move_goal_pos_right(num_iter):
         iter_val = 0
-        while iter_val != num_iter:
-            # If any cell of new_goal_positions is the border of the grid, then stop
-            if not any(x == 0 or x == WORLD_WIDTH - 1 or y == 0 or y == WORLD_WIDTH - 1 for x, y in world_grid.goal_pos):
-
-                new_goal_positions = [(gy, gx + 1) for (gy, gx) in world_grid.goal_pos]
 
-                world_grid.update_goal_pos(new_goal_positions)
-                vis.draw_world()
-                vis.draw_agents()
-
-                vis.canvas.update()
-            
-            solver = SolverModel(world_grid, vis)
+        while (iter_val != NUM_ITERATIONS):
+            '''
+            First iterations to form the shape
+            '''
             solver.solve_step()
 
-            agents_inside = 0
-
-            for agent in world_grid.get_agents():
-                if world_grid.aindx_goalreached[agent]:
-                    agents_inside += 1
-
+            agents_inside = world_grid.agents_inside
+            
+            # Funciones que modifican el comportamiento de los agentes, descomentar para probar
+            agents_translation()
+            #agents_death()
+            
             print('- Iteración ', iter_val, '- Numero de agentes dentro de la forma: ', agents_inside)
-            vis.canvas.update()
-            vis.canvas.after(TIME_RESET)
+            capture()
+            yield 2 if iter_val == 25 else None
+
             iter_val += 1
-    
-    def move_goal_pos_down(num_iter):
-        iter_val = 0
-        while iter_val != num_iter:
-            # If any cell of new_goal_positions is the border of the grid, then stop
-            if not any(x == 0 or x == WORLD_WIDTH - 1 or y == 0 or y == WORLD_WIDTH - 1 for x, y in world_grid.goal_pos):
+            if detector and detector.update():
+                print("La formación ha convergido (", detector.reason, ") en ", iter_val, " iteraciones.")
+                break
+        
+        print("Se terminó el movimiento de los agentes. Han terminado: ", agents_inside , "agentes dentro de la figura de ", NUM_AGENTS, " agentes iniciales.")
 
-                new_goal_positions = [(gy + 1, gx) for (gy, gx) in world_grid.goal_pos]
-                world_grid.update_goal_pos(new_goal_positions)
-                vis.draw_world()
-                vis.draw_agents()
+        # Eliminamos todos los agentes fuera de la figura 
+        yield from remove_agents_outside_shape()
+        print("Se han eliminado", NUM_AGENTS - len(world_grid.get_agents()) ,"agentes que estaban fuera de la figura.")
+        
+        # Movemos la figura alrededor del mapa
+        yield from move_goal_pos(0, -1, WORLD_WIDTH//4 - 1)
+        print("Se alcanzaron ", WORLD_WIDTH//4 - 1, " iteraciones. Moviendo la figura hacia arriba.")
+        yield 0.1
+        yield from move_goal_pos(-1, 0, WORLD_HEIGHT//4 - 1)
+        print("Se alcanzaron ", WORLD_WIDTH//2 - 2, " iteraciones. Moviendo la figura hacia la derecha.")
+        yield 0.1
+        yield from move_goal_pos(0, 1, WORLD_WIDTH//2 - 2)
+        print("Se alcanzaron ", WORLD_WIDTH//2 - 2, " iteraciones. Moviendo la figura hacia abajo.")
+        yield 0.1
+        yield from move_goal_pos(1, 0, WORLD_HEIGHT//2 - 2)
+        print("Se alcanzaron ", WORLD_HEIGHT//2 - 2, " iteraciones. Moviendo la figura hacia la izquierda.")
+        yield 0.1
+        yield from move_goal_pos(0, -1, WORLD_WIDTH//4 - 1)
+        print("Se alcanzaron ", WORLD_WIDTH//4 - 1, " iteraciones. Moviendo la figura hacia arriba.")
+        yield 0.1
+        yield from move_goal_pos(-1, 0, WORLD_HEIGHT//4 - 1)
+        
+        agents_inside = world_grid.agents_inside
+        print("Se terminó el movimiento de la figura. Han terminado: ", agents_inside , "agentes dentro de la figura de ", NUM_AGENTS, " agentes iniciales. (", round(agents_inside/NUM_AGENTS*100,2), "%")
+        if exporter:
+            exporter.close()
+        if recorder:
+            recorder.close()
+        if publisher:
+            publisher.close()
+        if profiler:
+            print(profiler.format_summary())
+        yield 5
+
+    world_grid = world.GridWorld(WORLD_WIDTH, WORLD_HEIGHT, seed=args.seed)
+    world_grid.add_agents_rand(NUM_AGENTS)
+    if args.goal:
+        from shapes import load_goal
 
-                vis.canvas.update()
-            solver = SolverModel(world_grid, vis)
-            solver.solve_step()
+        world_grid.add_goal_pos(load_goal(args.goal).centered(WORLD_HEIGHT, WORLD_WIDTH))
+    else:
+        world_grid.add_goal_pos(GOAL)
 
-            agents_inside = 0
+    profiler = None
+    if args.profile:
+        from profiling import SolverProfiler
 
-            for agent in world_grid.get_agents():
-                if world_grid.aindx_goalreached[agent]:
-                    agents_inside += 1
+        profiler = SolverProfiler()
 
-            print('- Iteración ', iter_val, '- Numero de agentes dentro de la forma: ', agents_inside)
-            vis.canvas.update()
-            vis.canvas.after(TIME_RESET)
-            iter_val += 1
+    exporter = None
+    if args.export:
+        from export import FrameExporter
 
-    world_grid = world.GridWorld(WORLD_WIDTH, WORLD_HEIGHT)
-    world_grid.add_agents_rand(NUM_AGENTS)
-    world_grid.add_goal_pos(GOAL)
+        exporter = FrameExporter(world_grid, args.export, args.export_format, args.export_every, scale=10)
 
-    vis = Visualize(world_grid)
+    recorder = None
+    if args.record:
+        from trajectory import TrajectoryRecorder
 
-    vis.draw_world()
-    vis.draw_agents()
+        recorder = TrajectoryRecorder(world_grid, args.record)
 
-    vis.canvas.pack()
-    vis.canvas.update()
-    vis.canvas.after(100)
-    
-    solver = SolverModel(world_grid, vis)
+    publisher = None
+    if args.publish:
+        from live_view import WorldPublisher
 
-    iter_val = 0
+        publisher = WorldPublisher(world_grid, args.publish)
+        print('Publicando en', publisher.name)
 
-    while (iter_val != NUM_ITERATIONS):
-        '''
-        First iterations to form the shape
-        '''
-        solver.solve_step()
+    vis = None
+    if args.headless:
+        # Sin interfaz no se hacen pausas
+        for _ in simulation():
+            pass
+    else:
+        # La visualización se importa solo cuando se usa para no cargar tkinter en modo sin interfaz
+        from visualize import create_visualize
+        from runner import Runner
 
-        agents_inside = 0
-        
-        for agent in world_grid.get_agents():
-            if (world_grid.aindx_goalreached[agent]):
-                agents_inside += 1
-        
-        # Funciones que modifican el comportamiento de los agentes, descomentar para probar
-        agents_translation()
-        #agents_death()
-        
-        print('- Iteración ', iter_val, '- Numero de agentes dentro de la forma: ', agents_inside)
-        vis.canvas.update()
-        if iter_val == 25:
-            time.sleep(2)
-        vis.canvas.after(TIME_RESET)
+        vis = create_visualize(world_grid, args.renderer)
 
-        iter_val += 1
-    
-    print("Se terminó el movimiento de los agentes. Han terminado: ", agents_inside , "agentes dentro de la figura de ", NUM_AGENTS, " agentes iniciales.")
+        vis.draw_world()
+        vis.draw_agents()
 
-    # Eliminamos todos los agentes fuera de la figura 
-    remove_agents_outside_shape()
-    print("Se han eliminado", NUM_AGENTS - len(world_grid.get_agents()) ,"agentes que estaban fuera de la figura.")
-    
-    # Movemos la figura alrededor del mapa
-    move_goal_pos_left(WORLD_WIDTH//4 - 1)
-    print("Se alcanzaron ", WORLD_WIDTH//4 - 1, " iteraciones. Moviendo la figura hacia arriba.")
-    time.sleep(0.1)
-    move_goal_pos_up(WORLD_HEIGHT//4 - 1)
-    print("Se alcanzaron ", WORLD_WIDTH//2 - 2, " iteraciones. Moviendo la figura hacia la derecha.")
-    time.sleep(0.1)
-    move_goal_pos_right(WORLD_WIDTH//2 - 2)
-    print("Se alcanzaron ", WORLD_WIDTH//2 - 2, " iteraciones. Moviendo la figura hacia abajo.")
-    time.sleep(0.1)
-    move_goal_pos_down(WORLD_HEIGHT//2 - 2)
-    print("Se alcanzaron ", WORLD_HEIGHT//2 - 2, " iteraciones. Moviendo la figura hacia la izquierda.")
-    time.sleep(0.1)
-    move_goal_pos_left(WORLD_WIDTH//4 - 1)
-    print("Se alcanzaron ", WORLD_WIDTH//4 - 1, " iteraciones. Moviendo la figura hacia arriba.")
-    time.sleep(0.1)
-    move_goal_pos_up(WORLD_HEIGHT//4 - 1)
-    
-    agents_inside = 0
-    for agent in world_grid.get_agents():
-        if (world_grid.aindx_goalreached[agent]):
-            agents_inside += 1
-    print("Se terminó el movimiento de la figura. Han terminado: ", agents_inside , "agentes dentro de la figura de ", NUM_AGENTS, " agentes iniciales. (", round(agents_inside/NUM_AGENTS*100,2), "%")
-    time.sleep(5)
\ No newline at end of file
+        vis.canvas.pack()
+        Runner(vis, simulation(), args.steps_per_frame, args.fps, args.fast, on_finish=vis.frame.destroy).start()
@@ -0,0 +1,123 @@
+import numpy as np
+
+#### CONSTANTS ####
+
+TILE_SIZE = 32                    # Lado en casillas de cada bloque de la cuadrícula dispersa.
+
+class SparseCells:
+    def __init__(self, h, w, dtype=np.uint8, tile_size=TILE_SIZE):
+        """
+        Cuadrícula dispersa por bloques que sustituye a la matriz densa de GridWorld en mundos muy
+        grandes y poco poblados. Solo se reservan los bloques de tile_size x tile_size casillas que
+        contienen algún valor distinto de cero y se liberan en cuanto vuelven a quedar vacíos, así
+        que la memoria depende de la ocupación y no del área.
+        Se indexa como una matriz de NumPy con cells[y, x], con envolvimiento en ambos ejes. La
+        lectura acepta también arreglos de índices.
+
+        Parameters:
+        - h (int): Altura de la cuadrícula.
+        - w (int): Ancho de la cuadrícula.
+        - dtype: Tipo de los valores.
+        - tile_size (int): Lado de cada bloque.
+        """
+        self.shape = (h, w)
+        self.dtype = np.dtype(dtype)
+        self.tile_size = tile_size
+        self.tiles = dict()               # Bloques reservados por coordenadas de bloque (ty, tx).
+        self.counts = dict()              # Casillas distintas de cero de cada bloque.
+        self.zero = self.dtype.type(0)
+
+    def __getitem__(self, key):
+        y, x = key
+        if isinstance(y, np.ndarray) or isinstance(x, np.ndarray):
+            return self.take(y, x)
+        h, w = self.shape
+        t = self.tile_size
+        y %= h
+        x %= w
+        tile = self.tiles.get((y // t, x // t))
+        if tile is None:
+            return self.zero
+        return tile[y % t, x % t]
+
+    def __setitem__(self, key, value):
+        h, w = self.shape
+        t = self.tile_size
+        y, x = key[0] % h, key[1] % w
+        tkey = (y // t, x // t)
+        tile = self.tiles.get(tkey)
+        if tile is None:
+            if not value:
+                return
+            tile = self.tiles[tkey] = np.zeros((t, t), dtype=self.dtype)
+            self.counts[tkey] = 0
+        iy, ix = y % t, x % t
+        old = tile[iy, ix]
+        tile[iy, ix] = value
+        if bool(old) != bool(value):
+            self.counts[tkey] += 1 if value else -1
+            if not self.counts[tkey]:
+                del self.tiles[tkey]
+                del self.counts[tkey]
+
+    def take(self, ys, xs):
+        """
+        Lee los valores de varias casillas agrupando los accesos por bloque.
+
+        Parameters:
+        - ys (np.ndarray): Filas de las casillas.
+        - xs (np.ndarray): Columnas de las casillas.
+
+        Returns:
+        - np.ndarray: Valores de las casillas.
+        """
+        h, w = self.shape
+        t = self.tile_size
+        ys, xs = np.broadcast_arrays(np.asarray(ys) % h, np.asarray(xs) % w)
+        out = np.zeros(ys.shape, dtype=self.dtype)
+        ys, xs, flat = ys.ravel(), xs.ravel(), out.reshape(-1)
+        keys = (ys // t) * (w // t + 1) + xs // t
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        bounds = np.flatnonzero(np.diff(sorted_keys)) + 1
+        for group in np.split(order, bounds):
+            if not len(group):
+                continue
+            tile = self.tiles.get((int(ys[group[0]]) // t, int(xs[group[0]]) // t))
+            if tile is not None:
+                flat[group] = tile[ys[group] % t, xs[group] % t]
+        return out
+
+    def fill(self, value):
+        """
+        Asigna el mismo valor a todas las casillas. Solo se admite 0, que libera todos los bloques.
+
+        Parameters:
+        - value: Valor a asignar.
+        """
+        if value:
+            raise ValueError('A sparse grid can only be filled with zero')
+        self.tiles = dict()
+        self.counts = dict()
+
+    def astype(self, dtype):
+        """
+        Obtiene una copia de la cuadrícula con otro tipo de valores.
+
+        Parameters:
+        - dtype: Nuevo tipo.
+
+        Returns:
+        - SparseCells: Copia convertida.
+        """
+        copy = SparseCells(self.shape[0], self.shape[1], dtype, self.tile_size)
+        copy.tiles = {tkey: tile.astype(dtype) for tkey, tile in self.tiles.items()}
+        copy.counts = dict(self.counts)
+        return copy
+
+    @property
+    def nbytes(self):
+        """
+        Memoria ocupada por los bloques reservados, en bytes.
+        """
+        return sum(tile.nbytes for tile in self.tiles.values())
@@ -0,0 +1,157 @@
+import argparse
+import contextlib
+import csv
+import io
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import gworld as world
+from solver_model import SolverModel, square_goal, NUM_ITERATIONS
+from vector_solver import VectorSolverModel
+from convergence import ConvergenceDetector
+
+#### CONSTANTS ####
+
+ENGINES = ['sequential', 'vector']
+RESULT_FIELDS = ['world_size', 'num_agents', 'probability', 'square_size', 'engine', 'seed', 'iterations',
+                 'goal_cells', 'agents_inside', 'iterations_to_fill', 'iterations_run', 'stop_reason', 'elapsed',
+                 'inside_per_iteration']
+
+def parameter_grid(**params):
+    """
+    Construye todas las combinaciones de parámetros.
+
+    Parameters:
+    - params: Listas de valores por nombre de parámetro.
+
+    Returns:
+    - list: Lista de diccionarios con una combinación de parámetros cada uno.
+    """
+    names = list(params)
+    return [dict(zip(names, values)) for values in itertools.product(*params.values())]
+
+def run_simulation(world_size=21, num_agents=120, probability=0.8, square_size=10, engine='sequential',
+                   seed=0, iterations=NUM_ITERATIONS, early_stop=False, plateau=None):
+    """
+    Ejecuta una simulación sin interfaz gráfica y recoge sus métricas de convergencia.
+
+    Parameters:
+    - world_size (int): Lado del mundo cuadrado.
+    - num_agents (int): Número de agentes.
+    - probability (float): Probabilidad de moverse hacia la figura objetivo.
+    - square_size (int): Tamaño del cuadrado objetivo centrado.
+    - engine (str): 'sequential' (SolverModel) o 'vector' (VectorSolverModel).
+    - seed (int): Semilla de la simulación.
+    - iterations (int): Número máximo de iteraciones.
+    - early_stop (bool): Si es True la simulación termina en cuanto la figura se llena.
+    - plateau (int): Con early_stop, termina también si en este número de iteraciones no mejora el
+      número de agentes dentro de la figura.
+
+    Returns:
+    - dict: Fila de resultados con los parámetros y las métricas de la simulación.
+    """
+    world_grid = world.GridWorld(world_size, world_size, seed=seed)
+    goal = square_goal(world_size // 2, world_size // 2, square_size)
+    # GridWorld imprime las posiciones iniciales y objetivo, no interesan en un barrido
+    with contextlib.redirect_stdout(io.StringIO()):
+        world_grid.add_agents_rand(num_agents)
+        world_grid.add_goal_pos(goal)
+
+    if engine == 'vector':
+        solver = VectorSolverModel(world_grid, probability=probability, seed=seed)
+    else:
+        solver = SolverModel(world_grid, probability=probability)
+    detector = ConvergenceDetector(world_grid, plateau_steps=plateau) if early_stop else None
+
+    capacity = min(num_agents, len(goal))
+    inside_per_iteration = []
+    iterations_to_fill = None
+    start = time.perf_counter()
+    for iter_val in range(iterations):
+        solver.solve_step()
+        agents_inside = world_grid.agents_inside
+        inside_per_iteration.append(agents_inside)
+        if iterations_to_fill is None and agents_inside >= capacity:
+            iterations_to_fill = iter_val + 1
+        if detector and detector.update():
+            break
+    elapsed = time.perf_counter() - start
+
+    return {
+        'world_size': world_size,
+        'num_agents': num_agents,
+        'probability': probability,
+        'square_size': square_size,
+        'engine': engine,
+        'seed': seed,
+        'iterations': iterations,
+        'goal_cells': len(goal),
+        'agents_inside': inside_per_iteration[-1] if inside_per_iteration else 0,
+        'iterations_to_fill': iterations_to_fill,
+        'iterations_run': len(inside_per_iteration),
+        'stop_reason': detector.reason if detector else None,
+        'elapsed': round(elapsed, 6),
+        'inside_per_iteration': ' '.join(map(str, inside_per_iteration)),
+    }
+
+def _run_params(params):
+    return run_simulation(**params)
+
+def run_sweep(grid, seeds, workers=None):
+    """
+    Ejecuta un barrido de parámetros en un grupo de procesos, una simulación por tarea.
+
+    Parameters:
+    - grid (list): Lista de diccionarios de parámetros (ver parameter_grid).
+    - seeds (list): Semillas con las que se repite cada combinación.
+    - workers (int): Número de procesos. Por defecto uno por núcleo.
+
+    Returns:
+    - list: Filas de resultados en el mismo orden que las combinaciones.
+    """
+    tasks = [dict(params, seed=seed) for params in grid for seed in seeds]
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        return [_run_params(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(tasks) // (workers * 4))
+        return list(executor.map(_run_params, tasks, chunksize=chunksize))
+
+def write_results(rows, path):
+    """
+    Escribe las filas de resultados en un fichero CSV.
+
+    Parameters:
+    - rows (list): Filas de resultados de run_sweep.
+    - path (str): Ruta del fichero CSV.
+    """
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Barrido de parámetros de la simulación sin interfaz gráfica')
+    parser.add_argument('--world-size', type=int, nargs='+', default=[21])
+    parser.add_argument('--agents', type=int, nargs='+', default=[120])
+    parser.add_argument('--probability', type=float, nargs='+', default=[0.8])
+    parser.add_argument('--square-size', type=int, nargs='+', default=[10])
+    parser.add_argument('--engine', choices=ENGINES, nargs='+', default=['sequential'])
+    parser.add_argument('--seeds', type=int, default=10, help='Número de semillas por combinación')
+    parser.add_argument('--iterations', type=int, default=NUM_ITERATIONS)
+    parser.add_argument('--early-stop', action='store_true',
+                        help='Termina cada simulación en cuanto la figura se llena')
+    parser.add_argument('--plateau', type=int, default=None, metavar='N',
+                        help='Con --early-stop, termina también tras N iteraciones sin mejora')
+    parser.add_argument('--workers', type=int, default=None, help='Número de procesos (por defecto uno por núcleo)')
+    parser.add_argument('--out', default='sweep_results.csv')
+    args = parser.parse_args()
+
+    grid = parameter_grid(world_size=args.world_size, num_agents=args.agents, probability=args.probability,
+                          square_size=args.square_size, engine=args.engine, iterations=[args.iterations],
+                          early_stop=[args.early_stop], plateau=[args.plateau])
+    start = time.perf_counter()
+    rows = run_sweep(grid, range(args.seeds), args.workers)
+    write_results(rows, args.out)
+    print('Se completaron', len(rows), 'simulaciones en', round(time.perf_counter() - start, 2), 's. Resultados en', args.out)
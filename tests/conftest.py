@@ -0,0 +1,41 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+import gworld as world
+from macros import *
+from solver_model import square_goal
+
+@pytest.fixture
+def make_world():
+    """
+    Crea mundos pequeños con agentes en casillas aleatorias y un cuadrado objetivo centrado.
+    """
+    def make(h=30, w=30, nagents=200, goal_size=9, seed=1, sparse=False):
+        grid = world.GridWorld(h, w, sparse=sparse, seed=seed)
+        grid.add_agents_rand(nagents)
+        grid.add_goal_pos(square_goal(h // 2, w // 2, goal_size))
+        return grid
+    return make
+
+@pytest.fixture
+def check_world():
+    """
+    Comprueba que las celdas, el almacén de agentes, el estado objetivo y agents_inside coinciden.
+    """
+    def check(grid):
+        store = grid.agents
+        ids = store.ids()
+        positions = list(zip(store.pos_y[ids].tolist(), store.pos_x[ids].tolist()))
+        assert len(set(positions)) == len(ids)
+        for agent, (y, x) in zip(ids.tolist(), positions):
+            assert grid.cells[y, x] == agent
+            assert bool(store.goal[agent]) == ((y, x) in grid.goal_set)
+        if grid.dense:
+            assert np.count_nonzero(grid.cells) == len(ids)
+        assert grid.agents_inside == int(np.count_nonzero(store.goal[ids]))
+        assert len(store) == len(ids)
+    return check
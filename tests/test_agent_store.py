@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+from agent_store import AgentStore
+
+def test_removed_ids_are_recycled():
+    store = AgentStore(capacity=2)
+    agents = [store.add((i, i)) for i in range(5)]
+    assert agents == [1, 2, 3, 4, 5]
+    store.remove(2)
+    store.remove(4)
+    assert store.add((9, 9)) == 4
+    assert store.add((8, 8)) == 2
+    assert store.add((7, 7)) == 6
+    assert len(store) == 6
+    assert store.ids().tolist() == [1, 2, 3, 4, 5, 6]
+    with pytest.raises(KeyError):
+        store.remove(0)
+
+def test_add_many_reuses_free_ids_first():
+    store = AgentStore(capacity=1)
+    for i in range(4):
+        store.add((0, i))
+    store.remove(3)
+    agents = store.add_many(np.array([5, 6, 7]), np.array([1, 2, 3]), np.array([True, False, True]))
+    assert agents.tolist() == [3, 5, 6]
+    assert store.pos_y[agents].tolist() == [5, 6, 7]
+    assert store.goal[agents].tolist() == [True, False, True]
+    assert len(store) == 6 and store.max_id() == 6
+
+def test_views_match_store(make_world):
+    grid = make_world(nagents=50)
+    ids = grid.get_agents()
+    assert list(grid.aindx_cpos) == ids
+    assert dict(grid.aindx_cpos.items()) == {a: grid.aindx_cpos[a] for a in ids}
+    assert sum(grid.aindx_goalreached.values()) == grid.agents_inside
+    grid.remove_agent(ids[0])
+    assert ids[0] not in grid.aindx_cpos and ids[0] not in grid.aindx_goalreached
+
+def test_view_deletes_and_moves_go_through_the_world(make_world, check_world):
+    grid = make_world(nagents=80)
+    inside = grid.get_agents_in_goal()[0]
+    outside = next(a for a in grid.get_agents() if not grid.aindx_goalreached[a])
+    pos = grid.aindx_cpos[inside]
+    del grid.aindx_cpos[inside]
+    assert grid.cells[pos] == 0 and inside in grid.dirty_agents
+    del grid.aindx_goalreached[outside]
+    check_world(grid)
+    with pytest.raises(KeyError):
+        del grid.aindx_cpos[inside]
+
+    agent = grid.get_agents()[0]
+    free = next(p for p in grid.goal_pos if grid.passable(p))
+    grid.aindx_cpos[agent] = free
+    assert grid.cells[free] == agent and grid.aindx_goalreached[agent]
+    check_world(grid)
+
+def test_goal_view_writes_keep_counters(make_world, check_world):
+    grid = make_world(nagents=80)
+    agent = grid.get_agents_in_goal()[0]
+    grid.pop_dirty_agents()
+    inside = grid.agents_inside
+    grid.aindx_goalreached[agent] = False
+    assert grid.agents_inside == inside - 1
+    assert agent in grid.dirty_agents
+    grid.aindx_goalreached[agent] = True
+    assert grid.agents_inside == inside
+    check_world(grid)
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from checkpoint import save_snapshot, load_snapshot, read_snapshot
+from solver_model import SolverModel
+from vector_solver import VectorSolverModel
+
+def run(solver, steps):
+    for _ in range(steps):
+        solver.solve_step()
+
+@pytest.mark.parametrize('solver_class', [SolverModel, VectorSolverModel])
+def test_round_trip_resumes_identically(tmp_path, make_world, check_world, solver_class):
+    grid = make_world(nagents=200)
+    solver = solver_class(grid)
+    run(solver, 5)
+    grid.remove_agent(grid.get_agents()[3])
+    grid.translate_goal(0, 25)
+    if solver_class is VectorSolverModel:
+        solver.load_from_world()
+    path = str(tmp_path / 'world.snap')
+    save_snapshot(path, grid, solver)
+
+    loaded, loaded_solver = load_snapshot(path, solver_class)
+    check_world(loaded)
+    assert (loaded.cells == grid.cells).all()
+    assert loaded.goal_pos == grid.goal_pos and loaded.goal_origin == grid.goal_origin
+    assert loaded.agents.free_ids == grid.agents.free_ids
+    assert loaded.agents_inside == grid.agents_inside
+
+    run(solver, 10)
+    run(loaded_solver, 10)
+    assert (loaded.cells == grid.cells).all()
+    assert loaded.get_agents() == grid.get_agents()
+
+def test_loaded_world_does_not_write_back(tmp_path, make_world):
+    grid = make_world(nagents=100)
+    path = str(tmp_path / 'world.snap')
+    save_snapshot(path, grid)
+    saved = np.array(read_snapshot(path)[1]['cells'])
+
+    loaded, solver = load_snapshot(path, VectorSolverModel)
+    run(solver, 5)
+    assert not (loaded.cells == saved).all()
+    assert (np.array(read_snapshot(path)[1]['cells']) == saved).all()
+
+    # Se puede guardar sobre el mismo fichero del que se cargó el mundo
+    save_snapshot(path, loaded)
+    cells = loaded.cells.copy()
+    run(solver, 5)
+    assert (load_snapshot(path).cells == cells).all()
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.snap'
+    path.write_bytes(b'not a snapshot')
+    with pytest.raises(ValueError):
+        read_snapshot(str(path))
+
+def test_sparse_world_rejected(tmp_path, make_world):
+    with pytest.raises(ValueError):
+        save_snapshot(str(tmp_path / 'world.snap'), make_world(sparse=True, nagents=5))
+
+def test_restores_distance_field_and_solver_settings(tmp_path, make_world):
+    grid = make_world(nagents=100)
+    solver = VectorSolverModel(grid, probability=0.6, seed=4, use_distance_field=True)
+    field = grid.get_distance_field().copy()
+    path = str(tmp_path / 'world.snap')
+    save_snapshot(path, grid, solver)
+
+    loaded, loaded_solver = load_snapshot(path, VectorSolverModel)
+    assert loaded.distance_field_version == loaded.goal_version
+    assert (loaded.get_distance_field() == field).all()
+    assert loaded_solver.probability == 0.6 and loaded_solver.use_distance_field
+    assert loaded_solver.rng.random() == solver.rng.random()
+
+def test_random_state_is_optional(tmp_path, make_world):
+    grid = make_world(nagents=50)
+    path = str(tmp_path / 'world.snap')
+    save_snapshot(path, grid)
+    expected = [grid.stream.random() for _ in range(10)]
+    restored = load_snapshot(path)
+    assert [restored.stream.random() for _ in range(10)] == expected
+    fresh = load_snapshot(path, restore_random=False)
+    assert [fresh.stream.random() for _ in range(10)] != expected
@@ -0,0 +1,32 @@
+from macros import UNOCCUPIED
+from convergence import ConvergenceDetector
+
+def test_full_goal_stops_the_run(make_world):
+    grid = make_world(nagents=0, goal_size=3)
+    grid.add_agents(grid.goal_pos[:4])
+    detector = ConvergenceDetector(grid)
+    assert detector.update() and detector.reason == 'full'
+    assert not ConvergenceDetector(grid, full_fill=False, plateau_steps=None).update()
+
+def test_empty_world_is_not_full(make_world):
+    grid = make_world(nagents=0)
+    detector = ConvergenceDetector(grid, plateau_steps=None)
+    assert not detector.update() and detector.reason is None
+
+def test_plateau_after_steps_without_gain(make_world):
+    grid = make_world(nagents=20)
+    detector = ConvergenceDetector(grid, plateau_steps=5)
+    assert [detector.update() for _ in range(5)] == [False] * 4 + [True]
+    assert detector.reason == 'plateau'
+
+def test_gain_resets_the_plateau(make_world):
+    grid = make_world(nagents=20)
+    detector = ConvergenceDetector(grid, plateau_steps=3, min_gain=1)
+    detector.update()
+    detector.update()
+    agent = next(a for a in grid.get_agents() if not grid.aindx_goalreached[a])
+    free = next(pos for pos in grid.goal_pos if grid.cells[pos] == UNOCCUPIED)
+    grid.set_agent_pos(agent, free)
+    assert not detector.update()
+    assert detector.best_step == 3
+    assert [detector.update() for _ in range(3)] == [False, False, True]
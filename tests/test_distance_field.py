@@ -0,0 +1,69 @@
+from collections import deque
+import numpy as np
+import pytest
+from distance_field import toroidal_distance_field
+from solver_model import SolverModel
+
+def bfs_distances(goal_mask):
+    h, w = goal_mask.shape
+    dist = np.full((h, w), h + w, dtype=np.int32)
+    queue = deque()
+    for y, x in zip(*np.nonzero(goal_mask)):
+        dist[y, x] = 0
+        queue.append((y, x))
+    while queue:
+        y, x = queue.popleft()
+        for ny, nx in (((y - 1) % h, x), ((y + 1) % h, x), (y, (x - 1) % w), (y, (x + 1) % w)):
+            if dist[ny, nx] > dist[y, x] + 1:
+                dist[ny, nx] = dist[y, x] + 1
+                queue.append((ny, nx))
+    return dist
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_bfs(seed):
+    rng = np.random.default_rng(seed)
+    h, w = rng.integers(3, 25, size=2)
+    goal_mask = rng.random((h, w)) < rng.choice([0.01, 0.05, 0.3])
+    assert (toroidal_distance_field(goal_mask) == bfs_distances(goal_mask)).all()
+
+def test_wraps_around_the_edges():
+    goal_mask = np.zeros((10, 12), dtype=bool)
+    goal_mask[0, 0] = True
+    field = toroidal_distance_field(goal_mask)
+    assert field[9, 11] == 2
+    assert field[5, 6] == 11
+
+def test_empty_goal():
+    field = toroidal_distance_field(np.zeros((4, 5), dtype=bool))
+    assert (field == 9).all()
+
+def test_field_targets_free_goal_cells(make_world):
+    grid = make_world(nagents=100)
+    free_goal = grid.goal_mask & (grid.cells == 0)
+    assert (grid.get_distance_field() == bfs_distances(free_goal)).all()
+
+def test_translated_field_is_shifted(make_world):
+    grid = make_world(nagents=0)
+    field = grid.get_distance_field().copy()
+    for _ in range(20):
+        grid.translate_goal(1, -1)
+    shifted, shift = grid.get_shifted_distance_field()
+    assert shifted is grid.distance_field and shift == (20, grid.w - 20)
+    assert (grid.get_distance_field() == np.roll(field, (20, -20), axis=(0, 1))).all()
+    assert (grid.get_distance_field() == bfs_distances(grid.goal_mask)).all()
+
+def test_descent_reduces_distance(make_world):
+    grid = make_world(nagents=40, goal_size=5)
+    grid.translate_goal(3, 4)
+    solver = SolverModel(grid)
+    field = grid.get_distance_field()
+    for agent in [a for a in grid.get_agents() if not grid.aindx_goalreached[a]]:
+        pos = grid.aindx_cpos[agent]
+        new_pos = solver.descend_distance_field(pos)
+        if grid.passable(new_pos) and field[new_pos] < field[pos]:
+            continue
+        # Solo se rodea el bloqueo si todos los vecinos más cercanos están ocupados
+        y, x = pos
+        closer = [n for n in (((y - 1) % grid.h, x), ((y + 1) % grid.h, x), (y, (x - 1) % grid.w),
+                              (y, (x + 1) % grid.w)) if field[n] < field[pos]]
+        assert not any(grid.passable(n) for n in closer)
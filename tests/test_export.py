@@ -0,0 +1,28 @@
+import os
+import numpy as np
+import gworld as world
+from export import FrameExporter, BATCH_BYTES
+from raster import render_frame
+
+def test_per_frame_formats_use_a_single_frame_buffer(tmp_path, make_world):
+    grid = make_world(nagents=40)
+    exporter = FrameExporter(grid, str(tmp_path), 'ppm', every=2)
+    assert exporter.batch.shape[0] == 1
+    for _ in range(5):
+        exporter.capture()
+    exporter.close()
+    assert sorted(os.listdir(tmp_path)) == ['frame_000000.ppm', 'frame_000002.ppm', 'frame_000004.ppm']
+
+def test_batched_buffer_respects_byte_budget(tmp_path):
+    grid = world.GridWorld(600, 600)
+    exporter = FrameExporter(grid, str(tmp_path), 'npy')
+    assert 1 <= exporter.batch.shape[0] and exporter.batch.nbytes <= BATCH_BYTES
+
+def test_in_memory_frames_match_render(make_world):
+    grid = make_world(nagents=40)
+    exporter = FrameExporter(grid, batch_size=2)
+    for _ in range(3):
+        exporter.capture()
+    frames = exporter.frames()
+    assert frames.shape == (3, grid.h, grid.w, 3)
+    assert (frames[-1] == render_frame(grid.cells, grid.goal_mask)).all()
@@ -0,0 +1,38 @@
+import numpy as np
+from macros import *
+from solver_model import SolverModel
+
+def brute_tile_counts(grid):
+    tiles = grid.get_goal_tiles()
+    return np.array([sum(grid.cells[pos] != UNOCCUPIED for pos in tile) for tile in tiles.subregions])
+
+def test_tile_counters_follow_sequential_moves(make_world, check_world):
+    grid = make_world(nagents=250, goal_size=11)
+    solver = SolverModel(grid)
+    for step in range(15):
+        solver.solve_step()
+        # Los contadores se actualizan movimiento a movimiento, sin refrescar la tabla
+        assert (grid.goal_tiles.counts == brute_tile_counts(grid)).all()
+        if step % 5 == 4:
+            grid.translate_goal(0, 1)
+    check_world(grid)
+
+def test_counters_follow_removals_and_additions(make_world, check_world):
+    grid = make_world(nagents=150)
+    tiles = grid.get_goal_tiles()
+    inside = grid.get_agents_in_goal()
+    grid.remove_agent(inside[0])
+    free = [pos for pos in grid.goal_pos if grid.passable(pos)]
+    grid.add_agents(free[:3])
+    assert grid.get_goal_tiles() is tiles
+    assert (tiles.counts == brute_tile_counts(grid)).all()
+    check_world(grid)
+
+def test_agents_inside_matches_recount(make_world):
+    grid = make_world(nagents=300)
+    solver = SolverModel(grid)
+    for _ in range(10):
+        solver.solve_step()
+    inside = grid.agents_inside
+    grid.recount_agents_inside()
+    assert grid.agents_inside == inside == len(grid.get_agents_in_goal())
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from shapes import summed_area_table, rect_sums
+from solver_model import SolverModel
+
+def random_rects(rng, h, w, n):
+    y = np.sort(rng.integers(0, h + 1, size=(n, 2)), axis=1)
+    x = np.sort(rng.integers(0, w + 1, size=(n, 2)), axis=1)
+    return np.stack([y[:, 0], x[:, 0], y[:, 1], x[:, 1]], axis=1)
+
+@pytest.mark.parametrize('seed', range(3))
+def test_rect_sums_match_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    grid = rng.integers(0, 5, size=tuple(rng.integers(1, 30, size=2)))
+    table = summed_area_table(grid)
+    rects = random_rects(rng, *grid.shape, 200)
+    expected = [grid[y0:y1, x0:x1].sum() for y0, x0, y1, x1 in rects.tolist()]
+    assert (rect_sums(table, rects) == expected).all()
+    y0, x0, y1, x1 = rects[0].tolist()
+    assert rect_sums(table, rects[0]) == grid[y0:y1, x0:x1].sum()
+
+def occupied_goal(grid, tiles):
+    h, w = grid.h, grid.w
+    mask = tiles.goal.mask
+    rows = (tiles.origin[0] + np.arange(mask.shape[0])) % h
+    cols = (tiles.origin[1] + np.arange(mask.shape[1])) % w
+    return (grid.cells[rows[:, None], cols[None, :]] != 0) & mask
+
+def test_tile_counts_and_rect_queries_agree_within_a_step(make_world):
+    grid = make_world(h=40, w=40, nagents=500, goal_size=15)
+    grid.translate_goal(-12, 9)
+    solver = SolverModel(grid)
+    rng = np.random.default_rng(5)
+    move = solver.move_agent_within_goal_based_on_density
+
+    def checked_move(agent):
+        move(agent)
+        tiles = grid.get_goal_tiles()
+        occupied = occupied_goal(grid, tiles)
+        for indx, rect in enumerate(tiles.goal.tile_rects.tolist()):
+            assert solver.calculate_agent_density(indx) == solver.calculate_agent_density(tuple(rect))
+        y0, x0, y1, x1 = random_rects(rng, *occupied.shape, 1)[0].tolist()
+        assert tiles.count(y0, x0, y1, x1) == occupied[y0:y1, x0:x1].sum()
+
+    solver.move_agent_within_goal_based_on_density = checked_move
+    for _ in range(3):
+        solver.solve_step()
+
+def test_least_dense_tile(make_world):
+    grid = make_world(nagents=0, goal_size=13)
+    tiles = grid.get_goal_tiles()
+    assert len(tiles.counts) > 1
+    free = [pos for pos in tiles.subregions[0]]
+    grid.add_agents(free[:len(free) // 2])
+    densities = grid.get_goal_tiles().densities()
+    assert densities[0] > 0 and (densities[1:] == 0).all()
+    assert grid.get_goal_tiles().least_dense() != 0
+    cell = tiles.random_cell(2, grid.stream)
+    assert cell in tiles.subregions[2]
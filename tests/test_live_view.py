@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+import pytest
+from live_view import WorldPublisher, SegmentReader, SEQ, STEP
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+READ_SCRIPT = """
+import sys
+from live_view import SegmentReader
+reader = SegmentReader(sys.argv[1])
+print(reader.read(), reader.step, int(reader.cells.sum()), int(reader.goal_mask.sum()), int(reader.in_goal.sum()))
+reader.close()
+"""
+
+@pytest.fixture
+def publisher(make_world):
+    publishers = []
+    def make(**kwargs):
+        publishers.append(WorldPublisher(make_world(nagents=60), **kwargs))
+        return publishers[-1]
+    yield make
+    for pub in publishers:
+        pub.close()
+
+def test_reader_in_another_process_sees_the_published_step(publisher):
+    pub = publisher()
+    grid = pub.world
+    grid.remove_agent(grid.get_agents()[0])
+    pub.publish(7)
+    out = subprocess.run([sys.executable, '-c', READ_SCRIPT, pub.name], cwd=REPO, check=True,
+                         capture_output=True, text=True).stdout.split()
+    assert out == ['True', '7', str(int(grid.cells.sum())), str(len(grid.goal_set)), str(grid.agents_inside)]
+
+def test_reader_skips_unpublished_repeated_and_torn_steps(publisher, monkeypatch):
+    # El lector y el publicador comparten proceso: el lector no debe dar de baja el segmento
+    monkeypatch.setattr('live_view.resource_tracker.unregister', lambda name, rtype: None)
+    pub = publisher()
+    reader = SegmentReader(pub.name)
+    assert not reader.read()
+    pub.publish()
+    assert reader.read() and reader.step == 0
+    assert not reader.read()
+    # Una escritura a medias (seq impar) no se lee
+    pub.header[SEQ] += 1
+    pub.header[STEP] = 1
+    assert not reader.read()
+    pub.header[SEQ] += 1
+    pub.world.translate_goal(1, 1)
+    pub.publish(2)
+    assert reader.read() and reader.step == 2
+    assert (reader.goal_mask == pub.world.goal_mask).all()
+    reader.close()
+
+def test_sparse_world_rejected(make_world):
+    with pytest.raises(ValueError):
+        WorldPublisher(make_world(sparse=True, nagents=5))
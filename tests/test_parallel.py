@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from parallel import ParallelSolverModel
+from solver_model import SolverModel
+
+def run_parallel(make_world, workers, seed, steps=20):
+    grid = make_world(h=40, w=40, nagents=250, goal_size=11)
+    solver = ParallelSolverModel(grid, workers=workers, seed=seed)
+    try:
+        for step in range(steps):
+            solver.solve_step()
+            if step == steps // 2:
+                grid.translate_goal(2, 3)
+                grid.remove_agent(grid.get_agents()[0])
+    finally:
+        solver.close()
+    return grid
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_parallel_steps_keep_world_consistent(make_world, check_world, workers):
+    grid = run_parallel(make_world, workers, seed=1)
+    assert len(grid.agents) == 249
+    check_world(grid)
+
+def test_same_seed_same_run(make_world):
+    first = run_parallel(make_world, 2, seed=4)
+    second = run_parallel(make_world, 2, seed=4)
+    assert (first.cells == second.cells).all()
+
+def test_sequential_solver_continues_after_close(make_world, check_world):
+    grid = run_parallel(make_world, 2, seed=2)
+    tiles = grid.get_goal_tiles()
+    assert tiles.counts.sum() == grid.agents_inside
+    solver = SolverModel(grid)
+    for _ in range(5):
+        solver.solve_step()
+    check_world(grid)
+    assert grid.get_goal_tiles().counts.sum() == grid.agents_inside
+
+def test_agents_move_one_cell_per_step(make_world):
+    grid = make_world(h=40, w=40, nagents=250, goal_size=11)
+    solver = ParallelSolverModel(grid, workers=2, seed=3)
+    try:
+        ids = grid.agents.ids()
+        for _ in range(5):
+            y0, x0 = grid.agents.pos_y[ids].copy(), grid.agents.pos_x[ids].copy()
+            solver.solve_step()
+            dy = np.abs(grid.agents.pos_y[ids] - y0)
+            dx = np.abs(grid.agents.pos_x[ids] - x0)
+            assert (np.maximum(np.minimum(dy, grid.h - dy), np.minimum(dx, grid.w - dx)) <= 1).all()
+    finally:
+        solver.close()
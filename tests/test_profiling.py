@@ -0,0 +1,26 @@
+from profiling import SolverProfiler
+from solver_model import SolverModel
+
+def test_goal_lookups_count_internal_checks(make_world):
+    grid = make_world(nagents=150, seed=2)
+    solver = SolverModel(grid)
+    profiler = SolverProfiler()
+    solver.enable_profiling(profiler)
+    for _ in range(5):
+        solver.solve_step()
+    assert profiler.totals['moves_attempted'] > 0
+    assert profiler.totals['goal_lookups'] >= profiler.totals['moves_attempted'] - profiler.totals['moves_blocked']
+
+def test_detach_only_undoes_own_patches(make_world):
+    grid = make_world(nagents=50)
+    profiler = SolverProfiler()
+    first, second = SolverModel(grid), SolverModel(grid)
+    first.enable_profiling(profiler)
+    second.enable_profiling(profiler)
+    first.enable_profiling(profiler)
+    assert sorted(map(len, profiler.attached.values())) == [10, 11]
+    first.disable_profiling()
+    assert 'solve_step' not in vars(first)
+    assert 'solve_step' in vars(second) and 'is_goal' in vars(grid)
+    second.disable_profiling()
+    assert 'is_goal' not in vars(grid) and profiler.attached == {}
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+import gworld as world
+from random_stream import RandomStream
+from solver_model import SolverModel
+
+def test_stream_is_reproducible():
+    first = RandomStream(np.random.default_rng(3), block_size=7)
+    second = RandomStream(np.random.default_rng(3), block_size=7)
+    assert [first.random() for _ in range(20)] == [second.random() for _ in range(20)]
+    values = [first.randrange(5) for _ in range(100)]
+    assert min(values) >= 0 and max(values) < 5
+
+def test_stream_state_round_trip():
+    stream = RandomStream(np.random.default_rng(0), block_size=8)
+    for _ in range(5):
+        stream.random()
+    state = stream.get_state()
+    expected = [stream.random() for _ in range(20)]
+    restored = RandomStream(np.random.default_rng())
+    restored.set_state(state)
+    assert [restored.random() for _ in range(20)] == expected
+
+def test_seeded_runs_are_identical(make_world):
+    runs = []
+    for _ in range(2):
+        grid = make_world(nagents=150, seed=11)
+        solver = SolverModel(grid)
+        for _ in range(10):
+            solver.solve_step()
+        runs.append(grid.cells.copy())
+    assert (runs[0] == runs[1]).all()
+    other = make_world(nagents=150, seed=12)
+    assert not (other.cells == make_world(nagents=150, seed=11).cells).all()
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_spawn_fills_the_world_without_collisions(check_world, sparse):
+    grid = world.GridWorld(12, 10, sparse=sparse, seed=1)
+    grid.add_agents_rand(100)
+    grid.add_agents_rand(20)
+    assert len(grid.agents) == 120
+    check_world(grid)
+    with pytest.raises(ValueError):
+        grid.add_agents_rand(1)
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_move_randomly_on_a_full_world(sparse):
+    grid = world.GridWorld(6, 5, sparse=sparse, seed=2)
+    grid.add_agents_rand(30)
+    agent = grid.get_agents()[0]
+    pos = grid.aindx_cpos[agent]
+    grid.move_agent_randomly(agent)
+    assert grid.aindx_cpos[agent] == pos
+    grid.remove_agent(grid.get_agents()[1])
+    grid.move_agent_randomly(agent)
+    assert len(set(grid.aindx_cpos.values())) == 29
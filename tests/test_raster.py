@@ -0,0 +1,103 @@
+import struct
+import zlib
+import numpy as np
+import pytest
+import gworld as world
+import visualize
+from macros import UNOCCUPIED
+from raster import render_frame, scale_frame, encode_ppm, encode_png, PALETTE, WHITE, LIGHTGREY, RED, GREEN
+
+def test_render_frame_colours(make_world):
+    grid = make_world(nagents=80)
+    frame = render_frame(grid.cells, grid.goal_mask)
+    occupied = grid.cells != UNOCCUPIED
+    expected = {(False, False): WHITE, (False, True): LIGHTGREY, (True, False): RED, (True, True): GREEN}
+    for (busy, goal), color in expected.items():
+        mask = (occupied == busy) & (grid.goal_mask == goal)
+        assert (frame[mask] == color).all()
+    out = np.empty_like(frame)
+    assert render_frame(grid.cells, grid.goal_mask, out=out) is out
+
+def test_render_frame_rejects_sparse_worlds(make_world):
+    grid = make_world(sparse=True)
+    with pytest.raises(ValueError):
+        render_frame(grid.cells, grid.goal_mask)
+
+def test_scale_frame_nearest_neighbour():
+    frame = PALETTE[np.arange(4).reshape(2, 2)]
+    scaled = scale_frame(frame, 4, 6)
+    assert scaled.shape == (4, 6, 3)
+    assert (scaled[:2, :3] == frame[0, 0]).all() and (scaled[2:, 3:] == frame[1, 1]).all()
+
+def test_encode_ppm():
+    frame = PALETTE[np.arange(6).reshape(2, 3) % 4]
+    data = encode_ppm(frame)
+    header = b'P6 3 2 255\n'
+    assert data.startswith(header)
+    assert np.frombuffer(data[len(header):], dtype=np.uint8).reshape(2, 3, 3).tolist() == frame.tolist()
+
+def test_encode_png_round_trip():
+    frame = PALETTE[np.random.default_rng(0).integers(0, 4, (5, 7))]
+    data = encode_png(frame)
+    assert data[:8] == b'\x89PNG\r\n\x1a\n'
+    chunks = dict()
+    pos = 8
+    while pos < len(data):
+        length, tag = struct.unpack('>I4s', data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        assert struct.unpack('>I', data[pos + 8 + length:pos + 12 + length])[0] == zlib.crc32(tag + body)
+        chunks[tag] = body
+        pos += 12 + length
+    assert struct.unpack('>II', chunks[b'IHDR'][:8]) == (7, 5)
+    raw = np.frombuffer(zlib.decompress(chunks[b'IDAT']), dtype=np.uint8).reshape(5, 1 + 7 * 3)
+    assert (raw[:, 0] == 0).all()
+    assert (raw[:, 1:].reshape(5, 7, 3) == frame).all()
+
+class FakeImage:
+    def __init__(self, **kwargs):
+        self.frames = 0
+
+    def configure(self, **kwargs):
+        self.frames += 1
+
+class FakeCanvas:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def grid(self):
+        pass
+
+    def create_image(self, *args, **kwargs):
+        return 1
+
+@pytest.fixture
+def raster_vis(monkeypatch):
+    monkeypatch.setattr(visualize, 'Tk', lambda: None)
+    monkeypatch.setattr(visualize, 'Canvas', FakeCanvas)
+    monkeypatch.setattr(visualize, 'PhotoImage', FakeImage)
+    return visualize.RasterVisualize
+
+def test_raster_redraws_once_per_frame(make_world, raster_vis):
+    grid = make_world(nagents=40)
+    vis = raster_vis(grid)
+    vis.draw_world()
+    grid.pop_dirty_agents()
+    assert vis.image.frames == 1
+    agents = grid.get_agents()[:10]
+    for agent in agents:
+        grid.move_agent_randomly(agent)
+        vis.update_agent_vis(agent, desp=True)
+        grid.dirty_agents.discard(agent)
+    vis.remove_agent_vis(agents[-1])
+    assert vis.image.frames == 1
+    vis.update_dirty_agents()
+    assert vis.image.frames == 2 and vis.highlighted == set(agents[:-1])
+    vis.update_dirty_agents()
+    assert vis.image.frames == 2
+    grid.set_agent_pos(agents[0], next(zip(*np.nonzero(grid.cells == UNOCCUPIED))))
+    vis.update_dirty_agents()
+    assert vis.image.frames == 3 and agents[0] not in vis.highlighted
+
+def test_raster_visualize_rejects_sparse_worlds(raster_vis):
+    with pytest.raises(ValueError):
+        raster_vis(world.GridWorld(10, 10, sparse=True))
@@ -0,0 +1,92 @@
+import os
+import subprocess
+import sys
+from runner import Runner
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class FakeCanvas:
+    def __init__(self):
+        self.scheduled = []
+        self.cancelled = []
+
+    def after(self, delay, callback):
+        self.scheduled.append((delay, callback))
+        return len(self.scheduled)
+
+    def after_cancel(self, ident):
+        self.cancelled.append(ident)
+
+class FakeVis:
+    def __init__(self, world):
+        self.world = world
+        self.canvas = FakeCanvas()
+        self.calls = []
+
+    def update_goal_vis(self):
+        self.calls.append('goal')
+
+    def update_dirty_agents(self):
+        self.calls.append('agents')
+
+def steps(log, pauses=None, count=10):
+    for step in range(count):
+        log.append(step)
+        yield (pauses or {}).get(step)
+
+def test_each_frame_runs_its_steps_and_redraws_once(make_world):
+    vis = FakeVis(make_world(nagents=10))
+    log = []
+    runner = Runner(vis, steps(log), steps_per_frame=3, fps=10)
+    runner.frame()
+    assert log == [0, 1, 2] and vis.calls == ['agents']
+    assert len(vis.canvas.scheduled) == 1 and vis.canvas.scheduled[0][0] <= 100
+
+def test_pauses_delay_the_next_frame_unless_fast(make_world):
+    vis = FakeVis(make_world(nagents=10))
+    log = []
+    runner = Runner(vis, steps(log, {1: 0.5}), steps_per_frame=3, fps=10)
+    runner.frame()
+    assert log == [0, 1] and vis.canvas.scheduled[-1][0] >= 500
+    runner.toggle_fast()
+    runner.frame()
+    assert log == list(range(10)) and runner.finished
+
+def test_goal_changes_redraw_the_goal(make_world):
+    grid = make_world(nagents=10)
+    vis = FakeVis(grid)
+
+    def moving():
+        grid.translate_goal(0, 1)
+        yield
+
+    runner = Runner(vis, moving(), steps_per_frame=1)
+    runner.frame()
+    assert vis.calls == ['goal'] and runner.goal_version == grid.goal_version
+
+def test_pause_cancels_and_resumes(make_world):
+    vis = FakeVis(make_world(nagents=10))
+    runner = Runner(vis, steps([]))
+    runner.schedule(0)
+    runner.toggle_pause()
+    assert runner.paused and vis.canvas.cancelled == [1] and runner.scheduled is None
+    runner.toggle_pause()
+    assert not runner.paused and runner.scheduled == 2
+
+def test_finish_stops_scheduling(make_world):
+    vis = FakeVis(make_world(nagents=10))
+    finished = []
+    runner = Runner(vis, steps([], count=2), steps_per_frame=5, on_finish=lambda: finished.append(True))
+    runner.frame()
+    assert runner.finished and finished == [True] and vis.canvas.scheduled == []
+    assert runner.steps_done == 2
+    runner.toggle_pause()
+    assert not runner.paused
+
+def test_headless_run_does_not_import_tkinter():
+    script = ("import runpy, sys; sys.argv = ['solver_model.py', '--headless', '--early-stop', '--seed', '1']; "
+              "runpy.run_path('solver_model.py', run_name='__main__'); "
+              "assert 'tkinter' not in sys.modules and 'visualize' not in sys.modules")
+    result = subprocess.run([sys.executable, '-c', script], cwd=REPO, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert 'Se terminó el movimiento de la figura' in result.stdout
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+import gworld as world
+from shapes import (THRESHOLD, CompiledGoal, compile_goal, from_ascii, load_goal, read_netpbm)
+
+MASK = np.array([[0, 1, 1, 0, 0, 1, 0, 0, 1],
+                 [1, 1, 0, 0, 1, 1, 1, 0, 0],
+                 [0, 0, 0, 1, 0, 1, 0, 1, 1]], dtype=bool)
+
+def netpbm_bytes(magic, mask):
+    h, w = mask.shape
+    gray = np.where(mask, 0, 255).astype(np.uint8)
+    header = b'%s\n# comentario\n%d %d\n' % (magic, w, h)
+    if magic == b'P1':
+        # Píxeles sin separar, permitido en PBM
+        return header + b'\n'.join(b''.join(b'1' if v else b'0' for v in row) for row in mask) + b'\n'
+    if magic == b'P4':
+        return header + np.packbits(mask, axis=1).tobytes()
+    if magic == b'P2':
+        return header + b'255\n' + b'\n'.join(b' '.join(b'%d' % v for v in row) for row in gray) + b'\n'
+    if magic == b'P3':
+        rgb = np.repeat(gray[:, :, None], 3, axis=2)
+        return header + b'255\n' + b' '.join(b'%d' % v for v in rgb.ravel()) + b'\n'
+    if magic == b'P5':
+        return header + b'65535\n' + (gray.astype('>u2') * 257).tobytes()
+    rgb = np.repeat(gray[:, :, None], 3, axis=2)
+    return header + b'255\n' + rgb.tobytes()
+
+@pytest.mark.parametrize('magic', [b'P1', b'P2', b'P3', b'P4', b'P5', b'P6'])
+def test_read_netpbm(tmp_path, magic):
+    path = tmp_path / 'goal.pnm'
+    path.write_bytes(netpbm_bytes(magic, MASK))
+    gray = read_netpbm(str(path))
+    assert gray.shape == MASK.shape and gray.dtype == np.uint8
+    assert ((gray < THRESHOLD) == MASK).all()
+
+def test_read_netpbm_rejects_other_formats(tmp_path):
+    path = tmp_path / 'goal.pgm'
+    path.write_bytes(b'P7\n3 3\n255\n' + bytes(9))
+    with pytest.raises(ValueError):
+        read_netpbm(str(path))
+
+def test_load_goal_by_extension(tmp_path):
+    np.save(tmp_path / 'goal.npy', MASK.astype(np.uint8))
+    (tmp_path / 'goal.txt').write_text('\n'.join(''.join('#' if v else '.' for v in row) for row in MASK))
+    (tmp_path / 'goal.pbm').write_bytes(netpbm_bytes(b'P4', MASK))
+    for name in ('goal.npy', 'goal.txt', 'goal.pbm'):
+        goal = load_goal(str(tmp_path / name), origin=(4, 5))
+        assert (goal.mask == MASK).all() and goal.origin == (4, 5)
+
+def test_compile_trims_and_tiles_the_mask():
+    mask = np.zeros((40, 50), dtype=bool)
+    mask[5:35, 10:42] = True
+    mask[20, 3] = True
+    goal = compile_goal(mask, origin=(1, 2), tile_side=6)
+    assert goal.origin == (6, 5) and goal.mask.shape == (30, 39)
+    assert goal.size == np.count_nonzero(mask) == sum(goal.tile_sizes)
+    # Los bloques son una partición de las casillas de la figura
+    cells = [cell for tile in goal.tiles for cell in tile]
+    assert sorted(cells) == sorted(goal.cells)
+    for indx, (y0, x0, y1, x1) in enumerate(goal.tile_rects.tolist()):
+        assert all(y0 <= y < y1 and x0 <= x < x1 for y, x in goal.tiles[indx])
+    assert all(goal.tile_index[y, x] == indx for indx, tile in enumerate(goal.tiles) for y, x in tile)
+
+def test_boundary_of_a_square():
+    goal = from_ascii('####\n####\n####\n####')
+    assert sorted(goal.boundary) == sorted((y, x) for y in range(4) for x in range(4) if y in (0, 3) or x in (0, 3))
+
+def test_positions_wrap_around():
+    goal = compile_goal([(9, 9), (9, 10), (10, 9)])
+    ys, xs = goal.positions(10, 10)
+    assert sorted(zip(ys.tolist(), xs.tolist())) == [(0, 9), (9, 0), (9, 9)]
+
+def test_empty_goal_is_rejected():
+    with pytest.raises(ValueError):
+        compile_goal(np.zeros((3, 3), dtype=bool))
+    with pytest.raises(ValueError):
+        compile_goal([])
+
+def test_compiled_goal_matches_list_goal(check_world):
+    goal = from_ascii(' ## \n####\n ## ', origin=(10, 12))
+    cells = [(10 + y, 12 + x) for y, x in goal.cells]
+    grids = []
+    for shape in (goal, cells):
+        grid = world.GridWorld(30, 30, seed=3)
+        grid.add_agents_rand(200)
+        grid.add_goal_pos(shape)
+        check_world(grid)
+        grids.append(grid)
+    assert grids[0].goal_set == grids[1].goal_set == set(cells)
+    assert grids[0].goal_pos == grids[1].goal_pos
+    assert (grids[0].goal_mask == grids[1].goal_mask).all()
+    assert grids[0].agents_inside == grids[1].agents_inside
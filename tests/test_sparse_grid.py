@@ -0,0 +1,50 @@
+import numpy as np
+import gworld as world
+from solver_model import SolverModel, square_goal
+from sparse_grid import SparseCells
+
+def test_matches_dense_array():
+    rng = np.random.default_rng(0)
+    cells = SparseCells(300, 200, np.uint32, tile_size=16)
+    dense = np.zeros((300, 200), dtype=np.uint32)
+    for _ in range(3000):
+        y, x = rng.integers(-300, 600), rng.integers(-200, 400)
+        value = int(rng.choice([0, 0, rng.integers(1, 10 ** 6)]))
+        cells[y, x] = value
+        dense[y % 300, x % 200] = value
+    ys, xs = rng.integers(0, 300, 5000), rng.integers(0, 200, 5000)
+    assert (cells.take(ys, xs) == dense[ys, xs]).all()
+    assert (cells[ys, xs] == dense[ys, xs]).all()
+    assert all(cells[y, x] == dense[y, x] for y, x in zip(ys[:200].tolist(), xs[:200].tolist()))
+    assert sum(cells.counts.values()) == np.count_nonzero(dense)
+
+def test_empty_tiles_are_released():
+    cells = SparseCells(100, 100, tile_size=10)
+    cells[5, 5] = 3
+    cells[55, 55] = 4
+    assert len(cells.tiles) == 2
+    cells[5, 5] = 0
+    assert list(cells.tiles) == [(5, 5)]
+    cells.fill(0)
+    assert not cells.tiles
+
+def test_sparse_world_runs_like_dense(check_world):
+    rng = np.random.default_rng(1)
+    flat = rng.choice(60 * 60, 300, replace=False)
+    agents = list(zip((flat // 60).tolist(), (flat % 60).tolist()))
+    results = []
+    for sparse in (False, True):
+        grid = world.GridWorld(60, 60, sparse=sparse, seed=5)
+        grid.add_agents(agents)
+        grid.add_goal_pos(square_goal(30, 30, 11))
+        solver = SolverModel(grid, use_distance_field=False)
+        for step in range(30):
+            solver.solve_step()
+            if step == 15:
+                grid.translate_goal(3, -7)
+        for agent in grid.get_agents()[:10]:
+            grid.remove_agent(agent)
+        check_world(grid)
+        results.append((grid.get_agents(), dict(grid.aindx_cpos.items()), grid.get_agents_in_goal(),
+                        sorted(grid.goal_set)))
+    assert results[0] == results[1]
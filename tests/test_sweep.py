@@ -0,0 +1,51 @@
+import csv
+import os
+import subprocess
+import sys
+from sweep import parameter_grid, run_simulation, run_sweep, write_results, RESULT_FIELDS
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_parameter_grid_is_the_cartesian_product():
+    grid = parameter_grid(world_size=[11, 21], engine=['sequential', 'vector'], seed=[0])
+    assert len(grid) == 4
+    assert grid[1] == {'world_size': 11, 'engine': 'vector', 'seed': 0}
+
+def test_simulation_is_reproducible():
+    first = run_simulation(world_size=15, num_agents=40, square_size=5, seed=3, iterations=15)
+    second = run_simulation(world_size=15, num_agents=40, square_size=5, seed=3, iterations=15)
+    assert {k: v for k, v in first.items() if k != 'elapsed'} == {k: v for k, v in second.items() if k != 'elapsed'}
+    assert first['iterations_run'] == 15 and first['stop_reason'] is None
+
+def test_early_stop_reports_its_reason():
+    row = run_simulation(world_size=15, num_agents=10, square_size=7, seed=1, iterations=500, early_stop=True)
+    assert row['stop_reason'] == 'full' and row['iterations_run'] < 500
+    assert row['agents_inside'] == 10 and row['iterations_to_fill'] == row['iterations_run']
+
+def test_pool_matches_serial_run():
+    grid = parameter_grid(world_size=[13], num_agents=[30], square_size=[5], engine=['sequential', 'vector'],
+                          iterations=[10])
+    serial = run_sweep(grid, [0, 1], workers=1)
+    pooled = run_sweep(grid, [0, 1], workers=2)
+    assert [(row['engine'], row['seed']) for row in serial] == [('sequential', 0), ('sequential', 1),
+                                                                ('vector', 0), ('vector', 1)]
+    strip = lambda rows: [{k: v for k, v in row.items() if k != 'elapsed'} for row in rows]
+    assert strip(pooled) == strip(serial)
+
+def test_command_line_writes_csv(tmp_path):
+    out = str(tmp_path / 'results.csv')
+    subprocess.run([sys.executable, 'sweep.py', '--world-size', '11', '--agents', '20', '--square-size', '4',
+                    '--seeds', '2', '--iterations', '5', '--workers', '1', '--out', out],
+                   cwd=REPO, check=True, capture_output=True)
+    with open(out, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 2 and list(rows[0]) == RESULT_FIELDS
+    assert [len(row['inside_per_iteration'].split()) for row in rows] == [5, 5]
+
+def test_write_results_round_trip(tmp_path):
+    row = run_simulation(world_size=11, num_agents=20, square_size=4, iterations=3)
+    path = str(tmp_path / 'rows.csv')
+    write_results([row], path)
+    with open(path, newline='') as f:
+        read = next(csv.DictReader(f))
+    assert read['engine'] == 'sequential' and int(read['agents_inside']) == row['agents_inside']
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+import gworld as world
+from solver_model import SolverModel
+from trajectory import TrajectoryRecorder, TrajectoryReader, position_dtype, DEAD
+
+def snapshot(grid):
+    store = grid.agents
+    positions = np.full(store.next_id, DEAD, dtype=np.int64)
+    ids = store.ids()
+    positions[ids] = store.pos_y[ids].astype(np.int64) * grid.w + store.pos_x[ids]
+    return positions, store.goal[:store.next_id].copy(), sorted(grid.goal_pos)
+
+def test_read_back_matches_recorded_steps(tmp_path, make_world):
+    grid = make_world(nagents=60)
+    recorder = TrajectoryRecorder(grid, str(tmp_path), chunk_steps=4, batch_steps=3)
+    solver = SolverModel(grid)
+    expected = []
+    for step in range(11):
+        solver.solve_step()
+        if step == 5:
+            grid.remove_agent(grid.get_agents()[0])
+            grid.translate_goal(1, 2)
+        recorder.record()
+        expected.append(snapshot(grid))
+    recorder.close()
+
+    reader = TrajectoryReader(str(tmp_path))
+    assert len(reader) == 11
+    for step, (positions, in_goal, goal) in enumerate(expected):
+        read_positions, read_in_goal, read_goal = reader.step(step)
+        assert (read_positions == positions).all()
+        assert (read_in_goal == in_goal).all()
+        ys, xs = reader.goal_cells(read_goal)
+        assert sorted(zip(ys.tolist(), xs.tolist())) == goal
+
+    chunks = list(reader.read(2, 10))
+    assert [start for start, *_ in chunks] == [2, 4, 8]
+    stacked = np.concatenate([positions for _, positions, _, _ in chunks])
+    assert (stacked == np.array([p for p, _, _ in expected[2:10]])).all()
+    with pytest.raises(IndexError):
+        reader.step(11)
+
+def test_position_dtype_grows_with_the_world():
+    assert position_dtype(1000, 1000) == np.int32
+    assert position_dtype(2 ** 16, 2 ** 15) == np.int32
+    assert position_dtype(2 ** 16, 2 ** 16) == np.int64
+
+def test_records_huge_sparse_worlds(tmp_path, make_world):
+    grid = make_world(h=100000, w=100000, nagents=20, goal_size=5, sparse=True)
+    recorder = TrajectoryRecorder(grid, str(tmp_path))
+    recorder.record()
+    recorder.close()
+    reader = TrajectoryReader(str(tmp_path))
+    positions, _, _ = reader.step(0)
+    assert reader.position_dtype == np.int64
+    assert (positions == snapshot(grid)[0]).all()
+
+class FakeCanvas:
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, delay, callback):
+        self.scheduled.append(callback)
+
+class FakeVis:
+    def __init__(self):
+        self.canvas = FakeCanvas()
+
+def test_replay_loads_each_new_shape_once(tmp_path, make_world, monkeypatch):
+    from replay import ReplayPlayer
+    grid = make_world(nagents=40)
+    recorder = TrajectoryRecorder(grid, str(tmp_path))
+    recorder.record()
+    grid.update_goal_pos([(2, 3), (2, 4), (3, 3)])
+    recorder.record()
+    recorder.close()
+
+    player = ReplayPlayer(TrajectoryReader(str(tmp_path)))
+    player.seek(0)
+    compiled = []
+    monkeypatch.setattr(world, 'compile_goal', lambda shape: compiled.append(shape) or shape)
+    version = player.world.goal_version
+    player.seek(1)
+    assert player.world.goal_version == version + 1
+    assert len(compiled) == 1
+    assert sorted(player.world.goal_pos) == [(2, 3), (2, 4), (3, 3)]
+    assert player.world.goal_origin == (2, 3)
+
+def test_replay_of_empty_recording_stops(tmp_path, make_world):
+    from replay import ReplayPlayer
+    recorder = TrajectoryRecorder(make_world(nagents=10), str(tmp_path))
+    recorder.close()
+    player = ReplayPlayer(TrajectoryReader(str(tmp_path)), FakeVis())
+    player.seek(5)
+    player.playing = True
+    player.tick()
+    assert player.current is None and not player.playing
+    assert len(player.vis.canvas.scheduled) == 1
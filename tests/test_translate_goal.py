@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from solver_model import square_goal
+
+def shifted(cells, dy, dx, h, w):
+    return {((y + dy) % h, (x + dx) % w) for (y, x) in cells}
+
+def assert_goal_consistent(grid):
+    cells = set(grid.goal_pos)
+    assert cells == grid.goal_set
+    assert set(map(tuple, grid.goal_cells().tolist())) == cells
+    assert [grid.goal_cell(i) for i in range(len(grid.goal_pos))] == grid.goal_pos
+    assert set(zip(*map(np.ndarray.tolist, np.nonzero(grid.goal_mask)))) == cells
+
+@pytest.mark.parametrize('dy,dx', [(1, 0), (0, -1), (-1, 1), (3, -4), (29, 0), (0, 31)])
+def test_translation_matches_rebuilt_goal(make_world, check_world, dy, dx):
+    grid = make_world(h=30, w=30, nagents=250, goal_size=7)
+    expected = shifted(grid.goal_set, dy, dx, grid.h, grid.w)
+    grid.translate_goal(dy, dx)
+    assert grid.goal_set == expected
+    assert_goal_consistent(grid)
+    check_world(grid)
+
+def test_goal_wraps_around_the_edges(make_world, check_world):
+    grid = make_world(h=20, w=24, nagents=150, goal_size=5)
+    start = set(grid.goal_set)
+    for _ in range(12):
+        grid.translate_goal(2, 2)
+        assert grid.goal_origin[0] < grid.h and grid.goal_origin[1] < grid.w
+    assert grid.goal_set == shifted(start, 24, 24, grid.h, grid.w)
+    assert_goal_consistent(grid)
+    check_world(grid)
+    # Veinte pasos verticales y veinticuatro horizontales devuelven la figura a su sitio
+    for _ in range(24):
+        grid.translate_goal(0, 1)
+    for _ in range(20):
+        grid.translate_goal(1, 0)
+    assert grid.goal_set == shifted(start, 24, 24, grid.h, grid.w)
+
+def test_unit_steps_touch_only_edge_cells(make_world):
+    grid = make_world(h=40, w=40, nagents=100, goal_size=9)
+    grid.pop_dirty_goal_cells()
+    before = set(grid.goal_set)
+    grid.translate_goal(1, 0)
+    changed = grid.pop_dirty_goal_cells()
+    assert changed == before ^ grid.goal_set
+    assert len(changed) == 2 * 9
+    entering, leaving = grid.goal_edges[(1, 0)]
+    assert len(entering) == len(leaving) == 9
+
+def test_agents_on_edges_change_goal_state(make_world, check_world):
+    grid = make_world(h=30, w=30, nagents=0, goal_size=5)
+    top = min(y for (y, x) in grid.goal_set)
+    left = min(x for (y, x) in grid.goal_set)
+    grid.add_agents([(top, left), (top - 1, left)])
+    inside, above = grid.get_agents()
+    assert grid.aindx_goalreached[inside] and not grid.aindx_goalreached[above]
+    grid.translate_goal(-1, 0)
+    assert grid.aindx_goalreached[inside] and grid.aindx_goalreached[above]
+    grid.translate_goal(0, 1)
+    assert not grid.aindx_goalreached[inside] and not grid.aindx_goalreached[above]
+    check_world(grid)
+
+def test_shortest_shift_reuses_cached_edges(make_world):
+    grid = make_world(h=30, w=30, nagents=50, goal_size=5)
+    grid.translate_goal(29, 0)
+    assert list(grid.goal_edges) == [(-1, 0)]
+    grid.translate_goal(30, -30)
+    assert list(grid.goal_edges) == [(-1, 0)]
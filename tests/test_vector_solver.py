@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from vector_solver import VectorSolverModel
+
+@pytest.mark.parametrize('use_distance_field', [False, True])
+def test_step_keeps_world_consistent(make_world, check_world, use_distance_field):
+    grid = make_world(nagents=300, goal_size=11)
+    solver = VectorSolverModel(grid, seed=3, use_distance_field=use_distance_field)
+    for step in range(20):
+        before = grid.agents.ids()
+        solver.solve_step()
+        assert (grid.agents.ids() == before).all()
+        if step == 10:
+            grid.translate_goal(2, -3)
+    check_world(grid)
+
+def test_outside_agents_move_one_cell(make_world):
+    grid = make_world(nagents=200)
+    solver = VectorSolverModel(grid, seed=4)
+    ids = grid.agents.ids()
+    y0, x0 = grid.agents.pos_y[ids].copy(), grid.agents.pos_x[ids].copy()
+    outside = ~grid.agents.goal[ids]
+    solver.solve_step()
+    dy = np.abs(grid.agents.pos_y[ids] - y0)
+    dx = np.abs(grid.agents.pos_x[ids] - x0)
+    dy = np.minimum(dy, grid.h - dy)[outside]
+    dx = np.minimum(dx, grid.w - dx)[outside]
+    assert (np.maximum(dy, dx) <= 1).all()
+
+def test_same_seed_same_run(make_world):
+    runs = []
+    for _ in range(2):
+        grid = make_world(nagents=250)
+        solver = VectorSolverModel(grid, seed=7)
+        for _ in range(15):
+            solver.solve_step()
+        runs.append(grid.cells.copy())
+    assert (runs[0] == runs[1]).all()
+
+def test_sparse_world_rejected(make_world):
+    grid = make_world(sparse=True, nagents=10)
+    with pytest.raises(ValueError):
+        VectorSolverModel(grid)
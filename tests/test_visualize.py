@@ -0,0 +1,82 @@
+import pytest
+import visualize
+from macros import UNOCCUPIED
+
+class FakeCanvas:
+    def __init__(self, *args, **kwargs):
+        self.items = dict()
+        self.configured = []
+
+    def grid(self):
+        pass
+
+    def new(self, **kwargs):
+        self.items[len(self.items) + 1] = dict(kwargs)
+        return len(self.items)
+
+    def create_rectangle(self, *args, **kwargs):
+        return self.new(**kwargs)
+
+    def create_oval(self, *args, **kwargs):
+        return self.new(**kwargs)
+
+    def itemconfig(self, item, **kwargs):
+        self.items[item].update(kwargs)
+        self.configured.append(item)
+
+    def coords(self, item, *args):
+        self.items[item]['coords'] = args
+
+    def delete(self, item):
+        del self.items[item]
+
+@pytest.fixture
+def canvas_vis(monkeypatch):
+    monkeypatch.setattr(visualize, 'Tk', lambda: None)
+    monkeypatch.setattr(visualize, 'Canvas', FakeCanvas)
+    def make(grid):
+        vis = visualize.Visualize(grid)
+        vis.draw_world()
+        vis.draw_agents()
+        return vis
+    return make
+
+def cell_colors(vis):
+    return {(row, col): vis.canvas.items[vis.vis_cells[row][col]]['fill']
+            for row in range(vis.world.h) for col in range(vis.world.w)}
+
+def test_goal_translation_recolours_only_edge_cells(make_world, canvas_vis):
+    grid = make_world(nagents=40, goal_size=9)
+    vis = canvas_vis(grid)
+    for dy, dx in [(1, 0), (0, -1), (1, 1)]:
+        grid.translate_goal(dy, dx)
+        vis.canvas.configured = []
+        vis.update_goal_vis()
+        cells = {item for item in vis.canvas.configured if item in set(vis.vis_cells.flat)}
+        assert len(cells) <= 4 * 9
+        colors = cell_colors(vis)
+        assert all((color == 'lightgrey') == bool(grid.goal_mask[pos]) for pos, color in colors.items())
+
+def test_goal_rebuild_recolours_changed_cells(make_world, canvas_vis):
+    grid = make_world(nagents=40)
+    vis = canvas_vis(grid)
+    grid.update_goal_pos([(0, 0), (0, 1), (1, 0)])
+    grid.translate_goal(-1, -1)
+    vis.update_goal_vis()
+    colors = cell_colors(vis)
+    assert sorted(pos for pos, color in colors.items() if color == 'lightgrey') == sorted(grid.goal_set)
+    assert not grid.dirty_goal_cells
+
+def test_only_dirty_agents_are_redrawn(make_world, canvas_vis):
+    grid = make_world(nagents=40)
+    vis = canvas_vis(grid)
+    grid.pop_dirty_agents()
+    mover, victim = grid.get_agents()[:2]
+    target = next((y, x) for (y, x) in grid.goal_pos if grid.cells[y, x] == UNOCCUPIED)
+    grid.set_agent_pos(mover, target)
+    grid.remove_agent(victim)
+    vis.canvas.configured = []
+    vis.update_dirty_agents()
+    assert vis.canvas.configured == [vis.aindx_obj[mover]]
+    assert vis.canvas.items[vis.aindx_obj[mover]]['fill'] == 'green'
+    assert victim not in vis.aindx_obj and not grid.dirty_agents
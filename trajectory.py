@@ -0,0 +1,242 @@
+import json
+import os
+import numpy as np
+
+#### CONSTANTS ####
+
+META_FILE = 'meta.json'
+CHUNK_STEPS = 256                 # Pasos por fichero de bloque.
+BATCH_STEPS = 16                  # Pasos acumulados en memoria antes de escribirlos en disco.
+DEAD = -1                         # Posición guardada para los índices sin agente vivo.
+
+def chunk_file(path, name, chunk):
+    return os.path.join(path, '%s_%05d.npy' % (name, chunk))
+
+def position_dtype(h, w):
+    """
+    Elige el tipo entero con el que se guarda la casilla y * w + x de los agentes: int32 si todas
+    las casillas del mundo caben en él e int64 si no (por ejemplo en mundos dispersos enormes).
+
+    Parameters:
+    - h (int): Altura del mundo.
+    - w (int): Anchura del mundo.
+
+    Returns:
+    - np.dtype: Tipo de las posiciones.
+    """
+    if h * w - 1 <= np.iinfo(np.int32).max:
+        return np.dtype(np.int32)
+    return np.dtype(np.int64)
+
+class TrajectoryRecorder:
+    def __init__(self, world, path, chunk_steps=CHUNK_STEPS, batch_steps=BATCH_STEPS, capacity=None):
+        """
+        Graba en disco, paso a paso, la posición y el estado objetivo de todos los agentes.
+        Los pasos se guardan en bloques de 'chunk_steps' pasos, cada uno en ficheros .npy
+        preasignados y proyectados en memoria. Las filas se acumulan en un búfer y se escriben
+        juntas cada 'batch_steps' pasos.
+
+        Cada paso guarda, indexado por el índice del agente:
+        - positions: casilla y * w + x del agente, o DEAD si el índice no tiene agente vivo. El tipo
+          es int32 o int64 según el tamaño del mundo (ver position_dtype).
+        - in_goal: True si el agente está en una casilla objetivo.
+        y además la figura objetivo del paso como (índice de forma, origen y, origen x). Cada forma
+        distinta se guarda una sola vez en shape_XXXXX.npy con sus posiciones relativas.
+        Solo se leen los arreglos de agentes y la figura, así que también sirve para mundos
+        dispersos; la reproducción con ReplayPlayer, en cambio, necesita un mundo denso.
+
+        Parameters:
+        - world: Objeto GridWorld a grabar.
+        - path (str): Directorio de salida.
+        - chunk_steps (int): Pasos por bloque.
+        - batch_steps (int): Pasos por escritura.
+        - capacity (int): Mayor índice de agente que se puede grabar más uno. Por defecto, los
+          índices asignados en el mundo al crear la grabadora.
+        """
+        self.world = world
+        self.path = path
+        self.chunk_steps = chunk_steps
+        self.capacity = capacity if capacity is not None else world.agents.next_id
+        self.steps = 0
+        self.chunk = None                 # Número del bloque abierto.
+        self.maps = None                  # Arreglos proyectados en memoria del bloque abierto.
+        self.position_dtype = position_dtype(world.h, world.w)
+        self.positions = np.empty((batch_steps, self.capacity), dtype=self.position_dtype)
+        self.in_goal = np.empty((batch_steps, self.capacity), dtype=bool)
+        self.goal = np.empty((batch_steps, 3), dtype=np.int32)
+        self.pending = 0                  # Pasos del búfer aún no escritos.
+        self.shapes = []                  # Formas objetivo grabadas (listas de goal_shape).
+        os.makedirs(path, exist_ok=True)
+        self.write_meta()
+
+    def record(self):
+        """
+        Añade el estado actual del mundo como un nuevo paso.
+        """
+        store = self.world.agents
+        size = store.next_id
+        if size > self.capacity:
+            raise ValueError('Agent index %d exceeds recorder capacity %d' % (size - 1, self.capacity))
+
+        row = self.pending
+        alive = store.alive[:size]
+        positions = self.positions[row]
+        positions[size:] = DEAD
+        # El producto se calcula ya en el tipo de las posiciones para que no desborde en int32
+        np.multiply(store.pos_y[:size], self.world.w, out=positions[:size], dtype=self.position_dtype)
+        positions[:size] += store.pos_x[:size]
+        positions[:size][~alive] = DEAD
+        self.in_goal[row, size:] = False
+        np.logical_and(store.goal[:size], alive, out=self.in_goal[row, :size])
+        self.goal[row] = (self.shape_index(), *self.world.goal_origin)
+
+        self.pending += 1
+        if self.pending == len(self.positions):
+            self.flush()
+
+    def shape_index(self):
+        """
+        Obtiene el índice de la forma objetivo actual y la guarda si es nueva.
+        translate_goal conserva la misma lista goal_shape, así que basta comparar por identidad.
+
+        Returns:
+        - int: Índice de la forma.
+        """
+        if not self.shapes or self.shapes[-1] is not self.world.goal_shape:
+            shape = np.array(self.world.goal_shape, dtype=np.int32).reshape(-1, 2)
+            np.save(chunk_file(self.path, 'shape', len(self.shapes)), shape)
+            self.shapes.append(self.world.goal_shape)
+        return len(self.shapes) - 1
+
+    def flush(self):
+        """
+        Escribe en los bloques los pasos acumulados en el búfer.
+        """
+        start = self.steps
+        done = 0
+        while done < self.pending:
+            step = start + done
+            chunk, offset = divmod(step, self.chunk_steps)
+            if chunk != self.chunk:
+                self.open_chunk(chunk)
+            count = min(self.pending - done, self.chunk_steps - offset)
+            for name, buffer in (('positions', self.positions), ('in_goal', self.in_goal), ('goal', self.goal)):
+                self.maps[name][offset:offset + count] = buffer[done:done + count]
+            done += count
+        self.steps += self.pending
+        self.pending = 0
+        for array in self.maps.values() if self.maps else ():
+            array.flush()
+        self.write_meta()
+
+    def open_chunk(self, chunk):
+        """
+        Crea y proyecta en memoria los ficheros de un bloque.
+
+        Parameters:
+        - chunk (int): Número del bloque.
+        """
+        self.chunk = chunk
+        self.maps = {
+            'positions': np.lib.format.open_memmap(chunk_file(self.path, 'positions', chunk), mode='w+',
+                                                   dtype=self.position_dtype, shape=(self.chunk_steps, self.capacity)),
+            'in_goal': np.lib.format.open_memmap(chunk_file(self.path, 'in_goal', chunk), mode='w+',
+                                                 dtype=bool, shape=(self.chunk_steps, self.capacity)),
+            'goal': np.lib.format.open_memmap(chunk_file(self.path, 'goal', chunk), mode='w+',
+                                              dtype=np.int32, shape=(self.chunk_steps, 3)),
+        }
+
+    def write_meta(self):
+        with open(os.path.join(self.path, META_FILE), 'w') as f:
+            json.dump({'h': self.world.h, 'w': self.world.w, 'steps': self.steps, 'chunk_steps': self.chunk_steps,
+                       'capacity': self.capacity, 'shapes': len(self.shapes),
+                       'position_dtype': self.position_dtype.str}, f)
+
+    def close(self):
+        """
+        Escribe los pasos pendientes y cierra la grabación.
+        """
+        self.flush()
+        self.maps = None
+
+class TrajectoryReader:
+    def __init__(self, path):
+        """
+        Lee una grabación de TrajectoryRecorder sin cargarla entera en memoria.
+        Los bloques se abren proyectados en memoria solo cuando se leen.
+
+        Parameters:
+        - path (str): Directorio de la grabación.
+        """
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        self.h = meta['h']
+        self.w = meta['w']
+        self.steps = meta['steps']
+        self.chunk_steps = meta['chunk_steps']
+        self.capacity = meta['capacity']
+        self.position_dtype = np.dtype(meta.get('position_dtype', np.int32))
+        self.shapes = [np.load(chunk_file(path, 'shape', i)) for i in range(meta['shapes'])]
+        self.chunk = None
+        self.maps = None
+
+    def __len__(self):
+        return self.steps
+
+    def open_chunk(self, chunk):
+        if chunk != self.chunk:
+            self.maps = {name: np.load(chunk_file(self.path, name, chunk), mmap_mode='r')
+                         for name in ('positions', 'in_goal', 'goal')}
+            self.chunk = chunk
+        return self.maps
+
+    def read(self, start=0, stop=None):
+        """
+        Recorre un rango de pasos por trozos, sin cargar más de un bloque a la vez.
+
+        Parameters:
+        - start (int): Primer paso.
+        - stop (int): Paso final (excluido). Por defecto, el último grabado.
+
+        Returns:
+        - generator: Tuplas (primer paso, positions, in_goal, goal) con una fila por paso del trozo.
+        """
+        stop = self.steps if stop is None else min(stop, self.steps)
+        step = start
+        while step < stop:
+            chunk, offset = divmod(step, self.chunk_steps)
+            count = min(stop - step, self.chunk_steps - offset)
+            maps = self.open_chunk(chunk)
+            yield (step, maps['positions'][offset:offset + count], maps['in_goal'][offset:offset + count],
+                   maps['goal'][offset:offset + count])
+            step += count
+
+    def step(self, step):
+        """
+        Lee un paso concreto. El coste no depende de la longitud de la grabación.
+
+        Parameters:
+        - step (int): Paso a leer.
+
+        Returns:
+        - tuple: (positions, in_goal, goal) del paso.
+        """
+        if not 0 <= step < self.steps:
+            raise IndexError('Step %d out of range' % step)
+        chunk, offset = divmod(step, self.chunk_steps)
+        maps = self.open_chunk(chunk)
+        return maps['positions'][offset], maps['in_goal'][offset], maps['goal'][offset]
+
+    def goal_cells(self, goal):
+        """
+        Obtiene las casillas objetivo absolutas a partir de la fila 'goal' de un paso.
+
+        Parameters:
+        - goal (np.ndarray): Fila (índice de forma, origen y, origen x).
+
+        Returns:
+        - tuple: Arreglos (ys, xs) de las casillas objetivo.
+        """
+        shape = self.shapes[goal[0]]
+        return (shape[:, 0] + goal[1]) % self.h, (shape[:, 1] + goal[2]) % self.w
@@ -0,0 +1,248 @@
+import numpy as np
+from macros import *
+
+# Desplazamientos (dy, dx) de los cuatro vecinos: arriba, abajo, izquierda, derecha
+NEIGHBOR_DY = np.array([-1, 1, 0, 0])
+NEIGHBOR_DX = np.array([0, 0, -1, 1])
+
+class VectorSolverModel:
+    def __init__(self, world, visualize=None, probability=0.8, seed=None, use_distance_field=False):
+        """
+        Motor de simulación vectorizado que mueve a toda la población de agentes en cada paso.
+        Trabaja sobre copias compactas de los arreglos del almacén de agentes del mundo y escribe
+        los movimientos directamente en world.cells y world.agents. SolverModel sigue siendo el
+        modo de referencia secuencial.
+
+        Parameters:
+        - world: Objeto GridWorld sobre el que se simula.
+        - visualize: Objeto Visualize opcional.
+        - probability (float): Probabilidad de moverse hacia la figura objetivo.
+        - seed (int): Semilla del generador aleatorio del motor. Si es None se usa el generador del
+          mundo, de modo que la semilla del mundo fija también la simulación.
+        - use_distance_field (bool): Si es True los agentes fuera de la figura bajan por el campo de
+          distancias del mundo; si es False dan un paso hacia una casilla objetivo aleatoria. Está
+          desactivado por defecto porque al mover a todos a la vez muchos agentes eligen las mismas
+          casillas libres y aumentan los conflictos.
+        """
+        if not world.dense:
+            raise ValueError('VectorSolverModel requires a dense grid')
+        self.world = world
+        self.vis = visualize
+        self.probability = probability
+        self.use_distance_field = use_distance_field
+        self.rng = world.rng if seed is None else np.random.default_rng(seed)
+        self.goal_version = None
+        self.load_from_world()
+
+    def load_from_world(self):
+        """
+        Copia los agentes del mundo a los arreglos del motor.
+        Debe llamarse si se añaden o eliminan agentes del mundo fuera del motor.
+        """
+        store = self.world.agents
+        self.ids = store.ids()
+        self.pos_y = store.pos_y[self.ids].astype(np.intp)
+        self.pos_x = store.pos_x[self.ids].astype(np.intp)
+        self.moved = np.zeros(len(self.ids), dtype=bool)
+
+    def load_goal(self):
+        """
+        Precalcula las casillas objetivo ordenadas por bloque de la figura para la versión actual.
+        """
+        self.goal_cells = self.world.goal_cells()
+        goal = self.world.goal_compiled
+        if goal is None:
+            self.sub_cells = np.empty((0, 2), dtype=np.intp)
+            self.sub_sizes = np.empty(0, dtype=np.intp)
+        else:
+            # Casillas ordenadas por bloque con el desplazamiento inicial de cada uno
+            order = np.argsort(goal.tile_index[goal.ys, goal.xs], kind='stable')
+            oy = self.world.goal_origin[0] + goal.origin[0]
+            ox = self.world.goal_origin[1] + goal.origin[1]
+            self.sub_cells = np.stack([(goal.ys[order] + oy) % self.world.h,
+                                       (goal.xs[order] + ox) % self.world.w], axis=1).astype(np.intp)
+            self.sub_sizes = goal.tile_sizes.astype(np.intp)
+        self.sub_start = np.concatenate(([0], np.cumsum(self.sub_sizes)[:-1])).astype(np.intp)
+        self.goal_version = self.world.goal_version
+
+    def solve_step(self):
+        """
+        Realiza un paso en el proceso de solución moviendo a todos los agentes a la vez.
+        Los agentes fuera de la figura se mueven hacia una casilla objetivo aleatoria o a un vecino
+        aleatorio con envolvimiento. Los agentes dentro de la figura se redistribuyen hacia los
+        bloques de la figura con más casillas libres. Los conflictos por la misma casilla se resuelven
+        eligiendo un ganador aleatorio.
+        """
+        if self.goal_version != self.world.goal_version:
+            self.load_goal()
+        if self.use_distance_field:
+            self.world.refresh_distance_field()
+        self.world.refresh_goal_tiles()
+
+        target_y, target_x = self.compute_targets()
+        self.resolve_moves(target_y, target_x)
+        self.update_visualization()
+
+    def compute_targets(self):
+        """
+        Calcula la casilla destino de cada agente.
+
+        Returns:
+        - tuple: Arreglos (target_y, target_x) con el destino de cada agente.
+        """
+        h, w = self.world.h, self.world.w
+        pos_y, pos_x = self.pos_y, self.pos_x
+        nagents = len(self.ids)
+        target_y, target_x = pos_y.copy(), pos_x.copy()
+
+        in_goal = self.world.goal_mask[pos_y, pos_x]
+        outside = ~in_goal
+
+        # Agentes fuera de la figura: paso con el signo de la diferencia hacia una casilla objetivo
+        # o, con el campo de distancias, hacia un vecino más cercano a la figura (mejor si está libre)
+        biased = outside & (self.rng.random(nagents) < self.probability)
+        if len(self.goal_cells) and self.use_distance_field:
+            field, shift = self.world.get_shifted_distance_field()
+            by, bx = pos_y[biased], pos_x[biased]
+            current_dist = self.field_at(field, shift, by, bx)
+            step_y = self.downhill_step(field, shift, by, bx, current_dist, NEIGHBOR_DY[:2], 0)
+            step_x = self.downhill_step(field, shift, by, bx, current_dist, NEIGHBOR_DX[2:], 1)
+            target_y[biased] = by + step_y
+            target_x[biased] = bx + step_x
+        elif len(self.goal_cells):
+            chosen = self.goal_cells[self.rng.integers(len(self.goal_cells), size=np.count_nonzero(biased))]
+            target_y[biased] = pos_y[biased] + np.sign(chosen[:, 0] - pos_y[biased])
+            target_x[biased] = pos_x[biased] + np.sign(chosen[:, 1] - pos_x[biased])
+        else:
+            biased[:] = False
+
+        # Resto de agentes fuera de la figura: vecino aleatorio con envolvimiento
+        wander = outside & ~biased
+        dirs = self.rng.integers(4, size=np.count_nonzero(wander))
+        target_y[wander] = pos_y[wander] + NEIGHBOR_DY[dirs]
+        target_x[wander] = pos_x[wander] + NEIGHBOR_DX[dirs]
+
+        # Agentes dentro de la figura: casilla aleatoria de un bloque con huecos libres, según la
+        # ocupación de los bloques calculada en este paso con la tabla de sumas acumuladas
+        settled = np.flatnonzero(in_goal)
+        if len(settled) and len(self.sub_sizes):
+            free = self.sub_sizes - self.world.get_goal_tiles().counts
+            if free.sum() > 0:
+                subregion = self.rng.choice(len(free), size=len(settled), p=free / free.sum())
+                offset = (self.rng.random(len(settled)) * self.sub_sizes[subregion]).astype(np.intp)
+                cell = self.sub_cells[self.sub_start[subregion] + offset]
+                target_y[settled] = cell[:, 0]
+                target_x[settled] = cell[:, 1]
+
+        return target_y % h, target_x % w
+
+    def field_at(self, field, shift, pos_y, pos_x):
+        """
+        Lee el campo de distancias en unas casillas teniendo en cuenta su desplazamiento.
+
+        Parameters:
+        - field (np.ndarray): Campo de distancias del mundo.
+        - shift (tuple): Desplazamiento (sy, sx) del campo (ver GridWorld.get_shifted_distance_field).
+        - pos_y (np.ndarray): Filas de las casillas.
+        - pos_x (np.ndarray): Columnas de las casillas.
+
+        Returns:
+        - np.ndarray: Distancia de cada casilla.
+        """
+        if shift == (0, 0):
+            return field[pos_y, pos_x]
+        return field[(pos_y - shift[0]) % self.world.h, (pos_x - shift[1]) % self.world.w]
+
+    def downhill_step(self, field, shift, pos_y, pos_x, current_dist, steps, axis):
+        """
+        Elige, para cada agente, un desplazamiento a lo largo de un eje que reduce la distancia a la
+        figura objetivo (o 0 si ninguno la reduce), prefiriendo casillas libres.
+
+        Parameters:
+        - field (np.ndarray): Campo de distancias del mundo.
+        - shift (tuple): Desplazamiento (sy, sx) del campo.
+        - pos_y (np.ndarray): Fila de cada agente.
+        - pos_x (np.ndarray): Columna de cada agente.
+        - current_dist (np.ndarray): Distancia actual de cada agente.
+        - steps (np.ndarray): Los dos desplazamientos posibles del eje, p. ej. [-1, 1].
+        - axis (int): 0 para moverse en filas, 1 para moverse en columnas.
+
+        Returns:
+        - np.ndarray: Desplazamiento elegido para cada agente.
+        """
+        h, w = self.world.h, self.world.w
+        if axis == 0:
+            ny, nx = (pos_y[:, None] + steps) % h, np.repeat(pos_x[:, None], 2, axis=1)
+        else:
+            ny, nx = np.repeat(pos_y[:, None], 2, axis=1), (pos_x[:, None] + steps) % w
+        downhill = self.field_at(field, shift, ny, nx) < current_dist[:, None]
+        free = self.world.cells[ny, nx] == UNOCCUPIED
+        choice = np.argmax(self.rng.random(downhill.shape) + downhill + (downhill & free), axis=1)
+        return np.where(downhill.any(axis=1), steps[choice], 0)
+
+    def resolve_moves(self, target_y, target_x):
+        """
+        Aplica los movimientos que no tienen conflicto.
+        Un movimiento se bloquea si la casilla destino estaba ocupada al inicio del paso; si varios
+        agentes eligen la misma casilla libre, solo uno de ellos (al azar) la ocupa.
+
+        Parameters:
+        - target_y (np.ndarray): Fila destino de cada agente.
+        - target_x (np.ndarray): Columna destino de cada agente.
+
+        Returns:
+        - np.ndarray: Índices (en los arreglos del motor) de los agentes que se movieron.
+        """
+        cells = self.world.cells
+        w = self.world.w
+        target = target_y * w + target_x
+        moving = (target_y != self.pos_y) | (target_x != self.pos_x)
+        candidates = np.flatnonzero(moving & (cells.ravel()[target] == UNOCCUPIED))
+
+        order = self.rng.permutation(candidates)
+        _, first = np.unique(target[order], return_index=True)
+        winners = order[first]
+
+        cells[self.pos_y[winners], self.pos_x[winners]] = UNOCCUPIED
+        cells[target_y[winners], target_x[winners]] = self.ids[winners]
+        self.pos_y[winners] = target_y[winners]
+        self.pos_x[winners] = target_x[winners]
+        self.moved[winners] = True
+
+        # Escribe los movimientos en el almacén de agentes del mundo
+        store = self.world.agents
+        moved_ids = self.ids[winners]
+        store.pos_y[moved_ids] = target_y[winners]
+        store.pos_x[moved_ids] = target_x[winners]
+        reached = self.world.goal_mask[target_y[winners], target_x[winners]]
+        self.world.agents_inside += int(np.count_nonzero(reached)) - int(np.count_nonzero(store.goal[moved_ids]))
+        store.goal[moved_ids] = reached
+        if len(winners):
+            # La ocupación ha cambiado sin pasar por los contadores de bloques
+            self.world.goal_tiles_version = None
+        return winners
+
+    def goal_reached(self):
+        """
+        Obtiene qué agentes se encuentran dentro de la figura objetivo.
+
+        Returns:
+        - np.ndarray: Arreglo booleano con el estado objetivo de cada agente.
+        """
+        return self.world.goal_mask[self.pos_y, self.pos_x]
+
+    def sync_world(self):
+        """
+        Marca para redibujar los agentes que se movieron desde la última sincronización.
+        Las posiciones ya están escritas en el almacén de agentes del mundo.
+        """
+        self.world.dirty_agents.update(self.ids[self.moved].tolist())
+        self.moved[:] = False
+
+    def update_visualization(self):
+        """
+        Actualiza la visualización después de realizar los movimientos.
+        """
+        if self.vis:
+            self.sync_world()
+            self.vis.update_dirty_agents()
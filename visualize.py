@@ -1,6 +1,6 @@
 from macros import *
 import numpy as np
-from gworld import *
+from raster import render_frame, scale_frame, encode_ppm, BLUE
 from tkinter import *
 
 #### CONSTANTS ####
@@ -28,17 +28,21 @@ class Visualize:
         self.agent_h, self.agent_w = self.get_agent_size()
         self.vis_cells = np.zeros_like(self.world.cells, dtype=int)
         self.aindx_obj = dict()
-
-    
+        self.world_drawn = False
 
     def draw_world(self):
         """
         Dibuja la cuadrícula del mundo en la interfaz gráfica.
+        Si la cuadrícula ya está dibujada solo se recolorean las casillas objetivo que cambiaron.
         """
+        if self.world_drawn:
+            self.update_goal_vis()
+            return
+
         nrows, ncols = self.world.get_size()
         for row in range(nrows):
             for col in range(ncols):
-                if (row, col) in self.world.goal_pos:
+                if self.world.goal_mask[row][col]:
                     fill_color = 'lightgrey'  # Color gris claro para las casillas GOAL
                 else:
                     fill_color = 'white'
@@ -47,6 +51,20 @@ class Visualize:
                                                                         FRAME_MARGIN + self.cell_w * (col + 1),
                                                                         FRAME_MARGIN + self.cell_h * (row + 1))
                 self.canvas.itemconfig(self.vis_cells[row][col], fill=fill_color, outline='black')
+        self.world.pop_dirty_goal_cells()
+        self.world_drawn = True
+
+    def update_goal_vis(self):
+        """
+        Actualiza la figura objetivo en la interfaz gráfica reutilizando los elementos del canvas.
+        Solo se recolorean las casillas que entraron o salieron de la figura desde el último dibujado
+        (ver GridWorld.pop_dirty_goal_cells), cuyo número es proporcional al perímetro cuando la
+        figura se traslada, y se redibujan los agentes cuyo estado objetivo cambió.
+        """
+        for (row, col) in self.world.pop_dirty_goal_cells():
+            fill_color = 'lightgrey' if self.world.goal_mask[row][col] else 'white'
+            self.canvas.itemconfig(self.vis_cells[row][col], fill=fill_color)
+        self.update_dirty_agents()
 
     def get_pos_in_cell(self, crow, ccol):
         """
@@ -74,7 +92,10 @@ class Visualize:
         for crow in range(self.world.h):
             for ccol in range(self.world.w):
                 cell = self.world.cells[crow][ccol]
-                if cell != UNOCCUPIED:
+                if cell in self.aindx_obj:
+                    # El agente ya tiene un elemento en el canvas, se reutiliza
+                    self.update_agent_vis(cell)
+                elif cell != UNOCCUPIED:
                     y1, x1, y2, x2 = self.get_pos_in_cell(crow, ccol)
                     color_indx = 0
                     self.aindx_obj[cell] = self.canvas.create_oval(x1, y1, x2, y2, fill=COLORS[color_indx],
@@ -91,13 +112,24 @@ class Visualize:
         y1, x1, y2, x2 = self.get_pos_in_cell(cy, cx)
 
         # Cambia el color a rojo si el agente ha alcanzado una posición objetivo
-        color = 'green' if (cy, cx) in self.world.goal_pos else 'red'
+        color = 'green' if self.world.is_goal((cy, cx)) else 'red'
         if desp:
             color = 'blue'
 
         self.canvas.coords(self.aindx_obj[aindx], x1, y1, x2, y2)
         self.canvas.itemconfig(self.aindx_obj[aindx], fill=color)
-        
+
+    def update_dirty_agents(self):
+        """
+        Redibuja solo los agentes cuya casilla o estado objetivo cambió desde el último dibujado.
+        Los agentes eliminados del mundo se eliminan también de la interfaz gráfica.
+        """
+        for aindx in self.world.pop_dirty_agents():
+            if aindx in self.world.aindx_cpos:
+                if aindx in self.aindx_obj:
+                    self.update_agent_vis(aindx)
+            elif aindx in self.aindx_obj:
+                self.remove_agent_vis(aindx)
 
     def get_cell_size(self):
         """
@@ -134,4 +166,119 @@ class Visualize:
         # Elimina el objeto visual asociado al agente
         self.canvas.delete(self.aindx_obj[aindx])
         # Asegúrate de eliminar el objeto de la lista
-        del self.aindx_obj[aindx]
\ No newline at end of file
+        del self.aindx_obj[aindx]
+
+class RasterVisualize:
+    def __init__(self, world_data):
+        """
+        Inicializa una visualización del mundo basada en imagen.
+        Cada fotograma se construye como un único búfer RGB de NumPy a partir de world.cells y la
+        máscara objetivo, y se muestra en el canvas como una sola imagen. Ofrece la misma interfaz
+        que Visualize y está pensada para cuadrículas grandes.
+
+        Parameters:
+        - world_data: Objeto GridWorld denso que contiene la información del mundo.
+        """
+        if not world_data.dense:
+            raise ValueError('RasterVisualize requires a dense grid')
+        self.frame = Tk()
+        self.canvas = Canvas(self.frame, width=FRAME_WIDTH, height=FRAME_HEIGHT)
+        self.canvas.grid()
+        self.world = world_data
+        world_data.visualize = self
+        self.image_h = FRAME_HEIGHT - 2 * FRAME_MARGIN
+        self.image_w = FRAME_WIDTH - 2 * FRAME_MARGIN
+        self.buffer = np.empty(self.world.cells.shape + (3,), dtype=np.uint8)
+        self.highlighted = set()          # Agentes desplazados que se dibujan en azul hasta su siguiente movimiento.
+        self.stale = False                # True si hay cambios sin dibujar que no están en dirty_agents.
+        self.image = PhotoImage(width=self.image_w, height=self.image_h)
+        self.image_obj = self.canvas.create_image(FRAME_MARGIN, FRAME_MARGIN, image=self.image, anchor=NW)
+
+    def render(self):
+        """
+        Construye el fotograma actual y lo muestra en el canvas.
+        """
+        # El fotograma se construye entero desde goal_mask, no necesita las casillas cambiadas
+        self.world.pop_dirty_goal_cells()
+        frame = render_frame(self.world.cells, self.world.goal_mask, out=self.buffer)
+        for aindx in self.highlighted:
+            if aindx in self.world.aindx_cpos:
+                cy, cx = self.world.aindx_cpos[aindx]
+                frame[cy, cx] = BLUE
+        frame = scale_frame(frame, self.image_h, self.image_w)
+        self.image.configure(data=encode_ppm(frame), format='PPM')
+        self.stale = False
+
+    def draw_world(self):
+        """
+        Dibuja la cuadrícula del mundo en la interfaz gráfica.
+        """
+        self.render()
+
+    def draw_agents(self):
+        """
+        Dibuja los agentes en la interfaz gráfica.
+        """
+        self.render()
+
+    def update_agent_vis(self, aindx, desp = False):
+        """
+        Actualiza la representación visual de un agente. No se redibuja aquí: el cambio aparece en
+        el siguiente fotograma (ver update_dirty_agents), así que llamarlo para muchos agentes
+        seguidos cuesta lo mismo que para uno.
+
+        Parameters:
+        - aindx (int): Índice del agente cuya posición visual se va a actualizar.
+        - desp (bool): True si el agente fue desplazado y debe resaltarse.
+        """
+        if desp:
+            self.highlighted.add(aindx)
+        else:
+            self.highlighted.discard(aindx)
+        self.stale = True
+
+    def update_dirty_agents(self):
+        """
+        Redibuja el fotograma si algún agente cambió de casilla o de estado objetivo, o si hubo
+        cambios desde el último fotograma.
+        """
+        dirty_agents = self.world.pop_dirty_agents()
+        if dirty_agents or self.stale:
+            self.highlighted -= dirty_agents
+            self.render()
+
+    def update_goal_vis(self):
+        """
+        Actualiza la figura objetivo en la interfaz gráfica.
+        """
+        self.world.pop_dirty_agents()
+        self.render()
+
+    def remove_agent_vis(self, aindx):
+        """
+        Elimina visualmente a un agente de la interfaz gráfica. Como update_agent_vis, el cambio se
+        dibuja en el siguiente fotograma.
+
+        Parameters:
+        - aindx (int): Índice del agente a eliminar visualmente.
+        """
+        self.highlighted.discard(aindx)
+        self.stale = True
+
+def create_visualize(world_data, renderer='canvas'):
+    """
+    Crea la visualización del mundo con el renderizador indicado.
+
+    Parameters:
+    - world_data: Objeto GridWorld que contiene la información del mundo.
+    - renderer (str): 'canvas' para un elemento del canvas por casilla y agente, o 'raster' para
+      una única imagen por fotograma (recomendado para cuadrículas grandes).
+
+    Returns:
+    - Visualize o RasterVisualize: Visualización creada.
+    """
+    if renderer == 'canvas':
+        return Visualize(world_data)
+    if renderer == 'raster':
+        return RasterVisualize(world_data)
+    raise ValueError('Unknown renderer: %s' % renderer)